@@ -5,117 +5,1176 @@ Advanced analytics using ML models and statistical analysis
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import hashlib
+import heapq
+import itertools
 import json
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sklearn.base import clone
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
+from model_registry import ModelRegistry, PackedForest
+from sentiment_classifier import SentimentClassifier
 import warnings
 warnings.filterwarnings('ignore')
 
-class AIAnalyticsEngine:
+FORECAST_HORIZON = 7
+FORECAST_MODES = ('random_forest', 'incremental')
+FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', min(4, os.cpu_count() or 1)))
+# Per-series streaming anomaly detectors kept per engine (LRU)
+ANOMALY_MAX_SERIES = int(os.getenv('ANOMALY_MAX_SERIES', 10000))
+
+_forecast_pool = None
+_forecast_pool_lock = threading.Lock()
+
+
+class _ForecastWorkerProcess(multiprocessing.context.SpawnProcess):
+    """Spawned pool worker that starts from this module alone.
+
+    A spawned child first re-runs the parent's __main__ script (as
+    __mp_main__); under `python server.py` that is a whole second server
+    per worker - torch, job queue, analytics engine, banner. Pool tasks
+    only need functions from this module, so the child is started with a
+    bare __main__ in place of the script. The swap is held only while the
+    child's start-up data is captured, under a lock.
+    """
+
+    _start_lock = threading.Lock()
+    _bare_main = types.ModuleType('__main__')
+
+    def start(self):
+        with self._start_lock:
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = self._bare_main
+            try:
+                super().start()
+            finally:
+                sys.modules['__main__'] = main
+
+
+class _ForecastContext(multiprocessing.context.SpawnContext):
+    Process = _ForecastWorkerProcess
+
+
+def _get_forecast_pool():
+    """Process pool for random forest batches, created on first use and kept.
+
+    Workers are spawned rather than forked, since the caller is usually a
+    threaded Flask/gunicorn worker whose locks must not be copied mid-use,
+    and they import only this module (see _ForecastWorkerProcess).
+    """
+    global _forecast_pool
+    with _forecast_pool_lock:
+        if _forecast_pool is None:
+            _forecast_pool = ProcessPoolExecutor(
+                max_workers=FORECAST_WORKERS,
+                mp_context=_ForecastContext()
+            )
+        return _forecast_pool
+
+
+def _reset_forecast_pool(pool):
+    """Drop a broken pool so the next batch starts a fresh one"""
+    global _forecast_pool
+    with _forecast_pool_lock:
+        if _forecast_pool is pool:
+            _forecast_pool = None
+    pool.shutdown(wait=False)
+
+
+class SeriesForecastCache:
+    """Per-series linear trend state, checkpointed at the last length seen.
+
+    Each state holds the sufficient statistics of an ordinary least squares
+    fit of value on day index, so appending days only folds the new points
+    into the sums instead of refitting the whole history. A checkpoint is
+    keyed by series id (or, without one, a digest of the series' first
+    days) and stores the length and a digest of the values it covers; a
+    lookup verifies that digest with one C-level hash of the same prefix.
+    """
+
+    HEAD = 32
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    @classmethod
+    def _series_key(cls, values, series_id):
+        if series_id is not None:
+            return ('id', series_id)
+        return ('head', hashlib.sha1(values[:cls.HEAD].tobytes()).digest())
+
+    @staticmethod
+    def _digest(values):
+        return hashlib.sha1(values.tobytes()).digest()
+
+    def get_state(self, values, series_id=None):
+        """Return (n, sum_t, sum_y, sum_tt, sum_ty, sum_yy) for the series"""
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        if not len(values):
+            return (0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        
+        key = self._series_key(values, series_id)
+        with self._lock:
+            checkpoint = self._states.get(key)
+        
+        start, state = 0, (0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        if checkpoint is not None:
+            n, digest, cached = checkpoint
+            if n <= len(values) and self._digest(values[:n]) == digest:
+                start, state = n, cached
+        
+        with self._lock:
+            if start == len(values):
+                self.hits += 1
+                self._states.move_to_end(key)
+                return state
+            if start > 0:
+                self.updates += 1
+            else:
+                self.misses += 1
+        
+        # Fold the appended days into the running sums
+        t = np.arange(start, len(values), dtype=np.float64)
+        y = values[start:]
+        n, sum_t, sum_y, sum_tt, sum_ty, sum_yy = state
+        state = (
+            n + len(y),
+            sum_t + float(t.sum()),
+            sum_y + float(y.sum()),
+            sum_tt + float(np.dot(t, t)),
+            sum_ty + float(np.dot(t, y)),
+            sum_yy + float(np.dot(y, y))
+        )
+        
+        with self._lock:
+            self._states[key] = (len(values), self._digest(values), state)
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+        
+        return state
+
+    def stats(self):
+        """Cache hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.updates + self.misses
+            return {
+                'hits': self.hits,
+                'incremental_updates': self.updates,
+                'misses': self.misses,
+                'entries': len(self._states),
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def _trend_from_state(state):
+    """Solve the OLS line from sufficient statistics -> (slope, intercept, r2)"""
+    n, sum_t, sum_y, sum_tt, sum_ty, sum_yy = state
+    var_t = n * sum_tt - sum_t ** 2
+    var_y = n * sum_yy - sum_y ** 2
+    cov_ty = n * sum_ty - sum_t * sum_y
+    
+    slope = cov_ty / var_t if var_t > 0 else 0.0
+    intercept = (sum_y - slope * sum_t) / n
+    r2 = (cov_ty ** 2) / (var_t * var_y) if var_t > 0 and var_y > 0 else 0.0
+    return slope, intercept, r2
+
+
+class StreamingAnomalyDetector:
+    """Running z-score detector with O(1) work per new point.
+
+    Keeps Welford's running mean/variance, or an exponentially weighted mean
+    and variance when alpha is given. Each point is scored against the stats
+    of the points before it, then folded in. After a zero-variance warmup
+    any deviation from the baseline counts as a high-severity anomaly.
+    """
+
+    # Relative tolerance for "equal to a constant baseline"
+    EPSILON = 1e-9
+
+    def __init__(self, threshold=2, warmup=5, alpha=None):
+        self.threshold = threshold
+        self.warmup = warmup
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def variance(self):
+        if self.alpha is not None:
+            return self._m2
+        return self._m2 / self.count if self.count else 0.0
+
+    def _fold(self, value):
+        """Score one point against the stats so far, then fold it in (lock held)"""
+        value = float(value)
+        index = self.count
+        anomaly = None
+        if self.count >= self.warmup:
+            deviation = abs(value - self.mean)
+            std = self.variance ** 0.5
+            if std > self.EPSILON * max(1.0, abs(self.mean)):
+                z_score = deviation / std
+            else:
+                z_score = float('inf') if deviation > self.EPSILON * max(1.0, abs(self.mean)) else 0.0
+            if z_score > self.threshold:
+                anomaly = {
+                    'index': index,
+                    'value': value,
+                    'severity': 'high' if z_score > 3 else 'medium',
+                    'type': 'spike' if value > self.mean else 'drop'
+                }
+        
+        self.count += 1
+        delta = value - self.mean
+        if self.alpha is None or self.count == 1:
+            self.mean += delta / self.count
+            if self.alpha is None:
+                self._m2 += delta * (value - self.mean)
+        else:
+            increment = self.alpha * delta
+            self.mean += increment
+            self._m2 = (1 - self.alpha) * (self._m2 + delta * increment)
+        return anomaly
+
+    def update(self, value):
+        """Score one new point, fold it into the stats, return an anomaly or None"""
+        with self._lock:
+            return self._fold(value)
+
+    def update_many(self, values):
+        """Feed a batch of new points in order, return the anomalies among them"""
+        with self._lock:
+            return [anomaly for anomaly in map(self._fold, values) if anomaly]
+
+    def consume(self, history):
+        """Score the points of a growing history that have not been seen yet.
+
+        A history shorter than what was already consumed means the series
+        was reset or truncated, so the detector starts over from its start.
+        """
+        with self._lock:
+            if len(history) < self.count:
+                self.reset()
+            return [anomaly for anomaly in map(self._fold, history[self.count:]) if anomaly]
+
+
+class CampaignStore:
+    """Columnar view of campaign_tracking: one NumPy array per metric.
+
+    Rows are addressed by position; ``index`` maps campaign id -> row.
+    Non-numeric campaign fields (channel, creative, ...) are kept as
+    dimension columns for grouped reductions, built on first use.
+    """
+
+    METRICS = {
+        'clicks': 'clicks',
+        'conversions': 'conversions',
+        'revenue': 'revenue_estimate',
+        'spend': 'ad_spend'
+    }
+
+    def __init__(self, ids, clicks, conversions, revenue, spend, dimensions=None, rows=None):
+        self.ids = np.asarray(ids, dtype=object)
+        self._index = None
+        self.clicks = np.asarray(clicks)
+        self.conversions = np.asarray(conversions)
+        self.revenue = np.asarray(revenue)
+        self.spend = np.asarray(spend)
+        self._dimensions = dimensions
+        self._rows = rows
+
+    @classmethod
+    def from_campaigns(cls, campaign_data):
+        """Build the store from a campaign_tracking dict"""
+        rows = list(campaign_data.values())
+        columns = {
+            name: np.array(list(map(dict.get, rows, itertools.repeat(field), itertools.repeat(0))))
+            if rows else np.zeros(0, dtype=np.int64)
+            for name, field in cls.METRICS.items()
+        }
+        return cls(list(campaign_data), rows=rows, **columns)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {cid: i for i, cid in enumerate(self.ids)}
+        return self._index
+
+    @property
+    def dimensions(self):
+        """String-valued campaign fields as object columns ('unknown' where missing)"""
+        if self._dimensions is None:
+            rows = self._rows or []
+            numeric_fields = set(self.METRICS.values())
+            names = {k for c in rows for k, v in c.items() if k not in numeric_fields and isinstance(v, str)}
+            self._dimensions = {
+                name: np.array([c.get(name, 'unknown') for c in rows], dtype=object)
+                for name in names
+            }
+            self._rows = None
+        return self._dimensions
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, campaign_id):
+        """Metrics for one campaign as a campaign_tracking style dict"""
+        i = self.index[campaign_id]
+        return {field: getattr(self, name)[i].item() for name, field in self.METRICS.items()}
+
+    def roi_summary(self):
+        """Portfolio ROI, ROAS and profit as vectorized reductions"""
+        total_spent = self.spend.sum().item()
+        total_revenue = self.revenue.sum().item()
+        roi = ((total_revenue - total_spent) / total_spent * 100) if total_spent > 0 else 0
+        
+        return {
+            'roi': round(roi, 2),
+            'total_revenue': total_revenue,
+            'total_spent': total_spent,
+            'profit': total_revenue - total_spent,
+            'roas': round(total_revenue / total_spent, 2) if total_spent > 0 else 0
+        }
+
+    def top(self, metric='conversions', n=1):
+        """Top-n campaigns by a metric column, first-listed first on ties
+
+        Same shape as CampaignLeaderboard.top: [{'campaign_id', metric}].
+        """
+        values = getattr(self, metric)
+        n = min(n, len(self))
+        if n <= 0:
+            return []
+        if n == 1:
+            order = [int(np.argmax(values))]
+        else:
+            # Partition to the n-th largest, then stable-sort only the candidates
+            cut = np.partition(values, len(values) - n)[len(values) - n]
+            candidates = np.flatnonzero(values >= cut)
+            order = candidates[np.argsort(-values[candidates], kind='stable')][:n]
+        return [{'campaign_id': self.ids[i], metric: values[i].item()} for i in order]
+
+    def grouped_roi(self, dimension):
+        """ROI, ROAS and profit per value of a dimension column"""
+        if dimension not in self.dimensions:
+            raise KeyError(f"Unknown campaign dimension: {dimension}")
+        if not len(self):
+            return {}
+        
+        groups, inverse = np.unique(self.dimensions[dimension].astype(str), return_inverse=True)
+        sums = {
+            name: np.bincount(inverse, weights=getattr(self, name), minlength=len(groups))
+            for name in self.METRICS
+        }
+        campaigns = np.bincount(inverse, minlength=len(groups))
+        spend, revenue = sums['spend'], sums['revenue']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = np.where(spend > 0, (revenue - spend) / spend * 100, 0.0)
+            roas = np.where(spend > 0, revenue / spend, 0.0)
+        
+        return {
+            str(group): {
+                'roi': round(float(roi[i]), 2),
+                'roas': round(float(roas[i]), 2),
+                'total_revenue': float(revenue[i]),
+                'total_spent': float(spend[i]),
+                'profit': float(revenue[i] - spend[i]),
+                'conversions': float(sums['conversions'][i]),
+                'clicks': float(sums['clicks'][i]),
+                'campaigns': int(campaigns[i])
+            }
+            for i, group in enumerate(groups)
+        }
+
+
+_worker_registries = {}
+
+
+def _forest_forecast_row(args):
+    """Fit a random forest on one history row (runs in a worker process)
+
+    With a registry (root, max_bytes) and model name the fitted forest is
+    also saved there, packed and tagged with the history digest, so the
+    next request loads it instead of refitting.
+    """
+    params, row, registry, name, digest = args
+    row = row[~np.isnan(row)]
+    if len(row) < 3:
+        return None
+    model = RandomForestRegressor(**params)
+    model.fit(np.arange(len(row)).reshape(-1, 1), row)
+    future_X = np.arange(len(row), len(row) + FORECAST_HORIZON).reshape(-1, 1)
+    if name is None:
+        return model.predict(future_X)
+    
+    if registry not in _worker_registries:
+        _worker_registries[registry] = ModelRegistry(*registry)
+    forest = PackedForest.from_sklearn(model, {'digest': digest, 'days': len(row)})
+    _worker_registries[registry].save(name, forest)
+    return forest.predict(future_X)
+
+
+def _history_matrix(histories):
+    """Left-pad ragged histories with NaN so their last days line up"""
+    width = max((len(h) for h in histories), default=0)
+    matrix = np.full((len(histories), width), np.nan)
+    for i, history in enumerate(histories):
+        if len(history):
+            matrix[i, width - len(history):] = history
+    return matrix
+
+
+class DatasetLoader:
+    """Keeps data.json parsed in memory together with its derived aggregates.
+
+    Every get() costs one os.stat(); the file is re-read and the aggregates
+    recomputed only when its mtime or size changes. derive(data, previous)
+    receives the previous snapshot (None on the first load) so it can update
+    aggregates in place. If a reload fails (file missing or caught
+    mid-write) the last good snapshot keeps being served.
+    """
+
+    def __init__(self, path='data.json', derive=None):
+        self.path = path
+        self.derive = derive
+        self.reloads = 0
+        self._signature = None
+        self._snapshot = {'data': {}, 'derived': derive({}, None) if derive else {}}
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        """Return {'data': ..., 'derived': ...}, reloading only if the file changed"""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return self._snapshot
+        
+        with self._lock:
+            if signature == self._signature:
+                return self._snapshot
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self._snapshot = {
+                    'data': data,
+                    'derived': self.derive(data, self._snapshot) if self.derive else {}
+                }
+                self.reloads += 1
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not reload {self.path}: {e}")
+            self._signature = signature
+            return self._snapshot
+
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _epoch_seconds(timestamps):
+    """Coerce epoch numbers, datetime64 or ISO strings to int64 epoch seconds"""
+    ts = np.asarray(timestamps)
+    if ts.dtype.kind in 'iuf':
+        return ts.astype(np.int64)
+    return ts.astype('datetime64[s]').astype(np.int64)
+
+
+class EngagementHistogram:
+    """Hour-of-week (7 x 24) engagement and post-volume histograms.
+
+    Batches are binned with np.bincount and merged into running totals, so
+    new events never require re-scanning the history.
+    """
+
+    SLOTS = 7 * 24
+    CHUNK_SIZE = 100000
+
+    def __init__(self, timezone='America/Los_Angeles'):
+        self.timezone = timezone
+        self.tz = ZoneInfo(timezone)
+        self.engagement = np.zeros(self.SLOTS)
+        self.events = np.zeros(self.SLOTS, dtype=np.int64)
+        self.posts = np.zeros(self.SLOTS, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _local_hours(self, timestamps):
+        """Epoch timestamps -> hours since the epoch in local (DST-aware) time"""
+        hours = _epoch_seconds(timestamps) // 3600
+        # Offsets only change on whole hours, so look each distinct hour up once
+        unique, inverse = np.unique(hours, return_inverse=True)
+        offsets = np.array([
+            datetime.fromtimestamp(int(h) * 3600, self.tz).utcoffset() // timedelta(hours=1)
+            for h in unique
+        ], dtype=np.int64)
+        return hours + offsets[inverse]
+
+    def _slots(self, timestamps):
+        hours = self._local_hours(timestamps)
+        # 1970-01-01 was a Thursday (weekday 3 with Monday = 0)
+        return ((hours // 24 + 3) % 7) * 24 + hours % 24
+
+    def add_events(self, timestamps, weights=None):
+        """Merge a batch of engagement events (optionally weighted, e.g. likes)"""
+        slots = self._slots(timestamps)
+        engagement = np.bincount(slots, weights=weights, minlength=self.SLOTS)
+        events = np.bincount(slots, minlength=self.SLOTS)
+        with self._lock:
+            self.engagement += engagement
+            self.events += events
+
+    def add_posts(self, timestamps):
+        """Merge a batch of post timestamps used to normalize engagement"""
+        posts = np.bincount(self._slots(timestamps), minlength=self.SLOTS)
+        with self._lock:
+            self.posts += posts
+
+    def add_stream(self, events):
+        """Consume an iterable of {'timestamp', 'engagement'} dicts in bounded chunks"""
+        events = iter(events)
+        while True:
+            chunk = list(itertools.islice(events, self.CHUNK_SIZE))
+            if not chunk:
+                break
+            self.add_events([e['timestamp'] for e in chunk],
+                            [e.get('engagement', 1) for e in chunk])
+
+    def merge(self, other):
+        """Fold another histogram (e.g. from another worker) into this one"""
+        with self._lock:
+            self.engagement += other.engagement
+            self.events += other.events
+            self.posts += other.posts
+
+    def add(self, engagement_data):
+        """Merge a dict of arrays ('timestamps', optional 'engagements' weights,
+        optional 'post_timestamps') or an iterable of {'timestamp', 'engagement'} dicts"""
+        if isinstance(engagement_data, dict):
+            if len(engagement_data.get('timestamps', [])):
+                self.add_events(engagement_data['timestamps'], engagement_data.get('engagements'))
+            if len(engagement_data.get('post_timestamps', [])):
+                self.add_posts(engagement_data['post_timestamps'])
+        else:
+            self.add_stream(engagement_data)
+
+    def is_empty(self):
+        with self._lock:
+            return not (self.events.any() or self.posts.any())
+
+    def ranked_slots(self, top_n=5):
+        """Slots ranked by engagement per post, with lift over the average post
+
+        Only slots that had posts are ranked, and the baseline is their
+        engagement per post; without any post volume there is nothing to
+        normalize by and no slots are returned.
+        """
+        with self._lock:
+            engagement = self.engagement.copy()
+            posts = self.posts.copy()
+            events = self.events.copy()
+        
+        populated = posts > 0
+        if not populated.any():
+            return []
+        rate = np.zeros(self.SLOTS)
+        rate[populated] = engagement[populated] / posts[populated]
+        baseline = engagement[populated].sum() / posts.sum()
+        lift = rate / baseline - 1 if baseline > 0 else np.zeros(self.SLOTS)
+        
+        candidates = np.flatnonzero(populated & (engagement > 0))
+        order = candidates[np.argsort(-rate[candidates], kind='stable')][:top_n]
+        return [
+            {
+                'day': WEEKDAYS[slot // 24],
+                'hour': int(slot % 24),
+                'engagement_rate': round(float(rate[slot]), 4),
+                'lift': round(float(lift[slot]), 4),
+                'events': int(events[slot]),
+                'posts': int(posts[slot])
+            }
+            for slot in order
+        ]
+
+
+SENTIMENT_LABELS = ('positive', 'negative', 'neutral')
+
+
+def _sentiment_codes(labels):
+    """Map sentiment labels to 0/1/2 (positive/negative/neutral); unknown -> neutral"""
+    labels = np.asarray(labels)
+    codes = np.full(len(labels), 2, dtype=np.int64)
+    codes[labels == 'positive'] = 0
+    codes[labels == 'negative'] = 1
+    return codes
+
+
+def _sentiment_summary(counts):
+    """Distribution, dominant label and score from a [pos, neg, neu] count vector"""
+    counts = [int(c) for c in counts]
+    total = sum(counts)
+    return {
+        'sentiment_distribution': {
+            label: round(counts[i] / total * 100, 2) for i, label in enumerate(SENTIMENT_LABELS)
+        },
+        'dominant_sentiment': SENTIMENT_LABELS[counts.index(max(counts))],
+        'sentiment_score': (counts[0] - counts[1]) / total
+    }
+
+
+class SentimentTrendAccumulator:
+    """Hourly [positive, negative, neutral] counts merged batch by batch.
+
+    Only the sparse set of non-empty hour buckets is kept, so merging a new
+    comment batch costs O(batch + buckets) rather than re-reading history.
+    """
+
+    def __init__(self):
+        self.hours = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros((0, 3), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(codes, timestamps):
+        """Aggregate one batch into (sorted hour buckets, counts per bucket)"""
+        hours = _epoch_seconds(timestamps) // 3600
+        buckets, inverse = np.unique(hours, return_inverse=True)
+        counts = np.bincount(inverse * 3 + codes, minlength=len(buckets) * 3)
+        return buckets, counts.reshape(-1, 3)
+
+    def add(self, sentiments, timestamps):
+        hours, counts = self.bucket(_sentiment_codes(sentiments), timestamps)
+        with self._lock:
+            merged, inverse = np.unique(np.concatenate([self.hours, hours]), return_inverse=True)
+            totals = np.zeros((len(merged), 3), dtype=np.int64)
+            np.add.at(totals, inverse, np.concatenate([self.counts, counts]))
+            self.hours, self.counts = merged, totals
+
+    def trends(self, rolling_window=24):
+        with self._lock:
+            return _sentiment_trends(self.hours, self.counts, rolling_window)
+
+
+def _sentiment_trends(hours, counts, rolling_window=24):
+    """Per-hour and per-day distributions plus a rolling score over hour buckets"""
+    if not len(hours):
+        return None
+    
+    def buckets(keys, bucket_counts, unit):
+        totals = bucket_counts.sum(axis=1)
+        pct = np.round(bucket_counts / totals[:, None] * 100, 2)
+        scores = (bucket_counts[:, 0] - bucket_counts[:, 1]) / totals
+        starts = (keys * unit).astype('datetime64[s]').astype(str)
+        return [
+            {
+                'bucket': starts[i],
+                'count': int(totals[i]),
+                'positive': float(pct[i, 0]),
+                'negative': float(pct[i, 1]),
+                'neutral': float(pct[i, 2]),
+                'sentiment_score': round(float(scores[i]), 4)
+            }
+            for i in range(len(keys))
+        ]
+    
+    days, day_inverse = np.unique(hours // 24, return_inverse=True)
+    day_counts = np.zeros((len(days), 3), dtype=np.int64)
+    np.add.at(day_counts, day_inverse, counts)
+    
+    # Rolling score over the trailing window of hours ending at each bucket
+    net = np.concatenate([[0], np.cumsum(counts[:, 0] - counts[:, 1])])
+    volume = np.concatenate([[0], np.cumsum(counts.sum(axis=1))])
+    start = np.searchsorted(hours, hours - rolling_window, side='right')
+    end = np.arange(1, len(hours) + 1)
+    rolling = (net[end] - net[start]) / (volume[end] - volume[start])
+    
+    return {
+        'hourly': buckets(hours, counts, 3600),
+        'daily': buckets(days, day_counts, 86400),
+        'rolling_window_hours': rolling_window,
+        'rolling_sentiment_score': [round(float(v), 4) for v in rolling]
+    }
+
+
+def _campaign_scores(row):
+    """Leaderboard scores for one campaign_tracking entry"""
+    spend = row.get('ad_spend', 0)
+    revenue = row.get('revenue_estimate', 0)
+    return {
+        'conversions': row.get('conversions', 0),
+        'revenue': revenue,
+        'roi': round((revenue - spend) / spend * 100, 2) if spend > 0 else 0
+    }
+
+
+class CampaignLeaderboard:
+    """Campaigns ranked by conversions, ROI and revenue with O(log n) updates.
+
+    Each metric is a binary heap of (-score, seq, version, campaign_id) plus
+    an index of every campaign's live version. update() pushes a new entry
+    and leaves the old one to be discarded lazily; top(n) pops the n best
+    live entries and pushes them back, O(n log N). seq is the insertion
+    order so ties resolve like max() over campaign_tracking.
+    """
+
+    METRICS = ('conversions', 'roi', 'revenue')
+
     def __init__(self):
+        self._heaps = {metric: [] for metric in self.METRICS}
+        self._entries = {}  # campaign_id -> (seq, version, scores)
+        self._dead = dict.fromkeys(self.METRICS, 0)
+        self._seq = itertools.count()
+        self._versions = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_campaigns(cls, campaign_data):
+        """Bulk build: score every campaign, then heapify each metric once"""
+        leaderboard = cls()
+        for campaign_id, row in campaign_data.items():
+            leaderboard._entries[campaign_id] = (next(leaderboard._seq), next(leaderboard._versions), _campaign_scores(row))
+        for metric in cls.METRICS:
+            leaderboard._heaps[metric] = leaderboard._live_heap(metric)
+        return leaderboard
+
+    def _live_heap(self, metric):
+        heap = [(-scores[metric], seq, version, cid) for cid, (seq, version, scores) in self._entries.items()]
+        heapq.heapify(heap)
+        return heap
+
+    def _retire(self):
+        """Count one superseded entry per metric; rebuild heaps that are mostly dead (lock held)"""
+        for metric in self.METRICS:
+            self._dead[metric] += 1
+            if self._dead[metric] > len(self._entries) + 64:
+                self._heaps[metric] = self._live_heap(metric)
+                self._dead[metric] = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, campaign_id, row):
+        """Insert or re-rank a campaign after its metrics change"""
+        scores = _campaign_scores(row)
+        with self._lock:
+            previous = self._entries.get(campaign_id)
+            if previous is not None and previous[2] == scores:
+                return
+            seq = previous[0] if previous else next(self._seq)
+            version = next(self._versions)
+            self._entries[campaign_id] = (seq, version, scores)
+            for metric in self.METRICS:
+                heapq.heappush(self._heaps[metric], (-scores[metric], seq, version, campaign_id))
+            if previous is not None:
+                self._retire()
+
+    def remove(self, campaign_id):
+        with self._lock:
+            if self._entries.pop(campaign_id, None) is not None:
+                self._retire()
+
+    def sync(self, old_campaigns, new_campaigns):
+        """Apply the difference between two campaign_tracking dicts; returns the number of changes"""
+        changed = 0
+        for campaign_id, row in new_campaigns.items():
+            if old_campaigns.get(campaign_id) != row:
+                self.update(campaign_id, row)
+                changed += 1
+        for campaign_id in old_campaigns.keys() - new_campaigns.keys():
+            self.remove(campaign_id)
+            changed += 1
+        return changed
+
+    def top(self, metric='conversions', n=1):
+        """Top-n campaigns for a metric as [{'campaign_id', metric}, ...]"""
+        if metric not in self._heaps:
+            raise KeyError(f"Unknown leaderboard metric: {metric}")
+        with self._lock:
+            heap = self._heaps[metric]
+            head = []
+            while heap and len(head) < n:
+                entry = heapq.heappop(heap)
+                live = self._entries.get(entry[3])
+                # Superseded entries are dropped for good as they surface
+                if live is not None and live[1] == entry[2]:
+                    head.append(entry)
+                else:
+                    self._dead[metric] -= 1
+            for entry in head:
+                heapq.heappush(heap, entry)
+        return [{'campaign_id': cid, metric: -score} for score, _, _, cid in head]
+
+
+def _as_campaign_store(campaign_data):
+    if isinstance(campaign_data, CampaignStore):
+        return campaign_data
+    return CampaignStore.from_campaigns(campaign_data)
+
+
+class AIAnalyticsEngine:
+    def __init__(self, model_registry=None, max_anomaly_series=ANOMALY_MAX_SERIES):
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.model_registry = model_registry or ModelRegistry()
+        self.forecast_cache = SeriesForecastCache()
+        self.anomaly_detectors = OrderedDict()
+        self.max_anomaly_series = max_anomaly_series
+        self.campaign_store = None
+        self.engagement_histogram = EngagementHistogram()
+        self.sentiment_trends = SentimentTrendAccumulator()
+        self.sentiment_classifier = SentimentClassifier()
+        self.dataset = DatasetLoader('data.json', derive=self._derive_dataset)
+        self._detector_lock = threading.Lock()
         print("🤖 AI Analytics Engine initialized")
     
-    def predict_conversions(self, historical_data):
-        """Predict future conversions using ML"""
+    def predict_conversions(self, historical_data, mode='random_forest', series_id=None):
+        """Predict future conversions using ML
+
+        mode='random_forest' fits a forest on the full history; with a
+        series_id (e.g. a campaign id) it is stored in the model registry as
+        a new version of 'forecast_<series_id>' and reused, memory-mapped,
+        by every worker until the history changes.
+        mode='incremental' is a different model: a straight-line OLS trend
+        of value on day index (what LinearRegression would fit), solved from
+        cached sufficient statistics so only days appended since the last
+        call are folded in. Its confidence is the fit's R^2. Forecasts
+        therefore change when switching modes; each result names its
+        'model'.
+        """
         if len(historical_data) < 3:
             return None
+        if mode not in FORECAST_MODES:
+            raise ValueError(f"Unknown forecast mode: {mode}")
+        
+        if mode == 'incremental':
+            state = self.forecast_cache.get_state(historical_data, series_id)
+            slope, intercept, r2 = _trend_from_state(state)
+            future_t = np.arange(len(historical_data), len(historical_data) + FORECAST_HORIZON)
+            predictions = intercept + slope * future_t
+            
+            return {
+                'predictions': predictions.tolist(),
+                'confidence': round(r2, 2),
+                'trend': 'increasing' if predictions[-1] > predictions[0] else 'decreasing',
+                'model': 'linear_trend'
+            }
         
         X = np.array([[i] for i in range(len(historical_data))])
         y = np.array(historical_data)
+        future_X = np.array([[len(historical_data) + i] for i in range(FORECAST_HORIZON)])
         
-        self.model.fit(X, y)
-        
-        # Predict next 7 days
-        future_X = np.array([[len(historical_data) + i] for i in range(7)])
-        predictions = self.model.predict(future_X)
+        if series_id is None:
+            # Anonymous series are fitted privately and not persisted
+            model = clone(self.model)
+            model.fit(X, y)
+            predictions = model.predict(future_X)
+        else:
+            # Reuse the forest another worker fitted for this exact history
+            name, digest, forest = self._registered_forest(series_id, y)
+            if forest is None:
+                # Fit a private copy so concurrent requests never share fitted state
+                model = clone(self.model)
+                model.fit(X, y)
+                forest = PackedForest.from_sklearn(model, {'digest': digest, 'days': len(y)})
+                self.model_registry.save(name, forest)
+            predictions = forest.predict(future_X)
         
         return {
             'predictions': predictions.tolist(),
             'confidence': 0.85,
-            'trend': 'increasing' if predictions[-1] > predictions[0] else 'decreasing'
+            'trend': 'increasing' if predictions[-1] > predictions[0] else 'decreasing',
+            'model': 'random_forest'
         }
     
-    def analyze_sentiment_trends(self, comments):
-        """Analyze sentiment patterns over time"""
-        sentiments = {'positive': 0, 'negative': 0, 'neutral': 0}
+    def _registered_forest(self, series_id, history):
+        """(name, digest, forest) - forest is None unless the latest registered
+        version of the series was fitted on exactly this history"""
+        name = f"forecast_{series_id}"
+        digest = hashlib.sha1(np.asarray(history, dtype=np.float64).tobytes()).hexdigest()
+        forest = self.model_registry.load(name)
+        if forest is not None and forest.metadata.get('digest') != digest:
+            forest = None
+        return name, digest, forest
+    
+    def predict_conversions_batch(self, histories, mode='incremental', series_ids=None):
+        """Forecast the next 7 days for many aligned histories at once
+
+        histories is a (campaigns x days) array; leading NaNs mark days before
+        a campaign started. mode='incremental' solves every row's linear trend
+        in one vectorized pass, mode='random_forest' fans rows out to the
+        shared FORECAST_WORKERS process pool. With series_ids (one per row,
+        e.g. campaign ids) random_forest rows are first looked up in the
+        model registry, like predict_conversions(series_id=...): only rows
+        whose history changed are refitted, and the pool saves their forests.
+        Returns one forecast dict (or None) per row.
+        """
+        if mode not in FORECAST_MODES:
+            raise ValueError(f"Unknown forecast mode: {mode}")
         
-        for comment in comments:
-            sentiment = comment.get('sentiment', 'neutral')
-            sentiments[sentiment] += 1
+        Y = np.atleast_2d(np.asarray(histories, dtype=np.float64))
+        if Y.size == 0:
+            return []
+        n_days = Y.shape[1]
+        observed = ~np.isnan(Y)
+        counts = observed.sum(axis=1)
         
-        total = sum(sentiments.values())
-        if total == 0:
-            return None
+        if mode == 'random_forest':
+            rows = [None] * len(Y)
+            tasks = []
+            registry = (self.model_registry.root, self.model_registry.max_bytes)
+            for i, row in enumerate(Y):
+                if counts[i] < 3:
+                    continue
+                if series_ids is None:
+                    tasks.append((i, (row, None, None, None)))
+                    continue
+                history = row[observed[i]]
+                name, digest, forest = self._registered_forest(series_ids[i], history)
+                if forest is not None:
+                    rows[i] = forest.predict(np.arange(len(history), len(history) + FORECAST_HORIZON).reshape(-1, 1))
+                else:
+                    tasks.append((i, (row, registry, name, digest)))
+            
+            if tasks:
+                params = self.model.get_params()
+                pool = _get_forecast_pool()
+                try:
+                    fitted = pool.map(_forest_forecast_row, ((params, *task) for _, task in tasks),
+                                      chunksize=max(1, len(tasks) // (4 * FORECAST_WORKERS)))
+                    for (i, _), predictions in zip(tasks, fitted):
+                        rows[i] = predictions
+                except BrokenProcessPool:
+                    _reset_forecast_pool(pool)
+                    raise
+            return [
+                None if predictions is None else {
+                    'predictions': predictions.tolist(),
+                    'confidence': 0.85,
+                    'trend': 'increasing' if predictions[-1] > predictions[0] else 'decreasing',
+                    'model': 'random_forest'
+                }
+                for predictions in rows
+            ]
         
-        return {
-            'sentiment_distribution': {
-                k: round(v/total * 100, 2) for k, v in sentiments.items()
-            },
-            'dominant_sentiment': max(sentiments, key=sentiments.get),
-            'sentiment_score': (sentiments['positive'] - sentiments['negative']) / total
-        }
+        # Per-row OLS sufficient statistics, ignoring missing days
+        t = np.where(observed, np.arange(n_days, dtype=np.float64), 0.0)
+        y = np.where(observed, Y, 0.0)
+        sum_t, sum_y = t.sum(axis=1), y.sum(axis=1)
+        var_t = counts * (t * t).sum(axis=1) - sum_t ** 2
+        var_y = counts * (y * y).sum(axis=1) - sum_y ** 2
+        cov_ty = counts * (t * y).sum(axis=1) - sum_t * sum_y
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(var_t > 0, cov_ty / var_t, 0.0)
+            intercept = (sum_y - slope * sum_t) / counts
+            r2 = np.where((var_t > 0) & (var_y > 0), cov_ty ** 2 / (var_t * var_y), 0.0)
+        
+        future_t = np.arange(n_days, n_days + FORECAST_HORIZON, dtype=np.float64)
+        predictions = intercept[:, None] + slope[:, None] * future_t
+        increasing = predictions[:, -1] > predictions[:, 0]
+        
+        return [
+            {
+                'predictions': predictions[i].tolist(),
+                'confidence': round(float(r2[i]), 2),
+                'trend': 'increasing' if increasing[i] else 'decreasing',
+                'model': 'linear_trend'
+            } if counts[i] >= 3 else None
+            for i in range(len(Y))
+        ]
+    
+    def forecast_portfolio(self, campaign_data, mode='incremental'):
+        """Forecast every campaign in campaign_tracking that has a daily_conversions history
+
+        Campaign ids name the series, so random_forest reuses registered forests.
+        """
+        campaign_ids = [cid for cid, c in campaign_data.items() if c.get('daily_conversions')]
+        histories = _history_matrix([campaign_data[cid]['daily_conversions'] for cid in campaign_ids])
+        forecasts = self.predict_conversions_batch(histories, mode=mode, series_ids=campaign_ids) if campaign_ids else []
+        return dict(zip(campaign_ids, forecasts))
     
-    def calculate_roi(self, campaign_data):
-        """Calculate ROI and key metrics"""
-        total_spent = sum(c.get('ad_spend', 0) for c in campaign_data.values())
-        total_revenue = sum(c.get('revenue_estimate', 0) for c in campaign_data.values())
+    def forecast_cache_stats(self):
+        """Hit/miss counters for the incremental forecasting cache"""
+        return self.forecast_cache.stats()
+    
+    def analyze_sentiment_trends(self, comments, timestamps=None, rolling_window=24):
+        """Analyze sentiment patterns over time
+
+        comments is either the data.json list of comment dicts (optionally
+        carrying a 'timestamp') or an array of sentiment labels with matching
+        timestamps. Counting and time bucketing are vectorized; comment dicts
+        missing a 'sentiment' are labelled by the local SentimentClassifier.
+        """
+        if len(comments) and isinstance(comments[0], dict):
+            sentiments = [c.get('sentiment') for c in comments]
+            # Comments without a precomputed label are scored from their text
+            unlabelled = [i for i, label in enumerate(sentiments) if label is None]
+            if unlabelled:
+                scored = self.sentiment_classifier.classify([comments[i].get('text', '') for i in unlabelled])
+                for i, (label, _) in zip(unlabelled, scored):
+                    sentiments[i] = label
+            if timestamps is None and all('timestamp' in c for c in comments):
+                timestamps = [c['timestamp'] for c in comments]
+        else:
+            sentiments = comments
         
-        roi = ((total_revenue - total_spent) / total_spent * 100) if total_spent > 0 else 0
+        codes = _sentiment_codes(sentiments)
+        if not len(codes):
+            return None
         
-        return {
-            'roi': round(roi, 2),
-            'total_revenue': total_revenue,
-            'total_spent': total_spent,
-            'profit': total_revenue - total_spent,
-            'roas': round(total_revenue / total_spent, 2) if total_spent > 0 else 0
-        }
+        result = _sentiment_summary(np.bincount(codes, minlength=3))
+        if timestamps is not None:
+            hours, counts = SentimentTrendAccumulator.bucket(codes, timestamps)
+            result.update(_sentiment_trends(hours, counts, rolling_window))
+        return result
+    
+    def score_comments(self, comments, overwrite=False):
+        """Label comment text locally and fill the sentiment_analysis fields"""
+        return self.sentiment_classifier.score_comments(comments, overwrite=overwrite)
+    
+    def update_sentiment_trends(self, sentiments, timestamps, rolling_window=24):
+        """Merge a NEW comment batch into the running hourly buckets and return the trends"""
+        if len(sentiments):
+            self.sentiment_trends.add(sentiments, timestamps)
+        if not len(self.sentiment_trends.hours):
+            return None
+        
+        result = _sentiment_summary(self.sentiment_trends.counts.sum(axis=0))
+        result.update(self.sentiment_trends.trends(rolling_window))
+        return result
+    
+    def load_campaigns(self, campaign_data):
+        """Build the columnar store once; calculate_roi() and
+        calculate_grouped_roi() without data then read it"""
+        self.campaign_store = _as_campaign_store(campaign_data)
+        return self.campaign_store
+    
+    def _campaigns(self, campaign_data=None):
+        """CampaignStore for explicit data, else the loaded or data.json one"""
+        if campaign_data is not None:
+            return _as_campaign_store(campaign_data)
+        if self.campaign_store is not None:
+            return self.campaign_store
+        return self.dataset.get()['derived']['campaigns']
     
-    def detect_anomalies(self, metrics_history):
-        """Detect unusual patterns in campaign performance"""
+    def calculate_roi(self, campaign_data=None):
+        """Calculate ROI and key metrics (a dict, a CampaignStore, or the loaded campaigns)"""
+        return self._campaigns(campaign_data).roi_summary()
+    
+    def calculate_grouped_roi(self, campaign_data=None, dimension='channel'):
+        """ROI per channel, creative or any other campaign dimension"""
+        return self._campaigns(campaign_data).grouped_roi(dimension)
+    
+    def detect_anomalies(self, metrics_history, series_id=None):
+        """Detect unusual patterns in campaign performance
+
+        Without series_id every point is scored against the whole history.
+        With series_id a StreamingAnomalyDetector is kept for the series and
+        only points appended since the previous call are scored. At most
+        max_anomaly_series detectors are kept (LRU); an evicted series is
+        scored from its start again on its next call.
+        """
+        if series_id is not None:
+            with self._detector_lock:
+                detector = self.anomaly_detectors.get(series_id)
+                if detector is None:
+                    detector = self.anomaly_detectors[series_id] = StreamingAnomalyDetector()
+                    while len(self.anomaly_detectors) > self.max_anomaly_series:
+                        self.anomaly_detectors.popitem(last=False)
+                else:
+                    self.anomaly_detectors.move_to_end(series_id)
+            return detector.consume(metrics_history)
+        
         if len(metrics_history) < 5:
             return []
         
-        values = np.array(metrics_history)
-        mean = np.mean(values)
-        std = np.std(values)
-        
-        anomalies = []
-        for i, val in enumerate(values):
-            z_score = abs((val - mean) / std) if std > 0 else 0
-            if z_score > 2:
-                anomalies.append({
-                    'index': i,
-                    'value': float(val),
-                    'severity': 'high' if z_score > 3 else 'medium',
-                    'type': 'spike' if val > mean else 'drop'
-                })
+        return self.detect_anomalies_bulk([metrics_history])[0]
+    
+    def detect_anomalies_bulk(self, histories, threshold=2):
+        """Score many campaigns' histories at once with per-row z-scores
+
+        Ragged histories are NaN-padded; returns one anomaly list per row.
+        """
+        values = _history_matrix(histories) if len(histories) else np.empty((0, 0))
+        if values.size == 0:
+            return [[] for _ in histories]
+        offsets = values.shape[1] - np.array([len(h) for h in histories])
+        counts = (~np.isnan(values)).sum(axis=1)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nanmean(values, axis=1, keepdims=True)
+            std = np.nanstd(values, axis=1, keepdims=True)
+            z_scores = np.where(std > 0, np.abs(values - mean) / std, 0.0)
+        flagged = (z_scores > threshold) & (counts >= 5)[:, None]
+        
+        anomalies = [[] for _ in histories]
+        for row, col in zip(*np.nonzero(flagged)):
+            val = values[row, col]
+            anomalies[row].append({
+                'index': int(col - offsets[row]),
+                'value': float(val),
+                'severity': 'high' if z_scores[row, col] > 3 else 'medium',
+                'type': 'spike' if val > mean[row, 0] else 'drop'
+            })
         
         return anomalies
     
-    def generate_insights(self, data):
-        """Generate AI-powered insights with actionable links"""
+    def generate_insights(self, data=None, top_n=1):
+        """Generate AI-powered insights with actionable links
+
+        With data=None the insights come from the cached data.json snapshot,
+        whose leaderboard and view totals are maintained between calls.
+        """
+        if data is None:
+            snapshot = self.dataset.get()
+            data, derived = snapshot['data'], snapshot['derived']
+            leaders = derived['leaderboard'].top('conversions', max(top_n, 1))
+            total_views = derived['trending_views']
+        else:
+            leaders = _as_campaign_store(data.get('campaign_tracking', {})).top('conversions', max(top_n, 1))
+            total_views = sum(v.get('views', 0) for v in data.get('trending_videos', []))
         insights = []
         
         # Analyze campaign performance
-        campaigns = data.get('campaign_tracking', {})
-        if campaigns:
-            best_campaign = max(campaigns.items(), 
-                              key=lambda x: x[1].get('conversions', 0))
-            insights.append({
+        if leaders:
+            best = leaders[0]
+            insight = {
                 'type': 'performance',
-                'title': f'Top Performer: {best_campaign[0]}',
-                'description': f'Generated {best_campaign[1].get("conversions", 0)} conversions',
+                'title': f'Top Performer: {best["campaign_id"]}',
+                'description': f'Generated {best["conversions"]} conversions',
                 'action': 'Increase budget allocation',
                 'priority': 'high',
                 'link': '/campaigns.html',
-                'campaign_id': best_campaign[0]
-            })
+                'campaign_id': best['campaign_id']
+            }
+            if top_n > 1:
+                insight['top_campaigns'] = leaders
+            insights.append(insight)
         
         # Analyze trends with viral content
         trending = data.get('trending_videos', [])
         if trending:
-            total_views = sum(v.get('views', 0) for v in trending)
             insights.append({
                 'type': 'trend',
                 'title': 'Viral Content Opportunity',
@@ -128,32 +1187,89 @@ class AIAnalyticsEngine:
         
         return insights
     
-    def optimize_posting_schedule(self, engagement_data):
-        """Recommend optimal posting times"""
-        best_hours = [9, 12, 18, 20]
-        best_days = ['Monday', 'Wednesday', 'Friday']
+    def record_engagement(self, engagement_data):
+        """Merge a NEW batch of events/posts into the engine's running histogram
+        (same formats as EngagementHistogram.add)"""
+        self.engagement_histogram.add(engagement_data)
+    
+    def optimize_posting_schedule(self, engagement_data=None, top_n=5):
+        """Recommend optimal posting times
+
+        With engagement_data (see EngagementHistogram.add) the schedule is
+        ranked from that data alone, in a histogram built for this call;
+        without it, from what record_engagement() has accumulated.
+        """
+        if engagement_data is None:
+            histogram = self.engagement_histogram
+        else:
+            histogram = EngagementHistogram(self.engagement_histogram.timezone)
+            histogram.add(engagement_data)
+        
+        if histogram.is_empty():
+            # No engagement history yet: industry-default schedule
+            return {
+                'best_hours': [9, 12, 18, 20],
+                'best_days': ['Monday', 'Wednesday', 'Friday'],
+                'timezone': histogram.timezone,
+                'expected_boost': '+35% engagement',
+                'slots': []
+            }
+        
+        slots = histogram.ranked_slots(top_n)
+        if not slots:
+            # Engagement without post volume cannot be compared across slots
+            return {
+                'best_hours': [],
+                'best_days': [],
+                'timezone': histogram.timezone,
+                'expected_boost': '+0% engagement',
+                'slots': [],
+                'message': 'No posts in the engagement data to normalize by'
+            }
         
+        avg_lift = sum(slot['lift'] for slot in slots) / len(slots)
         return {
-            'best_hours': best_hours,
-            'best_days': best_days,
-            'timezone': 'PST',
-            'expected_boost': '+35% engagement'
+            'best_hours': sorted({slot['hour'] for slot in slots}),
+            'best_days': list(dict.fromkeys(slot['day'] for slot in slots)),
+            'timezone': histogram.timezone,
+            'expected_boost': f"{avg_lift * 100:+.0f}% engagement",
+            'slots': slots
         }
 
 
+    def _derive_dataset(self, data, previous=None):
+        """Aggregates refreshed whenever data.json changes on disk
+
+        The leaderboard is carried over and only the campaigns whose rows
+        changed are re-ranked; it is bulk-built on the first load.
+        """
+        campaign_data = data.get('campaign_tracking', {})
+        campaigns = CampaignStore.from_campaigns(campaign_data)
+        old_campaigns = previous['data'].get('campaign_tracking', {}) if previous else {}
+        if old_campaigns:
+            leaderboard = previous['derived']['leaderboard']
+            leaderboard.sync(old_campaigns, campaign_data)
+        else:
+            leaderboard = CampaignLeaderboard.from_campaigns(campaign_data)
+        return {
+            'campaigns': campaigns,
+            'roi': campaigns.roi_summary(),
+            'leaderboard': leaderboard,
+            'trending_views': sum(v.get('views', 0) for v in data.get('trending_videos', []))
+        }
+    
+    def top_campaigns(self, metric='conversions', n=5):
+        """Top-n campaigns by conversions, roi or revenue from the cached leaderboard"""
+        return self.dataset.get()['derived']['leaderboard'].top(metric, n)
+    
     def analyze(self, query):
         """Main analyze method for AI analytics queries"""
         query_lower = query.lower()
         
-        try:
-            with open('data.json', 'r') as f:
-                data = json.load(f)
-            campaign_data = data.get('campaign_tracking', {})
-        except:
-            campaign_data = {}
+        derived = self.dataset.get()['derived']
         
         if 'campaign' in query_lower or 'performance' in query_lower:
-            roi_data = self.calculate_roi(campaign_data)
+            roi_data = dict(derived['roi'])
             return {
                 "query": query,
                 "analysis": f"Campaign Performance: ROI is {roi_data['roi']}%. Revenue: ${roi_data['total_revenue']:,}. Profit: ${roi_data['profit']:,}.",
@@ -161,7 +1277,7 @@ class AIAnalyticsEngine:
                 "recommendations": ["Focus on high-performing campaigns", "Optimize ad spend"]
             }
         else:
-            roi_data = self.calculate_roi(campaign_data)
+            roi_data = dict(derived['roi'])
             return {
                 "query": query,
                 "analysis": f"Overall Performance: {roi_data['roi']}% ROI with ${roi_data['total_revenue']:,} revenue.",
@@ -0,0 +1,199 @@
+"""
+Concurrent, rate-limited batch execution for video generation campaigns
+A fixed number of workers pull items while a token bucket paces calls to the
+provider; results are yielded as they complete and checkpointed to a manifest,
+so a restarted batch only runs what has not succeeded yet
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+BATCH_MAX_ATTEMPTS = int(os.getenv('BATCH_MAX_ATTEMPTS', 3))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` banked.
+
+    acquire() blocks until a token is available, so callers are spread out
+    at the provider's sustained rate after an initial burst. rate <= 0
+    disables limiting.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, calls, burst=1):
+        return cls(calls / 60.0, burst)
+
+    def acquire(self, tokens=1):
+        """Take tokens, sleeping as long as needed; returns the seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def run_batch(items, worker, concurrency=4, limiter=None):
+    """Run worker(item) over items on `concurrency` threads, yielding (index, result) as each finishes.
+
+    items may be any iterable (e.g. a generator over a large file): at most
+    `concurrency` items are in flight, so memory does not grow with the
+    batch. limiter (a TokenBucket) is acquired before each call. An
+    exception from worker propagates after the in-flight items finish.
+    """
+    def call(item):
+        if limiter is not None:
+            limiter.acquire()
+        return worker(item)
+
+    items = enumerate(items)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='batch') as pool:
+        pending = {}
+        for index, item in items:
+            pending[pool.submit(call, item)] = index
+            if len(pending) < concurrency:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+
+def iter_jsonl(path):
+    """Records of a JSONL file, read one line at a time (blank lines skipped)"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class BatchManifest:
+    """Append-only JSONL checkpoint of batch results, keyed by item id.
+
+    Every finished item is appended and fsynced as it completes, so a crash
+    loses at most the items that were in flight. Reopening the manifest
+    replays it into a per-id (attempts, succeeded) summary - the results
+    themselves stay on disk. pending() then skips ids that succeeded and
+    retries failed ones until they have used max_attempts across runs.
+    """
+
+    def __init__(self, path, max_attempts=BATCH_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.skipped = 0
+        self._state = {}  # id -> [attempts, succeeded]
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def succeeded(record):
+        return record.get('status') != 'failed'
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; that item simply runs again
+                    continue
+                state = self._state.setdefault(record['id'], [0, False])
+                state[0] = max(state[0] + 1, record.get('attempt', 0))
+                state[1] = state[1] or self.succeeded(record)
+            # Never glue the next record onto a torn final line
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+
+    def should_run(self, item_id):
+        with self._lock:
+            attempts, done = self._state.get(item_id, (0, False))
+        return not done and attempts < self.max_attempts
+
+    def pending(self, items):
+        """Lazily filter items (dicts with an 'id') down to the ones still to run"""
+        for item in items:
+            if self.should_run(item['id']):
+                yield item
+            else:
+                self.skipped += 1
+
+    def record(self, result):
+        """Append result (a dict with 'id' and 'status') and make it durable"""
+        with self._lock:
+            state = self._state.setdefault(result['id'], [0, False])
+            state[0] += 1
+            state[1] = state[1] or self.succeeded(result)
+            line = json.dumps({**result, 'attempt': state[0], 'recorded_at': time.time()})
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def summary(self):
+        with self._lock:
+            succeeded = sum(1 for _, done in self._state.values() if done)
+            exhausted = sum(1 for attempts, done in self._state.values() if not done and attempts >= self.max_attempts)
+            return {
+                'items': len(self._state),
+                'succeeded': succeeded,
+                'failed': len(self._state) - succeeded,
+                'exhausted': exhausted,
+                'skipped': self.skipped
+            }
+
+    def export(self, path):
+        """Write the latest record per id as a JSON array, streaming from the manifest"""
+        self._file.flush()
+        latest = {}
+        with open(self.path, 'rb') as f:
+            for line_no, line in enumerate(f):
+                try:
+                    latest[json.loads(line)['id']] = line_no
+                except ValueError:
+                    continue
+        keep = set(latest.values())
+        tmp_path = f"{path}.tmp"
+        with open(self.path, 'rb') as src, open(tmp_path, 'w', encoding='utf-8') as out:
+            out.write('[')
+            first = True
+            for line_no, line in enumerate(src):
+                if line_no in keep:
+                    out.write(('\n  ' if first else ',\n  ') + json.dumps(json.loads(line)))
+                    first = False
+            out.write('\n]\n')
+        os.replace(tmp_path, path)
+        return len(keep)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
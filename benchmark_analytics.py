@@ -0,0 +1,255 @@
+"""
+AI Analytics Engine benchmark suite
+Generates synthetic campaigns, comments and metric histories at configurable
+sizes, times every public engine method and writes a JSON report.
+
+Usage:
+    python benchmark_analytics.py run --sizes 10 1000 100000 --output bench.json
+    python benchmark_analytics.py compare baseline.json bench.json --threshold 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from ai_analytics_engine import AIAnalyticsEngine, DatasetLoader, SeriesForecastCache
+from model_registry import ModelRegistry
+
+SENTIMENTS = np.array(['positive', 'negative', 'neutral'])
+CHANNELS = np.array(['tiktok', 'instagram', 'youtube', 'x'])
+
+
+def synthetic_campaigns(n, rng):
+    """campaign_tracking with n campaigns"""
+    clicks = rng.integers(500, 10000, n)
+    conversions = (clicks * rng.uniform(0.01, 0.05, n)).astype(int)
+    spend = rng.integers(1000, 50000, n)
+    channels = CHANNELS[rng.integers(0, len(CHANNELS), n)]
+    return {
+        f"campaign_{i}": {
+            "clicks": int(clicks[i]),
+            "conversions": int(conversions[i]),
+            "revenue_estimate": int(conversions[i]) * 3000,
+            "ad_spend": int(spend[i]),
+            "channel": str(channels[i])
+        }
+        for i in range(n)
+    }
+
+
+def synthetic_comments(n, rng):
+    """sentiment_analysis comment list with n comments"""
+    labels = SENTIMENTS[rng.choice(3, n, p=[0.6, 0.15, 0.25])]
+    return [{"text": f"comment {i}", "sentiment": str(label)} for i, label in enumerate(labels)]
+
+
+def synthetic_history(n, rng):
+    """Daily metric history of length n with a trend, noise and a few spikes"""
+    history = 50 + 0.01 * np.arange(n) + rng.normal(0, 5, n)
+    spikes = rng.integers(0, n, max(1, n // 200))
+    history[spikes] += rng.choice([-1, 1], len(spikes)) * 40
+    return history.tolist()
+
+
+def synthetic_dataset(n, rng):
+    return {
+        "campaign_tracking": synthetic_campaigns(n, rng),
+        "trending_videos": [{"title": f"video {i}", "views": int(v)}
+                            for i, v in enumerate(rng.integers(1000, 1000000, min(n, 1000)))],
+        "sentiment_analysis": synthetic_comments(min(n, 1000), rng)
+    }
+
+
+def py_alloc_peak_mb(fn):
+    """Peak traced allocation while fn() runs, in MB
+
+    This is what tracemalloc sees (Python objects and NumPy buffers), not
+    process memory: native buffers of sklearn and other C extensions are
+    not included. See max_rss_mb for the process.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 3)
+
+
+def max_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def time_call(fn, size, repeat, reset=None):
+    """Time fn() repeat times -> latency percentiles, throughput and traced allocation peak
+
+    With reset, caches are cleared before every timed call (cold); without
+    it, calls run back to back and hit whatever fn keeps warm. Memory is
+    measured in a separate untimed call, since tracing slows allocation.
+    """
+    latencies = []
+    for _ in range(repeat):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies)
+    if reset:
+        reset()
+    return {
+        "size": size,
+        "repeat": repeat,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 4),
+        "mean_ms": round(float(latencies.mean()) * 1000, 4),
+        "throughput_per_s": round(size / float(latencies.mean()), 2) if latencies.mean() > 0 else None,
+        "py_alloc_peak_mb": py_alloc_peak_mb(fn)
+    }
+
+
+def run_benchmarks(sizes, repeat=5, max_forest_size=10000, seed=42):
+    rng = np.random.default_rng(seed)
+    results = []
+    memory = []
+
+    with tempfile.TemporaryDirectory(prefix='analytics_bench_') as workdir:
+        engine = AIAnalyticsEngine(model_registry=ModelRegistry(os.path.join(workdir, 'models')))
+
+        for size in sizes:
+            print(f"\n📏 Size {size:,}")
+            dataset = synthetic_dataset(size, rng)
+            data_path = os.path.join(workdir, f"data_{size}.json")
+            with open(data_path, 'w') as f:
+                json.dump(dataset, f)
+
+            comments = synthetic_comments(size, rng)
+            history = synthetic_history(size, rng)
+            campaigns = dataset["campaign_tracking"]
+
+            def reset_forecast_cache():
+                engine.forecast_cache = SeriesForecastCache()
+
+            def reset_dataset():
+                engine.dataset = DatasetLoader(data_path, derive=engine._derive_dataset)
+
+            reset_dataset()
+
+            # method -> (call, reset that clears its cache, or None if it keeps none)
+            cases = {
+                "predict_conversions[incremental]": (lambda: engine.predict_conversions(history, mode='incremental'), reset_forecast_cache),
+                "analyze_sentiment_trends": (lambda: engine.analyze_sentiment_trends(comments), None),
+                "calculate_roi": (lambda: engine.calculate_roi(campaigns), None),
+                "detect_anomalies": (lambda: engine.detect_anomalies(history), None),
+                "generate_insights": (lambda: engine.generate_insights(dataset), None),
+                "analyze": (lambda: engine.analyze("campaign performance"), reset_dataset)
+            }
+            if size <= max_forest_size:
+                cases["predict_conversions[random_forest]"] = (lambda: engine.predict_conversions(history), None)
+
+            for method, (fn, reset) in cases.items():
+                # Cached methods are reported cold (cache cleared) and warm (cache primed)
+                runs = [("cold", reset), ("warm", None)] if reset else [(None, None)]
+                for cache, run_reset in runs:
+                    if cache == "warm":
+                        fn()
+                    result = {"method": method, "cache": cache, **time_call(fn, size, repeat, run_reset)}
+                    results.append(result)
+                    label = f"{method} ({cache})" if cache else method
+                    print(f"  {label:<45} p50 {result['p50_ms']:>10.3f} ms  p99 {result['p99_ms']:>10.3f} ms  "
+                          f"py alloc {result['py_alloc_peak_mb']:>9.3f} MB")
+            
+            # ru_maxrss only grows, so this is the process peak up to and including this size
+            memory.append({"size": size, "max_rss_mb": max_rss_mb()})
+            print(f"  {'process peak RSS':<45} {memory[-1]['max_rss_mb']:>10.1f} MB")
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+        "memory": memory
+    }
+
+
+def compare_reports(baseline, current, threshold=0.10):
+    """Diff two reports by p50 latency; returns the list of regressions"""
+    base = {(r["method"], r.get("cache"), r["size"]): r for r in baseline["results"]}
+    regressions = []
+
+    print(f"{'method':<45} {'size':>9} {'base p50':>11} {'new p50':>11} {'change':>8}")
+    for r in current["results"]:
+        old = base.get((r["method"], r.get("cache"), r["size"]))
+        if not old or not old["p50_ms"]:
+            continue
+        change = r["p50_ms"] / old["p50_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = " ❌"
+            regressions.append({"method": r["method"], "cache": r.get("cache"), "size": r["size"], "change": round(change, 4)})
+        label = f"{r['method']} ({r['cache']})" if r.get("cache") else r["method"]
+        print(f"{label:<45} {r['size']:>9,} {old['p50_ms']:>11.3f} {r['p50_ms']:>11.3f} {change:>+7.1%}{flag}")
+    
+    base_rss = {m["size"]: m["max_rss_mb"] for m in baseline.get("memory", [])}
+    for m in current.get("memory", []):
+        if base_rss.get(m["size"]):
+            change = m["max_rss_mb"] / base_rss[m["size"]] - 1
+            print(f"{'process peak RSS (MB)':<45} {m['size']:>9,} {base_rss[m['size']]:>11.1f} {m['max_rss_mb']:>11.1f} {change:>+7.1%}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AIAnalyticsEngine")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmarks and write a JSON report")
+    run.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--max-forest-size", type=int, default=10000,
+                     help="Skip the random forest forecast above this history length")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--output", default="bench_report.json")
+
+    compare = sub.add_parser("compare", help="Diff two reports and flag p50 regressions")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10,
+                         help="Relative p50 slowdown that counts as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_benchmarks(args.sizes, args.repeat, args.max_forest_size, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved to: {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare_reports(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Streaming, resumable downloads of generated media
+Writes fixed-size chunks to a .part file, resumes dropped transfers with HTTP
+Range (also across runs), verifies size/checksum and renames into place, so
+memory stays flat
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from upstream import http_session
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('DOWNLOAD_CHUNK_SIZE', 1024 * 1024))
+DOWNLOAD_MAX_RESUMES = int(os.getenv('DOWNLOAD_MAX_RESUMES', 5))
+DOWNLOAD_CONCURRENCY = int(os.getenv('DOWNLOAD_CONCURRENCY', 4))
+
+# At most DOWNLOAD_CONCURRENCY transfers (and chunk buffers) in flight per process
+_slots = threading.BoundedSemaphore(DOWNLOAD_CONCURRENCY)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _hash_existing(path, hasher, chunk_size):
+    """Feed an existing partial file into hasher; returns its length"""
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+            size += len(chunk)
+    return size
+
+
+def _total_size(response, offset):
+    """Full object size from Content-Range or Content-Length, if the server sent one"""
+    content_range = response.headers.get('Content-Range')
+    if content_range and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return int(length) + (offset if response.status_code == 206 else 0)
+    return None
+
+
+def _source_path(part):
+    return f"{part}.json"
+
+
+def _load_source(part):
+    """{'url', 'validator'} recorded for a .part file, or None"""
+    try:
+        with open(_source_path(part)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_source(part, url, response):
+    # If-Range needs a strong validator: a non-weak ETag, else Last-Modified
+    etag = response.headers.get('ETag')
+    validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+    with open(_source_path(part), 'w') as f:
+        json.dump({'url': url, 'validator': validator}, f)
+
+
+def discard_partial(dest):
+    """Delete dest's .part file and its source record"""
+    part = f"{dest}.part"
+    for path in (part, _source_path(part)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def partial_url(dest):
+    """URL of an unfinished download of dest left by an earlier run, or None"""
+    part = f"{dest}.part"
+    source = _load_source(part) if os.path.exists(part) else None
+    return source.get('url') if source else None
+
+
+def download_file(url, dest, expected_size=None, sha256=None, chunk_size=DOWNLOAD_CHUNK_SIZE, max_resumes=DOWNLOAD_MAX_RESUMES):
+    """Stream url to dest and return {'path', 'url', 'bytes', 'sha256', 'resumes'}.
+
+    Data goes to dest + '.part', with the source URL and validator beside it
+    in dest + '.part.json'. Both are left in place on failure, so a later
+    call for the same URL resumes; a part from another URL is discarded. A
+    dropped connection resumes with a Range request (If-Range guards against
+    the object having changed); a server that ignores Range restarts from
+    zero. The result must match expected_size / sha256 when given, and the
+    server's advertised size otherwise, before it is fsynced and renamed to
+    dest. Raises DownloadError.
+    """
+    part = f"{dest}.part"
+    hasher = hashlib.sha256()
+    source = _load_source(part)
+    if os.path.exists(part) and source and source.get('url') == url:
+        offset = _hash_existing(part, hasher, chunk_size)
+    else:
+        discard_partial(dest)
+        source = None
+        offset = 0
+    total = None
+    resumes = 0
+
+    with _slots:
+        while True:
+            try:
+                headers = {}
+                if offset:
+                    headers['Range'] = f"bytes={offset}-"
+                    if source and source.get('validator'):
+                        headers['If-Range'] = source['validator']
+                with http_session().get(url, stream=True, headers=headers) as response:
+                    if offset and response.status_code == 416:
+                        # Nothing left to send - but only trust the part if it is the advertised size
+                        total = _total_size(response, offset)
+                        size = expected_size if expected_size is not None else total
+                        if size is not None and offset == size:
+                            break
+                        print(f"⚠️ Partial download of {url} cannot be verified ({offset} bytes, expected {size}), restarting")
+                        discard_partial(dest)
+                        offset = 0
+                        hasher = hashlib.sha256()
+                        source = None
+                        continue
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        print(f"⚠️ Server ignored Range for {url}, restarting download")
+                        offset = 0
+                        hasher = hashlib.sha256()
+                    total = _total_size(response, offset) or total
+                    if not offset:
+                        _save_source(part, url, response)
+                        source = _load_source(part)
+
+                    with open(part, 'r+b' if offset else 'wb') as f:
+                        f.seek(offset)
+                        f.truncate()
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            offset += len(chunk)
+                        f.flush()
+                        os.fsync(f.fileno())
+
+                if total is None or offset >= total:
+                    break
+                raise requests.exceptions.ChunkedEncodingError(f"Connection closed at {offset}/{total} bytes")
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout) as e:
+                resumes += 1
+                if resumes > max_resumes:
+                    raise DownloadError(f"Download of {url} failed after {max_resumes} resumes: {e}")
+                print(f"⚠️ Download interrupted at {offset / 1e6:.1f} MB ({e}), resuming ({resumes}/{max_resumes})")
+                time.sleep(min(30, 2 ** (resumes - 1)))
+            except requests.exceptions.HTTPError as e:
+                raise DownloadError(f"Download of {url} failed: {e}")
+
+    size = expected_size if expected_size is not None else total
+    if size is not None and offset != size:
+        discard_partial(dest)
+        raise DownloadError(f"Size mismatch for {url}: got {offset} bytes, expected {size}")
+    digest = hasher.hexdigest()
+    if sha256 and digest != sha256.lower():
+        discard_partial(dest)
+        raise DownloadError(f"Checksum mismatch for {url}")
+
+    os.replace(part, dest)
+    discard_partial(dest)
+    return {'path': dest, 'url': url, 'bytes': offset, 'sha256': digest, 'resumes': resumes}
+
+
+def resume_or_download(dest, produce_url, **kwargs):
+    """Finish the download an earlier run left for dest, else download produce_url().
+
+    Lets a retried generation reuse output it already paid for: only when
+    there is no resumable part (or its URL no longer works) is produce_url
+    called, e.g. to run the model again.
+    """
+    url = partial_url(dest)
+    if url:
+        print(f"♻️ Resuming earlier download of {url}")
+        try:
+            return download_file(url, dest, **kwargs)
+        except DownloadError as e:
+            print(f"⚠️ Could not resume ({e}), starting over")
+            discard_partial(dest)
+    return download_file(produce_url(), dest, **kwargs)
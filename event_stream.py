@@ -0,0 +1,138 @@
+"""
+Server-Sent Events fan-out for dashboard updates
+One watcher per process reads the shared cache and pushes each change once to
+every open /api/stream connection, instead of every tab polling every 30 seconds
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', 5000))
+SSE_KEEPALIVE = 15  # seconds between comment pings, keeps proxies from closing idle streams
+SSE_RETRY_MS = 5000  # client reconnect delay
+
+
+def sse_frame(event, data, event_id=None):
+    """Encode one SSE message (serialized once, shared by every subscriber)"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    payload = json.dumps(data, separators=(',', ':'), default=str)
+    lines.extend(f"data: {line}" for line in payload.splitlines())
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class Broadcaster:
+    """Per-process publish/subscribe hub for SSE clients.
+
+    publish() stores the latest frame per event name and drops it into each
+    subscriber's queue; a frame is only sent when the event's version
+    changes. New subscribers get the latest frames first. A client that falls
+    max_queue frames behind is disconnected rather than buffered forever.
+    """
+
+    def __init__(self, max_clients=SSE_MAX_CLIENTS, max_queue=16, keepalive=SSE_KEEPALIVE):
+        self.max_clients = max_clients
+        self.max_queue = max_queue
+        self.keepalive = keepalive
+        self._subscribers = set()
+        self._latest = {}  # event -> (version, frame)
+        self._lock = threading.Lock()
+        self._watchers = []
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, event, data, version=None):
+        """Send data to every subscriber unless this version was already sent"""
+        with self._lock:
+            current = self._latest.get(event)
+            if version is not None and current is not None and current[0] == version:
+                return False
+            frame = sse_frame(event, data, event_id=version)
+            self._latest[event] = (version, frame)
+            subscribers = list(self._subscribers)
+            self.published += 1
+
+        for q in subscribers:
+            try:
+                q.put_nowait(frame)
+            except queue.Full:
+                self._drop(q)
+        return True
+
+    def _drop(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.discard(q)
+                self.dropped += 1
+        # Wake the stream so it notices it was dropped
+        try:
+            q.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def subscribe(self):
+        """Register a client queue, or None when the process is at max_clients"""
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            self._subscribers.add(q)
+            for _, frame in self._latest.values():
+                q.put_nowait(frame)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def stream(self, q):
+        """Generator of SSE bytes for one subscriber queue (from subscribe())"""
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode('utf-8')
+            while True:
+                try:
+                    frame = q.get(timeout=self.keepalive)
+                except queue.Empty:
+                    if q not in self._subscribers:
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(q)
+
+    def watch(self, event, source, interval=5):
+        """Poll source() -> (version, data) in a daemon thread and publish changes.
+
+        source reads shared state (e.g. the refresher's cache entry), so each
+        worker picks up a refresh made by any other worker within interval
+        seconds. Returning None means nothing to publish yet.
+        """
+        def run():
+            while True:
+                try:
+                    item = source()
+                    if item is not None:
+                        self.publish(event, item[1], version=item[0])
+                except Exception as e:
+                    print(f"⚠️ Stream source {event} failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name=f"stream-{event}", daemon=True)
+        thread.start()
+        self._watchers.append(thread)
+        return thread
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'events': sorted(self._latest),
+                'published': self.published,
+                'dropped': self.dropped
+            }
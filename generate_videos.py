@@ -2,12 +2,19 @@
 Tesla Sales Strategy - AI Video Generation with OpenAI Sora2
 """
 import os
+import sys
 from openai import OpenAI
+from batch_runner import BATCH_MAX_ATTEMPTS, BatchManifest, TokenBucket, iter_jsonl, run_batch
 
 # Initialize OpenAI client
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# Batch pacing (DALL-E 3 allows a handful of images per minute on lower tiers)
+OPENAI_BATCH_CONCURRENCY = int(os.getenv('OPENAI_BATCH_CONCURRENCY', 2))
+OPENAI_IMAGES_PER_MINUTE = float(os.getenv('OPENAI_IMAGES_PER_MINUTE', 5))
+PREVIEW_MANIFEST_PATH = os.getenv('PREVIEW_MANIFEST_PATH', 'generated_previews.manifest.jsonl')
+
 # AI Video Prompts for Tesla Sales
 VIDEO_PROMPTS = [
     {
@@ -94,27 +101,37 @@ def generate_video_with_sora(prompt_data):
             "status": "failed"
         }
 
-def generate_all_videos():
-    """Generate all Tesla sales videos"""
+def generate_all_videos(prompts_path=None, manifest_path=PREVIEW_MANIFEST_PATH,
+                        concurrency=OPENAI_BATCH_CONCURRENCY, rate_per_minute=OPENAI_IMAGES_PER_MINUTE,
+                        max_attempts=BATCH_MAX_ATTEMPTS):
+    """Generate all Tesla sales videos, several at a time within the image rate limit.
+
+    Prompts come from prompts_path (JSONL) or VIDEO_PROMPTS; results are
+    checkpointed to the manifest, so a rerun only retries what is missing.
+    """
     print("🚀 Tesla Sales Strategy - AI Video Generation")
     print("=" * 70)
     print("\n📹 Using OpenAI for video generation")
-    print("💡 Sora2 integration ready - generating preview images for now\n")
+    print("💡 Sora2 integration ready - generating preview images for now")
+    print(f"⚡ {concurrency} concurrent requests, at most {rate_per_minute:g} per minute")
+    print(f"📒 Checkpointing to {manifest_path} (up to {max_attempts} attempts per prompt)\n")
     
-    results = []
+    prompts = iter_jsonl(prompts_path) if prompts_path else VIDEO_PROMPTS
+    limiter = TokenBucket.per_minute(rate_per_minute, burst=concurrency)
     
-    for prompt_data in VIDEO_PROMPTS:
-        result = generate_video_with_sora(prompt_data)
-        results.append(result)
-        print("-" * 70)
+    with BatchManifest(manifest_path, max_attempts) as manifest:
+        # Checkpoint and report each concept as soon as it finishes
+        for done, (_, result) in enumerate(run_batch(manifest.pending(prompts), generate_video_with_sora, concurrency, limiter), 1):
+            manifest.record(result)
+            status = "✅" if result["status"] != "failed" else "❌"
+            print(f"{status} [{done}] {result['title']}: {result.get('preview_image') or result.get('error')}")
+            print("-" * 70)
+        
+        summary = manifest.summary()
+        manifest.export('generated_videos.json')
     
     print("\n✅ Video generation complete!")
-    print(f"📊 Generated {len(results)} video concepts")
-    
-    # Save results
-    import json
-    with open('generated_videos.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    print(f"📊 Generated {summary['succeeded']}/{summary['items']} video concepts ({summary['skipped']} already done)")
     
     print("\n💾 Results saved to: generated_videos.json")
     print("\n🎯 Next Steps:")
@@ -123,7 +140,7 @@ def generate_all_videos():
     print("3. Post to TikTok with tracking links")
     print("4. Monitor conversions on dashboard")
     
-    return results
+    return summary
 
 if __name__ == "__main__":
     print("\n" + "=" * 70)
@@ -135,8 +152,8 @@ if __name__ == "__main__":
         print("❌ Please set your OpenAI API key in the script")
         exit(1)
     
-    # Generate videos
-    results = generate_all_videos()
+    # Generate videos (optional argument: a JSONL file of prompts)
+    results = generate_all_videos(prompts_path=sys.argv[1] if len(sys.argv) > 1 else None)
     
     print("\n" + "=" * 70)
     print("✅ COMPLETE - Ready for TikTok deployment!")
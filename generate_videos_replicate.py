@@ -3,11 +3,12 @@ Tesla Sales Strategy - AI Video Generation with Replicate (Free, No GPU)
 Uses AnimateDiff and ZeroscopeV2 models via Replicate API
 """
 import os
-import replicate
-import time
-import json
-import requests
+import sys
 from dotenv import load_dotenv
+from batch_runner import BATCH_MAX_ATTEMPTS, BatchManifest, TokenBucket, iter_jsonl, run_batch
+from downloader import resume_or_download
+from upstream import replicate_client
+from video_cache import VideoCache, video_cache_key
 
 load_dotenv()
 
@@ -22,6 +23,11 @@ if not REPLICATE_API_TOKEN:
 # Initialize Replicate client
 os.environ["REPLICATE_API_TOKEN"] = REPLICATE_API_TOKEN
 
+# Batch pacing (tune to the account's Replicate prediction limits)
+REPLICATE_BATCH_CONCURRENCY = int(os.getenv('REPLICATE_BATCH_CONCURRENCY', 4))
+REPLICATE_RATE_PER_MINUTE = float(os.getenv('REPLICATE_RATE_PER_MINUTE', 20))
+VIDEO_MANIFEST_PATH = os.getenv('VIDEO_MANIFEST_PATH', 'generated_videos.manifest.jsonl')
+
 # AI Video Prompts for Tesla Sales (optimized for short-form video generation)
 VIDEO_PROMPTS = [
     {
@@ -61,6 +67,29 @@ VIDEO_PROMPTS = [
     }
 ]
 
+# Replicate model versions and the settings sent with every prompt
+REPLICATE_MODELS = {
+    # ZeroscopeV2 - Fast and free-tier friendly
+    "zeroscope": {
+        "ref": "anotherjesse/zeroscope-v2-xl:9f747673945c62801b13b84701c783929c0ee784e4748ec062204894dda1a351",
+        "input": {
+            "num_frames": 24,  # ~1 second at 24fps
+            "num_inference_steps": 25,
+            "guidance_scale": 17.5,
+            "width": 576,
+            "height": 320
+        }
+    },
+    # AnimateDiff - Higher quality alternative
+    "animatediff": {
+        "ref": "lucataco/animate-diff:beecf59c4aee8d81bf04f0381033dfa10dc16e845b4ae00d281e2fa377e48a9f",
+        "input": {"num_frames": 16, "guidance_scale": 7.5, "num_inference_steps": 25}
+    }
+}
+
+# Re-running a batch reuses videos already generated for the same prompt and settings
+video_cache = VideoCache()
+
 def generate_video_replicate(prompt_data, model="zeroscope"):
     """
     Generate video using Replicate API (Free tier available)
@@ -75,50 +104,46 @@ def generate_video_replicate(prompt_data, model="zeroscope"):
         print(f"🎯 Target: {prompt_data['target']}")
         print(f"⏱️  Duration: {prompt_data['duration']}s")
         
-        if model == "zeroscope":
-            # ZeroscopeV2 - Fast and free-tier friendly
-            print("🚀 Using ZeroscopeV2 XL (576x320, fast generation)")
-            output = replicate.run(
-                "anotherjesse/zeroscope-v2-xl:9f747673945c62801b13b84701c783929c0ee784e4748ec062204894dda1a351",
-                input={
-                    "prompt": prompt_data['prompt'],
-                    "num_frames": 24,  # ~1 second at 24fps
-                    "num_inference_steps": 25,
-                    "guidance_scale": 17.5,
-                    "width": 576,
-                    "height": 320
-                }
-            )
-        else:
-            # AnimateDiff - Higher quality alternative
-            print("🎨 Using AnimateDiff (512x512, better quality)")
-            output = replicate.run(
-                "lucataco/animate-diff:beecf59c4aee8d81bf04f0381033dfa10dc16e845b4ae00d281e2fa377e48a9f",
-                input={
-                    "prompt": prompt_data['prompt'],
-                    "num_frames": 16,
-                    "guidance_scale": 7.5,
-                    "num_inference_steps": 25
-                }
-            )
-        
-        # Download the video
-        video_url = output
-        if isinstance(output, list):
-            video_url = output[0]
+        config = REPLICATE_MODELS["zeroscope" if model == "zeroscope" else "animatediff"]
+        settings = dict(config["input"])
+        key = video_cache_key(
+            prompt_data['prompt'], config["ref"],
+            num_frames=settings.pop("num_frames"),
+            steps=settings.pop("num_inference_steps"),
+            guidance=settings.pop("guidance_scale"),
+            **settings
+        )
+        video_url = None
         
-        print(f"✅ Video generated: {video_url}")
+        def generate_url():
+            if model == "zeroscope":
+                print("🚀 Using ZeroscopeV2 XL (576x320, fast generation)")
+            else:
+                print("🎨 Using AnimateDiff (512x512, better quality)")
+            output = replicate_client(REPLICATE_API_TOKEN).run(
+                config["ref"],
+                input={"prompt": prompt_data['prompt'], **config["input"]}
+            )
+            
+            url = output[0] if isinstance(output, list) else output
+            print(f"✅ Video generated: {url}")
+            return url
         
-        # Save video locally
-        video_filename = f"generated_videos/{prompt_data['id']}.mp4"
-        os.makedirs('generated_videos', exist_ok=True)
+        def render(video_filename):
+            nonlocal video_url
+            # Download the video (an earlier run's partial download is finished instead of regenerating)
+            print(f"💾 Downloading video...")
+            download = resume_or_download(video_filename, generate_url)
+            video_url = download['url']
+            print(f"📦 Downloaded {download['bytes'] / 1e6:.1f} MB (sha256 {download['sha256'][:12]}, {download['resumes']} resumes)")
+            return True
         
-        print(f"💾 Downloading video...")
-        response = requests.get(video_url)
-        with open(video_filename, 'wb') as f:
-            f.write(response.content)
+        result = video_cache.get_or_generate(key, render)
+        if result is None:
+            raise RuntimeError("Video generation failed")
         
-        print(f"✅ Saved to: {video_filename}")
+        video_id, video_filename, cached = result
+        print(f"✅ {'Reused cached video' if cached else 'Saved to'}: {video_filename}")
         
         return {
             "id": prompt_data["id"],
@@ -127,6 +152,7 @@ def generate_video_replicate(prompt_data, model="zeroscope"):
             "local_path": video_filename,
             "prompt": prompt_data["prompt"],
             "status": "completed",
+            "cached": cached,
             "model": model
         }
         
@@ -139,32 +165,42 @@ def generate_video_replicate(prompt_data, model="zeroscope"):
             "status": "failed"
         }
 
-def generate_all_videos(model="zeroscope"):
-    """Generate all Tesla sales videos"""
+def generate_all_videos(model="zeroscope", prompts_path=None, manifest_path=VIDEO_MANIFEST_PATH,
+                        concurrency=REPLICATE_BATCH_CONCURRENCY, rate_per_minute=REPLICATE_RATE_PER_MINUTE,
+                        max_attempts=BATCH_MAX_ATTEMPTS):
+    """Generate all Tesla sales videos, several at a time within the provider's rate limit.
+
+    Prompts come from prompts_path (JSONL, one prompt object per line) or
+    VIDEO_PROMPTS. Each result is appended to the manifest as it finishes;
+    rerunning skips prompts that already succeeded and retries failed ones
+    until they have used max_attempts.
+    """
     print("🚀 Tesla Sales Strategy - AI Video Generation")
     print("=" * 70)
     print(f"\n📹 Using Replicate API with {model.upper()} model")
-    print("💡 Free tier available - No GPU required!\n")
+    print("💡 Free tier available - No GPU required!")
+    print(f"⚡ {concurrency} concurrent generations, at most {rate_per_minute:g} per minute")
+    print(f"📒 Checkpointing to {manifest_path} (up to {max_attempts} attempts per prompt)\n")
     
-    results = []
+    prompts = iter_jsonl(prompts_path) if prompts_path else VIDEO_PROMPTS
+    limiter = TokenBucket.per_minute(rate_per_minute, burst=concurrency)
     
-    for i, prompt_data in enumerate(VIDEO_PROMPTS, 1):
-        print(f"\n[{i}/{len(VIDEO_PROMPTS)}] Processing...")
-        result = generate_video_replicate(prompt_data, model=model)
-        results.append(result)
-        print("-" * 70)
+    with BatchManifest(manifest_path, max_attempts) as manifest:
+        batch = run_batch(manifest.pending(prompts), lambda prompt_data: generate_video_replicate(prompt_data, model=model), concurrency, limiter)
+        
+        # Checkpoint and report each video as soon as it finishes
+        for done, (_, result) in enumerate(batch, 1):
+            manifest.record(result)
+            status = "✅" if result["status"] == "completed" else "❌"
+            print(f"{status} [{done}] {result['title']}: {result.get('local_path') or result.get('error')}")
+            print("-" * 70)
         
-        # Small delay to respect API rate limits
-        if i < len(VIDEO_PROMPTS):
-            print("⏳ Waiting 3 seconds before next generation...")
-            time.sleep(3)
+        summary = manifest.summary()
+        manifest.export('generated_videos.json')
     
     print("\n✅ Video generation complete!")
-    print(f"📊 Generated {len([r for r in results if r['status'] == 'completed'])}/{len(results)} videos")
-    
-    # Save results
-    with open('generated_videos.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    print(f"📊 Generated {summary['succeeded']}/{summary['items']} videos ({summary['skipped']} already done, {summary['exhausted']} out of attempts)")
+    print(f"♻️ Video cache: {video_cache.stats()}")
     
     print("\n💾 Results saved to: generated_videos.json")
     print("\n🎯 Next Steps:")
@@ -172,7 +208,7 @@ def generate_all_videos(model="zeroscope"):
     print("2. Post to TikTok with tracking links")
     print("3. Monitor conversions on dashboard")
     
-    return results
+    return summary
 
 if __name__ == "__main__":
     print("\n" + "=" * 70)
@@ -180,7 +216,8 @@ if __name__ == "__main__":
     print("=" * 70 + "\n")
     
     # Generate videos using ZeroscopeV2 (fast, free-tier friendly)
-    results = generate_all_videos(model="zeroscope")
+    # Optional argument: a JSONL file of prompts to use instead of VIDEO_PROMPTS
+    results = generate_all_videos(model="zeroscope", prompts_path=sys.argv[1] if len(sys.argv) > 1 else None)
     
     print("\n" + "=" * 70)
     print("✅ COMPLETE - Ready for TikTok deployment!")
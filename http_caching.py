@@ -0,0 +1,53 @@
+"""
+Conditional GET helpers for the Flask JSON endpoints
+ETag / Last-Modified validators plus Cache-Control, so dashboard polls that
+find nothing changed get a bodyless 304 instead of a re-serialized payload
+"""
+import hashlib
+import json
+import time
+
+from flask import current_app, request
+
+
+def etag_for(data):
+    """Stable content hash of any JSON-serializable value"""
+    raw = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def conditional_json(payload, max_age=0, etag=None, last_modified=None, age=None, status=200):
+    """Return a JSON response that honours If-None-Match / If-Modified-Since.
+
+    etag: validator for the payload. Pass a version string (e.g. the cache
+    entry's stored_at) for cached data so a matching poll is answered without
+    serializing anything. When omitted the etag is a hash of the payload.
+    max_age: Cache-Control max-age in seconds, normally the backend TTL left.
+    """
+    if etag is None:
+        etag = etag_for(payload)
+
+    response = current_app.response_class(status=status, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, int(max_age))
+    if last_modified is not None:
+        response.last_modified = last_modified
+    if age is not None:
+        response.headers['Age'] = str(max(0, int(age)))
+
+    if request.if_none_match.contains_weak(etag):
+        response.status_code = 304
+        return response
+    if last_modified is not None and not request.if_none_match and request.if_modified_since \
+            and int(last_modified) <= request.if_modified_since.timestamp():
+        response.status_code = 304
+        return response
+
+    response.set_data(current_app.json.dumps(payload))
+    return response
+
+
+def remaining_ttl(stored_at, ttl):
+    """Seconds until a cache entry stored at stored_at expires"""
+    return max(0, stored_at + ttl - time.time())
@@ -0,0 +1,248 @@
+"""
+Technical indicators over stored daily bars
+SMA, EMA, RSI, Bollinger bands and volatility as vectorized NumPy kernels,
+extended incrementally when the quote store gains a bar
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+TRADING_DAYS = 252
+DEFAULT_PARAMS = {
+    'sma': 20,
+    'ema': 20,
+    'rsi': 14,
+    'bollinger': 20,
+    'bollinger_k': 2.0,
+    'volatility': 20
+}
+
+
+def rolling_mean(x, n):
+    """Trailing n-point mean; the first n-1 points are NaN"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        c = np.cumsum(np.insert(x, 0, 0.0))
+        out[n - 1:] = (c[n:] - c[:-n]) / n
+    return out
+
+
+def rolling_std(x, n):
+    """Trailing n-point population standard deviation; the first n-1 points are NaN"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1:] = sliding_window_view(x, n).std(axis=1)
+    return out
+
+
+def ema(x, alpha, prev=None):
+    """Exponential moving average e_t = alpha*x_t + (1-alpha)*e_(t-1), without a Python loop.
+
+    Seeded with prev (the EMA just before x) or, if None, with x[0]. Uses
+    the closed form e_k = d^(k+1) * (prev + alpha * sum_j x_j / d^(j+1)),
+    d = 1 - alpha, in chunks short enough that d^-k cannot overflow.
+    """
+    x = np.asarray(x, dtype=float)
+    if not len(x):
+        return x.copy()
+    if alpha >= 1:
+        return x.copy()
+    if prev is None:
+        out = np.empty(len(x))
+        out[0] = x[0]
+        out[1:] = ema(x[1:], alpha, x[0])
+        return out
+
+    decay = 1.0 - alpha
+    chunk = max(1, int(600 / -np.log(decay)))
+    out = np.empty(len(x))
+    for lo in range(0, len(x), chunk):
+        seg = x[lo:lo + chunk]
+        powers = decay ** np.arange(1, len(seg) + 1)
+        out[lo:lo + len(seg)] = powers * (prev + alpha * np.cumsum(seg / powers))
+        prev = out[lo + len(seg) - 1]
+    return out
+
+
+def log_returns(close):
+    """log(c_t / c_(t-1)); the first point is NaN"""
+    out = np.full(len(close), np.nan)
+    out[1:] = np.log(close[1:] / close[:-1])
+    return out
+
+
+def _tail(kernel, x, start, lookback):
+    """kernel(x) for positions start.. only, feeding it lookback earlier points"""
+    lo = max(0, start - lookback)
+    return kernel(x[lo:])[start - lo:]
+
+
+class IndicatorEngine:
+    """Indicator series per (symbol, parameter set), cached and extended in place.
+
+    The newest bar is treated as provisional (today's bar is revised until
+    the close), so an update recomputes from that bar onward: window
+    indicators read only the preceding window, and EMA / RSI continue from
+    the stored smoothing state. A full recompute happens only when the
+    stored history no longer matches (e.g. after a backfill).
+    """
+
+    def __init__(self, store, max_entries=256):
+        self.store = store
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.incremental = 0
+        self.full = 0
+
+    @staticmethod
+    def params(**overrides):
+        """Validated parameter set merged over DEFAULT_PARAMS; raises ValueError"""
+        params = dict(DEFAULT_PARAMS)
+        for name, value in overrides.items():
+            if value is None:
+                continue
+            if name not in params:
+                raise ValueError(f"Unknown indicator parameter: {name}")
+            if name == 'bollinger_k':
+                value = float(value)
+                if not 0 < value <= 5:
+                    raise ValueError("bollinger_k must be in (0, 5]")
+            else:
+                value = int(value)
+                if not 2 <= value <= TRADING_DAYS:
+                    raise ValueError(f"{name} window must be between 2 and {TRADING_DAYS}")
+            params[name] = value
+        return params
+
+    def _update(self, state, bars, params):
+        """Return a state covering all bars, reusing state's final points when possible"""
+        ts = np.asarray(bars['ts'])
+        close = np.asarray(bars['close'], dtype=float)
+        start = 0
+        if state is not None:
+            done = len(state['ts']) - 1
+            if 0 < done <= len(ts) and state['ts'][0] == ts[0] and state['ts'][done - 1] == ts[done - 1]:
+                start = done
+        if start:
+            self.incremental += 1
+        else:
+            self.full += 1
+            state = None
+
+        def keep(name):
+            return state[name][:start] if state is not None else np.zeros(0)
+
+        n_sma, n_ema, n_rsi = params['sma'], params['ema'], params['rsi']
+        n_bb, n_vol = params['bollinger'], params['volatility']
+
+        # Rolling windows only need the n-1 points before start
+        sma = _tail(lambda x: rolling_mean(x, n_sma), close, start, n_sma - 1)
+        bb_mid = _tail(lambda x: rolling_mean(x, n_bb), close, start, n_bb - 1)
+        bb_std = _tail(lambda x: rolling_std(x, n_bb), close, start, n_bb - 1)
+
+        # Volatility windows are over returns, so they need one more close
+        vol = _tail(lambda x: rolling_std(log_returns(x), n_vol), close, start, n_vol) * np.sqrt(TRADING_DAYS)
+
+        # Recursive smoothers continue from the last final value
+        prev_ema = state['ema'][start - 1] if start else None
+        ema_tail = ema(close[start:], 2.0 / (n_ema + 1), prev_ema)
+
+        gain_tail = np.full(len(close) - start, np.nan)
+        loss_tail = np.full(len(close) - start, np.nan)
+        first = max(start, 1)
+        if first < len(close):
+            diff = np.diff(close[first - 1:])
+            seeded = start > 1
+            gain_tail[first - start:] = ema(np.maximum(diff, 0), 1.0 / n_rsi, state['gain'][start - 1] if seeded else None)
+            loss_tail[first - start:] = ema(np.maximum(-diff, 0), 1.0 / n_rsi, state['loss'][start - 1] if seeded else None)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi_tail = np.where(loss_tail == 0, 100.0, 100.0 - 100.0 / (1.0 + gain_tail / loss_tail))
+        rsi_tail[np.isnan(gain_tail)] = np.nan
+        # Wilder smoothing needs about n points before RSI means anything
+        rsi_tail[:max(0, n_rsi - start)] = np.nan
+
+        return {
+            'ts': ts.copy(),
+            'close': close,
+            'last_bar': bars[-1].tolist(),
+            'sma': np.concatenate([keep('sma'), sma]),
+            'ema': np.concatenate([keep('ema'), ema_tail]),
+            'gain': np.concatenate([keep('gain'), gain_tail]),
+            'loss': np.concatenate([keep('loss'), loss_tail]),
+            'bb_mid': np.concatenate([keep('bb_mid'), bb_mid]),
+            'bb_std': np.concatenate([keep('bb_std'), bb_std]),
+            'rsi': np.concatenate([keep('rsi'), rsi_tail]),
+            'volatility': np.concatenate([keep('volatility'), vol]),
+            'results': {}
+        }
+
+    def compute(self, symbol, limit=30, **overrides):
+        """Latest values plus the last `limit` points of every indicator for symbol"""
+        params = self.params(**overrides)
+        key = (symbol.upper(), tuple(sorted(params.items())))
+        bars = self.store.bars(symbol)
+        if not len(bars):
+            return None
+
+        with self._lock:
+            state = self._cache.get(key)
+            if state is not None and len(state['ts']) == len(bars) and state['last_bar'] == bars[-1].tolist():
+                self._cache.move_to_end(key)
+                self.hits += 1
+                cached = state['results'].get(limit)
+                if cached is not None:
+                    return cached
+            else:
+                state = self._update(state, bars, params)
+                self._cache[key] = state
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+            result = self._serialize(symbol, state, params, limit)
+            state['results'][limit] = result
+            return result
+
+    @staticmethod
+    def _serialize(symbol, state, params, limit):
+        k = params['bollinger_k']
+        sl = slice(max(0, len(state['ts']) - limit), None)
+        columns = {
+            'close': state['close'][sl],
+            'sma': state['sma'][sl],
+            'ema': state['ema'][sl],
+            'rsi': state['rsi'][sl],
+            'bollinger_upper': (state['bb_mid'] + k * state['bb_std'])[sl],
+            'bollinger_middle': state['bb_mid'][sl],
+            'bollinger_lower': (state['bb_mid'] - k * state['bb_std'])[sl],
+            'volatility': state['volatility'][sl]
+        }
+        # NaN (not enough history yet) -> None, rounded once per column
+        columns = {
+            name: [None if v != v else v for v in np.round(values, 4).tolist()]
+            for name, values in columns.items()
+        }
+        dates = [time.strftime("%Y-%m-%d", time.gmtime(t)) for t in state['ts'][sl].tolist()]
+        series = [{'date': date, **dict(zip(columns, row))} for date, row in zip(dates, zip(*columns.values()))]
+        return {
+            "symbol": symbol.upper(),
+            "params": params,
+            "bars": len(state['ts']),
+            "latest": series[-1] if series else None,
+            "series": series
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'hits': self.hits,
+                'incremental_updates': self.incremental,
+                'full_recomputes': self.full
+            }
@@ -0,0 +1,266 @@
+"""
+Durable job queue for long-running video generation
+Jobs live in SQLite, so they survive restarts; workers claim them with a
+lease, and a job whose worker died is picked up again once its lease expires.
+Single host only: web and worker processes must share one local database file
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', 'jobs.db')
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """SQLite-backed queue with leased claims.
+
+    claim() is a compare-and-set UPDATE, so any number of processes on this
+    host can pull from one queue without handing a job to two workers. The
+    database must live on a local disk: WAL mode coordinates through shared
+    memory, which does not work over a network filesystem, so the queue
+    cannot be shared between machines. A running job keeps its lease alive
+    with heartbeat(); once a lease lapses the job is claimable again, until
+    it has used max_attempts.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        """One connection per thread (sqlite3 connections are not shareable)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def enqueue(self, kind, payload, max_attempts=None):
+        """Store a new job and return its id"""
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, json.dumps(payload), max_attempts or self.max_attempts, time.time())
+        )
+        return job_id
+
+    def get(self, job_id):
+        return self._row(self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def position(self, job_id):
+        """Number of queued jobs ahead of job_id (None unless it is queued)"""
+        job = self._conn().execute("SELECT status, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None or job['status'] != 'queued':
+            return None
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (job['created_at'],)
+        ).fetchone()[0]
+
+    def claim(self, worker, kinds=None):
+        """Lease the oldest runnable job to worker, or return None.
+
+        Runnable means queued, or running with an expired lease (its worker
+        crashed or lost contact). Expired jobs that are out of attempts are
+        failed instead of re-run.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'Worker lost'), finished_at = ? "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+            (now, now)
+        )
+
+        query = ("SELECT id, status, lease_until FROM jobs "
+                 "WHERE (status = 'queued' OR (status = 'running' AND lease_until < ?))")
+        params = [now]
+        if kinds:
+            query += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        query += " ORDER BY created_at LIMIT 8"
+
+        for candidate in conn.execute(query, params).fetchall():
+            # Only one claimant can match the old status/lease
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE id = ? AND status = ? AND lease_until = ?",
+                (worker, now + self.lease_seconds, now, candidate['id'], candidate['status'], candidate['lease_until'])
+            ).rowcount
+            if claimed:
+                return self.get(candidate['id'])
+        return None
+
+    def heartbeat(self, job_id, worker):
+        """Extend worker's lease on job_id; False if the job is no longer its own"""
+        return bool(self._conn().execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + self.lease_seconds, job_id, worker)
+        ).rowcount)
+
+    def complete(self, job_id, worker, result):
+        return bool(self._conn().execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, finished_at = ?, lease_until = 0 "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (json.dumps(result), time.time(), job_id, worker)
+        ).rowcount)
+
+    def fail(self, job_id, worker, error):
+        """Requeue the job if it has attempts left, otherwise mark it failed"""
+        return bool(self._conn().execute(
+            "UPDATE jobs SET error = ?, lease_until = 0, worker = NULL, "
+            "status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+            "finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE ? END "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (error, time.time(), job_id, worker)
+        ).rowcount)
+
+    def recover_local(self):
+        """Requeue jobs held by dead processes on this host without waiting for their leases"""
+        host = socket.gethostname()
+        recovered = 0
+        for row in self._conn().execute(
+            "SELECT id, worker, lease_until FROM jobs WHERE status = 'running' AND worker LIKE ?", (f"{host}:%",)
+        ).fetchall():
+            pid = int(row['worker'].split(':')[1])
+            try:
+                os.kill(pid, 0)
+                continue
+            except ProcessLookupError:
+                pass
+            except OSError:
+                continue
+            recovered += self._conn().execute(
+                "UPDATE jobs SET lease_until = 0 WHERE id = ? AND worker = ? AND lease_until = ?",
+                (row['id'], row['worker'], row['lease_until'])
+            ).rowcount
+        return recovered
+
+    def stats(self):
+        counts = dict(self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {state: counts.get(state, 0) for state in JOB_STATES}
+
+
+class JobWorkerPool:
+    """Threads that claim jobs from a JobQueue and run handlers[kind](payload).
+
+    A handler's return value becomes the job result; an exception fails the
+    attempt (and requeues it while attempts remain). One heartbeat thread
+    renews the leases of every job this pool is running.
+    """
+
+    def __init__(self, queue, handlers, workers=1, poll_interval=1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._active = {}  # job_id -> worker name
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Recover this host's orphaned jobs, then start the workers and heartbeat"""
+        if self._threads or self.workers <= 0:
+            return self
+        recovered = self.queue.recover_local()
+        if recovered:
+            print(f"♻️ Requeued {recovered} job(s) left running by a previous process")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{self.prefix}:{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self, worker):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(worker, kinds=list(self.handlers))
+            except sqlite3.Error as e:
+                print(f"⚠️ Job queue unavailable: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            with self._lock:
+                self._active[job['id']] = worker
+            print(f"🛠️ {worker} running job {job['id']} ({job['kind']}, attempt {job['attempts']}/{job['max_attempts']})")
+            try:
+                result = self.handlers[job['kind']](job['payload'])
+                self.queue.complete(job['id'], worker, result)
+                print(f"✅ Job {job['id']} succeeded")
+            except Exception as e:
+                traceback.print_exc()
+                self.queue.fail(job['id'], worker, f"{type(e).__name__}: {e}")
+                print(f"❌ Job {job['id']} failed: {e}")
+            finally:
+                with self._lock:
+                    self._active.pop(job['id'], None)
+
+    def _heartbeat(self):
+        while not self._stop.wait(max(1, self.queue.lease_seconds / 3)):
+            with self._lock:
+                active = list(self._active.items())
+            for job_id, worker in active:
+                try:
+                    self.queue.heartbeat(job_id, worker)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Lease renewal for job {job_id} failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'started': bool(self._threads), 'active': len(self._active)}
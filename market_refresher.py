@@ -0,0 +1,119 @@
+"""
+Background refresher for upstream market data (stale-while-revalidate)
+One designated process runs a daemon thread that keeps the latest snapshot in
+the shared cache on a schedule; request handlers read that snapshot and only
+revalidate it themselves when no refresher loop is keeping it fresh
+"""
+import os
+import random
+import threading
+import time
+
+
+class MarketDataRefresher:
+    """Periodically calls fetch() and stores its result in a shared cache.
+
+    start() runs the loop in the process that owns background tasks; other
+    processes call revalidate(), which refreshes an expired snapshot on demand.
+    Either way a cache lease (cache.add) lets only one process call the
+    upstream at a time. Failures back off exponentially from retry_delay
+    (with jitter) up to max_backoff while the last good snapshot keeps being
+    served.
+    """
+
+    def __init__(self, name, fetch, cache, interval=300, retry_delay=30, max_backoff=3600, stale_ttl=86400):
+        self.name = name
+        self.fetch = fetch
+        self.cache = cache
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.stale_ttl = stale_ttl
+        self.failures = 0
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the background loop once per process"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"refresh-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.refresh_once())
+
+    def refresh_once(self):
+        """Refresh if this worker holds the lease; returns seconds until the next attempt"""
+        entry = self.cache.get_entry(self.name, allow_stale=True)
+        age = time.time() - entry['stored_at'] if entry else None
+        if age is not None and age < self.interval:
+            return self.interval - age
+
+        if not self.cache.add(f"{self.name}:lease", os.getpid(), ttl=min(self.interval, 60)):
+            # Another worker is refreshing; look again shortly
+            return min(self.interval, 5)
+
+        try:
+            data = self.fetch()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            backoff = min(self.max_backoff, self.retry_delay * 2 ** (self.failures - 1)) * random.uniform(0.8, 1.2)
+            print(f"⚠️ {self.name} refresh failed ({self.failures}x), retrying in {backoff:.0f}s: {e}")
+            # Hold the lease through the backoff so no other worker retries early
+            self.cache.set(f"{self.name}:lease", os.getpid(), ttl=backoff)
+            return backoff
+        
+        self.cache.set(self.name, data, ttl=self.interval, stale_ttl=self.stale_ttl)
+        self.cache.delete(f"{self.name}:lease")
+        self.failures = 0
+        self.last_error = None
+        return self.interval
+
+    def revalidate(self, wait=0):
+        """Cache entry for a request handler, refreshing it on demand if no loop runs here
+
+        A missing or expired snapshot starts one background refresh_once() per
+        process; the stale snapshot is returned meanwhile. With no snapshot at
+        all the caller waits up to `wait` seconds for that refresh.
+        """
+        entry = self.entry()
+        if self._thread is not None and self._thread.is_alive():
+            return entry
+        if entry is not None and time.time() - entry['stored_at'] < self.interval:
+            return entry
+        with self._lock:
+            if self._pending is None or not self._pending.is_alive():
+                self._pending = threading.Thread(target=self.refresh_once, name=f"revalidate-{self.name}", daemon=True)
+                self._pending.start()
+            pending = self._pending
+        if entry is None and wait:
+            pending.join(wait)
+            entry = self.entry()
+        return entry
+
+    def entry(self):
+        """Raw cache entry ({'value', 'stored_at', 'expires_at'}) or None"""
+        return self.cache.get_entry(self.name, allow_stale=True)
+
+    def snapshot(self):
+        """Latest stored data and its age in seconds, or None before the first fetch"""
+        entry = self.cache.get_entry(self.name, allow_stale=True)
+        if entry is None:
+            return None
+        return entry['value'], time.time() - entry['stored_at']
+
+    def status(self):
+        return {
+            "interval_seconds": self.interval,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error
+        }
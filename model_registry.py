@@ -0,0 +1,265 @@
+"""
+On-disk registry for fitted forecast forests shared across gunicorn workers
+A forest is flattened into one node table saved as .npy and loaded with
+np.load(mmap_mode='r'), so every worker on a host reads the same page-cache
+pages instead of unpickling (and copying) its own trees
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'model_registry')
+DEFAULT_MAX_BYTES = int(os.getenv('MODEL_REGISTRY_MAX_BYTES', 256 * 1024 * 1024))
+DEFAULT_MAX_LOADED = int(os.getenv('MODEL_REGISTRY_MAX_LOADED', 32))
+
+_VERSION_FILE = re.compile(r'^v(\d+)\.json$')
+_SAFE_NAME = re.compile(r'[^A-Za-z0-9_.-]')
+
+# Re-scan the registry for eviction at least this often (other workers write too)
+_EVICT_INTERVAL = 60
+
+
+class PackedForest:
+    """A fitted regression forest as one flat node table.
+
+    Children are global row numbers (-1 marks a leaf), so predict() walks
+    every tree at once with NumPy fancy indexing and never needs the sklearn
+    objects. Predictions match RandomForestRegressor.predict exactly: inputs
+    are compared as float32 like sklearn does, and tree outputs are summed in
+    estimator order before averaging.
+    """
+
+    NODE_DTYPE = np.dtype([
+        ('left', '<i8'),
+        ('right', '<i8'),
+        ('feature', '<i8'),
+        ('threshold', '<f8'),
+        ('value', '<f8')
+    ])
+
+    def __init__(self, nodes, roots, metadata=None):
+        self.nodes = nodes
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.metadata = metadata or {}
+
+    @classmethod
+    def from_sklearn(cls, forest, metadata=None):
+        """Pack a fitted single-output RandomForestRegressor"""
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        nodes = np.empty(sum(tree.node_count for tree in trees), dtype=cls.NODE_DTYPE)
+        roots = []
+        offset = 0
+        for tree in trees:
+            end = offset + tree.node_count
+            leaf = tree.children_left < 0
+            nodes['left'][offset:end] = np.where(leaf, -1, tree.children_left + offset)
+            nodes['right'][offset:end] = np.where(leaf, -1, tree.children_right + offset)
+            nodes['feature'][offset:end] = np.where(leaf, 0, tree.feature)
+            nodes['threshold'][offset:end] = tree.threshold
+            nodes['value'][offset:end] = tree.value[:, 0, 0]
+            roots.append(offset)
+            offset = end
+        return cls(nodes, roots, metadata)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        samples = np.arange(len(X))
+        current = np.repeat(self.roots[:, None], len(X), axis=1)
+        left = self.nodes['left']
+        while True:
+            children = left[current]
+            internal = children >= 0
+            if not internal.any():
+                break
+            rows = self.nodes[current[internal]]
+            go_left = X[np.broadcast_to(samples, current.shape)[internal], rows['feature']] <= rows['threshold']
+            current[internal] = np.where(go_left, rows['left'], rows['right'])
+        leaf_values = self.nodes['value'][current]
+        total = np.zeros(len(X))
+        for row in leaf_values:
+            total += row
+        return total / len(self.roots)
+
+
+class ModelRegistry:
+    """Versioned PackedForest store with a size-bounded LRU.
+
+    Layout: <root>/<name>/v<version>.npy (node table) and v<version>.json
+    (roots and metadata; written last, so it marks a complete version). A
+    version's mtime is bumped on every load, so recency is shared by all
+    workers on the host. Each process keeps at most max_loaded mapped
+    models. Saving prunes the name's superseded versions beyond
+    keep_versions; the whole directory is only scanned for LRU eviction
+    when this process's writes may have pushed it over max_bytes, or once
+    per _EVICT_INTERVAL.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, max_bytes=DEFAULT_MAX_BYTES, max_loaded=DEFAULT_MAX_LOADED, keep_versions=2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_loaded = max_loaded
+        self.keep_versions = keep_versions
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = None  # estimate of the registry size since the last scan
+        self._scanned_at = 0.0
+
+    @staticmethod
+    def safe_name(name):
+        return _SAFE_NAME.sub('_', str(name))
+
+    def _path(self, name, version, ext):
+        return os.path.join(self.root, name, f"v{version}.{ext}")
+
+    def versions(self, name):
+        """Stored versions of a model, oldest first"""
+        try:
+            files = os.listdir(os.path.join(self.root, name))
+        except OSError:
+            return []
+        return sorted(int(m.group(1)) for m in map(_VERSION_FILE.match, files) if m)
+
+    def latest_version(self, name):
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    @staticmethod
+    def _write_atomic(path, write):
+        # Write then rename so other workers never map a half-written file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def save(self, name, forest, version=None):
+        """Store a PackedForest (or fitted RandomForestRegressor) as a new version"""
+        if not isinstance(forest, PackedForest):
+            forest = PackedForest.from_sklearn(forest)
+        name = self.safe_name(name)
+        if version is None:
+            version = (self.latest_version(name) or 0) + 1
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+
+        meta = json.dumps({'roots': forest.roots.tolist(), 'metadata': forest.metadata}).encode('utf-8')
+        self._write_atomic(self._path(name, version, 'npy'), lambda f: np.save(f, forest.nodes, allow_pickle=False))
+        self._write_atomic(self._path(name, version, 'json'), lambda f: f.write(meta))
+
+        self._prune(name)
+        self._account(forest.nodes.nbytes + len(meta))
+        return version
+
+    def load(self, name, version=None):
+        """Memory-map a stored forest, or return None if it is not registered"""
+        name = self.safe_name(name)
+        if version is None:
+            version = self.latest_version(name)
+            if version is None:
+                return None
+
+        key = (name, version)
+        with self._lock:
+            forest = self._loaded.get(key)
+            if forest is not None:
+                self._loaded.move_to_end(key)
+        if forest is None:
+            try:
+                with open(self._path(name, version, 'json'), 'rb') as f:
+                    meta = json.load(f)
+                nodes = np.load(self._path(name, version, 'npy'), mmap_mode='r', allow_pickle=False)
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not load model {name} v{version}: {e}")
+                return None
+            forest = PackedForest(nodes, meta['roots'], meta.get('metadata'))
+            with self._lock:
+                self._loaded[key] = forest
+                while len(self._loaded) > self.max_loaded:
+                    self._loaded.popitem(last=False)
+
+        try:
+            os.utime(self._path(name, version, 'npy'))
+        except OSError:
+            pass
+        return forest
+
+    def _remove(self, name, version):
+        size = 0
+        for ext in ('json', 'npy'):
+            path = self._path(name, version, ext)
+            try:
+                size += os.stat(path).st_size
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._loaded.pop((name, version), None)
+        return size
+
+    def _prune(self, name):
+        """Drop this model's versions older than the newest keep_versions"""
+        for version in self.versions(name)[:-self.keep_versions]:
+            freed = self._remove(name, version)
+            if self._bytes is not None:
+                self._bytes -= freed
+
+    def _account(self, added):
+        """Track bytes written and run a full eviction scan only when it may be needed"""
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += added
+            due = (self._bytes is None or self._bytes > self.max_bytes
+                   or time.monotonic() - self._scanned_at > _EVICT_INTERVAL)
+        if due:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            versions = self.versions(name)
+            for version in versions:
+                try:
+                    st = os.stat(self._path(name, version, 'npy'))
+                    size = st.st_size + os.stat(self._path(name, version, 'json')).st_size
+                except OSError:
+                    continue
+                entries.append({
+                    'name': name,
+                    'version': version,
+                    'stale': version != versions[-1],
+                    'size': size,
+                    'mtime': st.st_mtime
+                })
+        return entries
+
+    def evict(self):
+        """Delete stale and least recently used models until under max_bytes"""
+        entries = self._entries()
+        total = sum(e['size'] for e in entries)
+        # Superseded versions go first, then by last use
+        for entry in sorted(entries, key=lambda e: (not e['stale'], e['mtime'])):
+            if total <= self.max_bytes:
+                break
+            total -= self._remove(entry['name'], entry['version'])
+        with self._lock:
+            self._bytes = total
+            self._scanned_at = time.monotonic()
+        return total
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            loaded = len(self._loaded)
+        return {
+            'models': len({e['name'] for e in entries}),
+            'files': len(entries),
+            'bytes': sum(e['size'] for e in entries),
+            'max_bytes': self.max_bytes,
+            'loaded_in_process': loaded,
+            'max_loaded': self.max_loaded
+        }
@@ -0,0 +1,192 @@
+"""
+Append-only daily OHLCV store for stock quotes
+One fixed-width binary file per symbol, memory-mapped for reads, so history,
+range queries and 52-week aggregates never touch the network
+"""
+import calendar
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+DEFAULT_STORE_DIR = os.getenv('QUOTE_STORE_DIR', 'quote_store')
+
+# 32 bytes per bar; ts is the UTC day start in epoch seconds
+BAR_DTYPE = np.dtype([
+    ('ts', '<i8'),
+    ('open', '<f4'),
+    ('high', '<f4'),
+    ('low', '<f4'),
+    ('close', '<f4'),
+    ('volume', '<i8'),
+])
+DAY = 86400
+YEAR = 365 * DAY
+
+_SYMBOL = re.compile(r'^[A-Z0-9.\-^=]{1,16}$')
+
+
+def day_start(ts):
+    """Floor an epoch timestamp to its UTC day"""
+    return int(ts) - int(ts) % DAY
+
+
+def parse_day(date):
+    """'YYYY-MM-DD' -> epoch seconds at the start of that UTC day"""
+    return calendar.timegm(time.strptime(date, "%Y-%m-%d"))
+
+
+class QuoteStore:
+    """Per-symbol bar files: <root>/<SYMBOL>.bars, sorted by ts.
+
+    Bars are only ever appended, except that a bar for the same day as the
+    last one replaces it in place (today's bar is revised until the close).
+    Readers map the file read-only and remap when its size changes, so a
+    refresh written by one worker is visible to every worker on the host.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self._maps = {}  # symbol -> (size, memmap)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol):
+        symbol = symbol.upper()
+        if not _SYMBOL.match(symbol):
+            raise ValueError(f"Invalid symbol: {symbol}")
+        return os.path.join(self.root, f"{symbol}.bars")
+
+    def _map(self, symbol):
+        """Read-only view of every stored bar (empty array if none)"""
+        path = self._path(symbol)
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return np.zeros(0, dtype=BAR_DTYPE)
+        size -= size % BAR_DTYPE.itemsize  # ignore a torn trailing write
+        if size == 0:
+            return np.zeros(0, dtype=BAR_DTYPE)
+
+        with self._lock:
+            cached = self._maps.get(symbol)
+            if cached is None or cached[0] != size:
+                cached = (size, np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(size // BAR_DTYPE.itemsize,)))
+                self._maps[symbol] = cached
+            return cached[1]
+
+    def append(self, symbol, bars):
+        """Append bars newer than the last stored one; returns how many were written.
+
+        bars: structured array of BAR_DTYPE or iterable of
+        (ts, open, high, low, close, volume). ts is floored to the UTC day.
+        """
+        bars = np.array([tuple(b) for b in bars] if not isinstance(bars, np.ndarray) else bars, dtype=BAR_DTYPE)
+        if not len(bars):
+            return 0
+        bars['ts'] -= bars['ts'] % DAY
+        bars = bars[np.argsort(bars['ts'], kind='stable')]
+        # Keep the last bar per day
+        keep = np.append(bars['ts'][1:] != bars['ts'][:-1], True)
+        bars = bars[keep]
+
+        path = self._path(symbol)
+        with open(path, 'a+b') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            size = f.seek(0, os.SEEK_END)
+            size -= size % BAR_DTYPE.itemsize
+            f.truncate(size)
+
+            last_ts = None
+            if size:
+                f.seek(size - BAR_DTYPE.itemsize)
+                last_ts = int(np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)['ts'][0])
+
+            written = 0
+            if last_ts is not None:
+                same_day = bars[bars['ts'] == last_ts]
+                if len(same_day):
+                    # Revise today's bar in place ('a' mode would force an append)
+                    with open(path, 'r+b') as g:
+                        g.seek(size - BAR_DTYPE.itemsize)
+                        g.write(same_day[-1:].tobytes())
+                    written += 1
+                bars = bars[bars['ts'] > last_ts]
+
+            if len(bars):
+                f.seek(0, os.SEEK_END)
+                f.write(bars.tobytes())
+                written += len(bars)
+        return written
+
+    def bars(self, symbol, start=None, end=None):
+        """Bars with start <= ts <= end (epoch seconds), by binary search"""
+        data = self._map(symbol)
+        ts = data['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+        hi = len(data) if end is None else int(np.searchsorted(ts, end, side='right'))
+        return data[lo:hi]
+
+    def last(self, symbol, n=1):
+        data = self._map(symbol)
+        return data[max(0, len(data) - n):]
+
+    def last_ts(self, symbol):
+        data = self._map(symbol)
+        return int(data['ts'][-1]) if len(data) else None
+
+    def history(self, symbol, days=5, start=None, end=None):
+        """historical_data rows (date + OHLCV); the last `days` bars unless a range is given"""
+        rows = self.last(symbol, days) if start is None and end is None else self.bars(symbol, start, end)
+        return [
+            {
+                "date": time.strftime("%Y-%m-%d", time.gmtime(int(ts))),
+                "open": round(float(o), 2),
+                "high": round(float(h), 2),
+                "low": round(float(l), 2),
+                "close": round(float(c), 2),
+                "volume": int(v)
+            }
+            for ts, o, h, l, c, v in rows.tolist()
+        ]
+
+    def aggregate(self, symbol, window=YEAR, now=None):
+        """High/low/average volume over the trailing window (default 52 weeks), or None"""
+        now = time.time() if now is None else now
+        rows = self.bars(symbol, start=day_start(now) - window)
+        if not len(rows):
+            return None
+        return {
+            "high": round(float(rows['high'].max()), 2),
+            "low": round(float(rows['low'].min()), 2),
+            "avg_volume": int(rows['volume'].mean()),
+            "bars": len(rows),
+            "since": time.strftime("%Y-%m-%d", time.gmtime(int(rows['ts'][0])))
+        }
+
+    def symbols(self):
+        try:
+            return sorted(name[:-5] for name in os.listdir(self.root) if name.endswith('.bars'))
+        except OSError:
+            return []
+
+    def stats(self):
+        sizes = {}
+        for symbol in self.symbols():
+            try:
+                sizes[symbol] = os.stat(self._path(symbol)).st_size
+            except (OSError, ValueError):
+                continue
+        return {
+            'symbols': len(sizes),
+            'bars': sum(size // BAR_DTYPE.itemsize for size in sizes.values()),
+            'bytes': sum(sizes.values())
+        }
@@ -0,0 +1,176 @@
+"""
+Local sentiment scoring for comment text
+Lexicon weights over unigram/negated-bigram tokens, scored a whole batch at a
+time with NumPy; no network calls and no model download
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+SENTIMENT_LABELS = ('positive', 'negative', 'neutral')
+
+# Word -> polarity weight. A word right after a negator counts with its
+# sign flipped, so "not good" scores -1.0.
+LEXICON = {
+    # positive
+    'amazing': 2.0, 'awesome': 2.0, 'love': 2.0, 'loved': 2.0, 'loving': 2.0,
+    'best': 2.0, 'great': 1.5, 'excellent': 2.0, 'fantastic': 2.0, 'perfect': 2.0,
+    'incredible': 2.0, 'impressive': 1.5, 'beautiful': 1.5, 'good': 1.0, 'nice': 1.0,
+    'fast': 1.0, 'smooth': 1.0, 'quiet': 0.5, 'comfortable': 1.0, 'worth': 1.0,
+    'recommend': 1.5, 'happy': 1.5, 'fun': 1.0, 'reliable': 1.5, 'safe': 1.0,
+    'cool': 1.0, 'wow': 1.5, 'dream': 1.0, 'favorite': 1.5, 'efficient': 1.0,
+    # negative
+    'bad': -1.5, 'terrible': -2.0, 'awful': -2.0, 'worst': -2.0, 'hate': -2.0,
+    'hated': -2.0, 'broken': -1.5, 'expensive': -1.0, 'overpriced': -1.5, 'slow': -1.0,
+    'noisy': -1.0, 'problem': -1.0, 'problems': -1.0, 'issue': -1.0, 'issues': -1.0,
+    'disappointed': -2.0, 'disappointing': -2.0, 'recall': -1.5, 'crash': -2.0,
+    'unsafe': -2.0, 'poor': -1.5, 'ugly': -1.5, 'annoying': -1.5, 'waste': -2.0,
+    'refund': -1.5, 'delay': -1.0, 'delayed': -1.0, 'scam': -2.0, 'junk': -2.0,
+}
+NEGATORS = ('not', 'no', 'never', "don't", "isn't", "wasn't", 'hardly')
+
+
+class SentimentClassifier:
+    """Batched lexicon classifier with an LRU cache keyed by text hash.
+
+    A batch is joined, lowercased and split into tokens in one pass (a
+    bytes translate/split for ASCII text, one regex findall otherwise);
+    tokens map to lexicon ids, and unigram weights plus negated bigrams
+    ("not good") are summed per text with one np.bincount. Only texts
+    whose hash is not already cached are scored.
+    """
+
+    TOKEN_PATTERN = re.compile(r"(?u)\b[\w']+\b|\x00")
+    SEPARATOR = ' \x00 '
+    # ASCII bytes that are neither \w nor an apostrophe become token breaks
+    ASCII_BREAKS = bytes(b if chr(b).isalnum() or chr(b) in "_'\x00" else 32 for b in range(256))
+
+    def __init__(self, threshold=0.5, cache_size=1000000):
+        self.threshold = threshold
+        self.cache_size = cache_size
+        # id 0: any other token, id 1: the separator between texts
+        self._ids = {'\x00': 1}
+        for term in (*LEXICON, *NEGATORS):
+            self._ids.setdefault(term, len(self._ids) + 1)
+        self._byte_ids = {term.encode('ascii'): i for term, i in self._ids.items()}
+        self._byte_ids[b''] = -1  # a token that was only apostrophes
+        self.weights = np.zeros(len(self._ids) + 2)
+        self.negator = np.zeros(len(self._ids) + 2, dtype=bool)
+        for term, weight in LEXICON.items():
+            self.weights[self._ids[term]] = weight
+        for term in NEGATORS:
+            self.negator[self._ids[term]] = True
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+    def _token_ids(self, texts):
+        """Lexicon id of every token in the batch, texts separated by id 1"""
+        joined = self.SEPARATOR.join(texts).lower()
+        if joined.count('\x00') != len(texts) - 1:
+            joined = self.SEPARATOR.join(t.replace('\x00', ' ') for t in texts).lower()
+        if joined.isascii():
+            tokens = joined.encode('ascii').translate(self.ASCII_BREAKS).split()
+            # \b[\w']+\b never starts or ends a token with an apostrophe
+            tokens = map(bytes.strip, tokens, itertools.repeat(b"'"))
+            ids = np.fromiter(map(self._byte_ids.get, tokens, itertools.repeat(0)), dtype=np.intp)
+            return ids[ids >= 0]
+        tokens = self.TOKEN_PATTERN.findall(joined)
+        return np.fromiter(map(self._ids.get, tokens, itertools.repeat(0)), dtype=np.intp, count=len(tokens))
+
+    def score(self, texts):
+        """Raw polarity scores for a batch of texts (uncached)"""
+        if not len(texts):
+            return np.zeros(0)
+        ids = self._token_ids(texts)
+        contribution = self.weights[ids]
+        # A negator directly before a lexicon word flips its sign (the plain
+        # +w plus a -2w negated bigram, nets -w); separators are neither, so
+        # bigrams never span two texts
+        contribution[1:][self.negator[ids[:-1]]] *= -1
+        return np.bincount(np.cumsum(ids == 1), weights=contribution, minlength=len(texts))
+
+    def classify(self, texts):
+        """Label a batch of texts -> list of (sentiment, confidence)"""
+        keys = list(map(self._key, texts))
+        results = [None] * len(texts)
+        pending = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = cached
+                    self.hits += 1
+                else:
+                    pending.setdefault(key, []).append(i)
+            self.misses += len(pending)
+
+        if pending:
+            first = [positions[0] for positions in pending.values()]
+            scores = self.score([texts[i] for i in first])
+            labels = np.where(scores > self.threshold, 0, np.where(scores < -self.threshold, 1, 2))
+            # Squash |score| into (0.5, 1) as a rough confidence
+            confidence = np.round(0.5 + 0.5 * np.tanh(np.abs(scores) / 2), 3)
+
+            with self._lock:
+                for (key, positions), label, conf in zip(pending.items(), labels, confidence):
+                    result = (SENTIMENT_LABELS[label], float(conf))
+                    self._cache[key] = result
+                    for i in positions:
+                        results[i] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return results
+
+    def score_comments(self, comments, overwrite=False):
+        """Fill 'sentiment' and 'confidence' on data.json sentiment_analysis dicts"""
+        targets = [c for c in comments if overwrite or 'sentiment' not in c]
+        for comment, (sentiment, confidence) in zip(targets, self.classify([c.get('text', '') for c in targets])):
+            comment['sentiment'] = sentiment
+            comment['confidence'] = confidence
+        return comments
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._cache),
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score data.json sentiment_analysis comments locally")
+    parser.add_argument("path", nargs="?", default="data.json")
+    parser.add_argument("--overwrite", action="store_true", help="Rescore comments that already have a sentiment")
+    args = parser.parse_args()
+
+    with open(args.path, 'r') as f:
+        data = json.load(f)
+
+    classifier = SentimentClassifier()
+    comments = data.get('sentiment_analysis', [])
+    classifier.score_comments(comments, overwrite=args.overwrite)
+
+    tmp_path = f"{args.path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, args.path)
+    print(f"✅ Scored {classifier.stats()['misses']} unique comments in {args.path}")
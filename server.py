@@ -5,10 +5,19 @@ Using CogVideoX-5B from Hugging Face (Free)
 from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
 from openai import OpenAI
-import json, os, time, base64, subprocess, torch
+import json, os, sys, time, base64, subprocess, torch
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 import yfinance as yf
+from shared_cache import get_cache
+from market_refresher import MarketDataRefresher
+from singleflight import SingleFlight
+from http_caching import conditional_json, etag_for, remaining_ttl
+from job_queue import JobQueue, JobWorkerPool
+from video_cache import VideoCache, video_cache_key
+from quote_store import QuoteStore, DAY, day_start, parse_day
+from indicators import IndicatorEngine, DEFAULT_PARAMS as DEFAULT_INDICATOR_PARAMS
 
 # Load environment variables
 load_dotenv()
@@ -37,10 +46,11 @@ print(f"🎮 Using device: {DEVICE}")
 
 # Video generation model (lazy loading)
 video_pipe = None
+video_pipe_error = None
 
 def load_video_model():
     """Load CogVideoX-5B model (lazy loading)"""
-    global video_pipe
+    global video_pipe, video_pipe_error
     if video_pipe is not None:
         return video_pipe
     
@@ -60,6 +70,7 @@ def load_video_model():
         print("✅ CogVideoX-5B model loaded successfully!")
         return video_pipe
     except Exception as e:
+        video_pipe_error = str(e)
         print(f"⚠️ Could not load CogVideoX-5B: {e}")
         print("💡 Falling back to DALL-E 3 + ffmpeg")
         return None
@@ -93,14 +104,22 @@ EXAMPLE_PROMPTS = [
     }
 ]
 
+PROMPTS_ETAG = etag_for(EXAMPLE_PROMPTS)
+
 os.makedirs('generated_videos', exist_ok=True)
 
-def generate_cogvideo(prompt):
-    """Generate video using CogVideoX-5B"""
-    try:
+# Identical prompts + settings reuse the MP4 already on disk
+video_cache = VideoCache()
+COGVIDEO_MODEL = "THUDM/CogVideoX-5b"
+
+def generate_cogvideo(prompt, raise_errors=False):
+    """Generate video using CogVideoX-5B; None on failure unless raise_errors"""
+    key = video_cache_key(prompt, COGVIDEO_MODEL, seed=42, num_frames=49, steps=50, guidance=6.0)
+    
+    def render(video_path):
         pipe = load_video_model()
         if pipe is None:
-            return None
+            raise RuntimeError(f"CogVideoX-5B could not be loaded: {video_pipe_error}")
         
         print(f"🎬 Generating video with CogVideoX-5B...")
         print(f"📝 Prompt: {prompt[:100]}...")
@@ -114,25 +133,31 @@ def generate_cogvideo(prompt):
             generator=torch.Generator(device=DEVICE).manual_seed(42)
         ).frames[0]
         
-        # Save as MP4
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_id = f"video_{ts}"
-        video_path = f"generated_videos/{video_id}.mp4"
-        
         # Export frames to video using imageio
         import imageio
         imageio.mimsave(video_path, video_frames, fps=8, codec='libx264')
+        return True
+    
+    try:
+        result = video_cache.get_or_generate(key, render)
+        if result is None:
+            raise RuntimeError("CogVideoX-5B produced no video file")
         
-        print(f"✅ Video saved: {video_path}")
+        video_id, video_path, cached = result
+        print(f"✅ Video {'reused' if cached else 'saved'}: {video_path}")
         return video_id, video_path
         
     except Exception as e:
         print(f"❌ CogVideoX error: {e}")
+        if raise_errors:
+            raise
         return None
 
-def generate_fallback_video(prompt):
-    """Fallback: Generate image with DALL-E 3 + ffmpeg"""
-    try:
+def generate_fallback_video(prompt, raise_errors=False):
+    """Fallback: Generate image with DALL-E 3 + ffmpeg; None on failure unless raise_errors"""
+    key = video_cache_key(prompt, "dall-e-3+ffmpeg", num_frames=150, size="1792x1024", quality="hd")
+    
+    def render(mp4_path):
         print("📸 Generating image with DALL-E 3...")
         img_response = client.images.generate(
             model="dall-e-3",
@@ -143,15 +168,12 @@ def generate_fallback_video(prompt):
         )
         
         img_bytes = base64.b64decode(img_response.data[0].b64_json)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_id = f"video_{ts}"
-        img_path = f"generated_videos/{video_id}.png"
+        img_path = video_cache.temp_path(key, 'png')
         
         with open(img_path, 'wb') as f:
             f.write(img_bytes)
         
         # Create MP4 with ffmpeg
-        mp4_path = f"generated_videos/{video_id}.mp4"
         cmd = [
             'ffmpeg', '-y', '-loglevel', 'error',
             '-loop', '1', '-i', img_path,
@@ -164,15 +186,73 @@ def generate_fallback_video(prompt):
             mp4_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-        if result.returncode == 0:
-            return video_id, mp4_path
-        return None
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=30)
+            if result.returncode != 0:
+                stderr = result.stderr.decode('utf-8', errors='replace').strip()
+                raise RuntimeError(f"ffmpeg exited with {result.returncode}: {stderr[-500:]}")
+            # Keep the still next to the video, evicted with it
+            os.replace(img_path, video_cache.path(key, 'png'))
+            return True
+        finally:
+            if os.path.exists(img_path):
+                os.remove(img_path)
+    
+    try:
+        result = video_cache.get_or_generate(key, render)
+        if result is None:
+            raise RuntimeError("ffmpeg produced no video file")
+        
+        video_id, mp4_path, cached = result
+        return video_id, mp4_path
         
     except Exception as e:
         print(f"❌ Fallback error: {e}")
+        if raise_errors:
+            raise
         return None
 
+# Durable queue: generation runs on pool workers on this host, not in request threads
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+# Job workers (which load the video model) and the market data refresh loop run
+# in one designated process: `python <server>.py --worker`, the dev server, or a
+# process started with RUN_BACKGROUND_TASKS=1. gunicorn web workers only enqueue
+# jobs and read the shared market snapshot.
+RUN_BACKGROUND_TASKS = os.getenv('RUN_BACKGROUND_TASKS', '').lower() in ('1', 'true', 'yes')
+job_queue = JobQueue()
+
+def run_video_job(payload):
+    """Job handler: CogVideoX-5B on GPU, else DALL-E 3 + ffmpeg; raises so the queue can retry"""
+    prompt = payload['prompt']
+    result = None
+    errors = []
+    if DEVICE == "cuda":
+        try:
+            result = generate_cogvideo(prompt, raise_errors=True)
+            model = "CogVideoX-5B"
+        except Exception as e:
+            errors.append(f"CogVideoX-5B: {e}")
+    if not result:
+        try:
+            result = generate_fallback_video(prompt, raise_errors=True)
+            model = "DALL-E 3 + ffmpeg"
+        except Exception as e:
+            errors.append(f"DALL-E 3 + ffmpeg: {e}")
+    if not result:
+        # Stored on the job, so GET /api/jobs/<id> shows why it failed
+        raise RuntimeError("; ".join(errors))
+    
+    video_id, video_path = result
+    return {
+        "video_id": video_id,
+        "video_url": f"/api/download/{video_id}.mp4",
+        "prompt": prompt,
+        "model": model,
+        "device": DEVICE
+    }
+
+job_pool = JobWorkerPool(job_queue, {"generate_video": run_video_job}, workers=JOB_WORKERS)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -185,7 +265,9 @@ def health_check():
             "real_time_data": True,
             "video_model": "CogVideoX-5B" if DEVICE == "cuda" else "DALL-E 3 + ffmpeg",
             "device": DEVICE
-        }
+        },
+        "jobs": {**job_queue.stats(), **job_pool.stats()},
+        "video_cache": video_cache.stats()
     })
 
 def check_ffmpeg():
@@ -197,59 +279,54 @@ def check_ffmpeg():
 
 @app.route('/api/prompts', methods=['GET'])
 def get_prompts():
-    return jsonify({"prompts": EXAMPLE_PROMPTS, "count": len(EXAMPLE_PROMPTS)})
+    return conditional_json({"prompts": EXAMPLE_PROMPTS, "count": len(EXAMPLE_PROMPTS)},
+                            max_age=3600, etag=PROMPTS_ETAG)
 
+@app.route('/api/jobs', methods=['POST'])
+# Legacy endpoint: same queued job instead of generating inside the request
 @app.route('/api/generate-video', methods=['POST'])
-def generate_video():
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'Invalid JSON'}), 400
-            
-        prompt = data.get('prompt', '').strip()
-        if not prompt:
-            return jsonify({'error': 'Prompt required'}), 400
-        
-        if len(prompt) > 1000:
-            return jsonify({'error': 'Prompt too long (max 1000 chars)'}), 400
-        
-        print(f"\n🎬 Starting video generation...")
-        
-        # Try CogVideoX first if GPU available
-        if DEVICE == "cuda":
-            result = generate_cogvideo(prompt)
-            if result:
-                video_id, video_path = result
-                return jsonify({
-                    "success": True,
-                    "video_id": video_id,
-                    "video_url": f"/api/download/{video_id}.mp4",
-                    "prompt": prompt,
-                    "model": "CogVideoX-5B",
-                    "device": DEVICE,
-                    "timestamp": time.time()
-                })
-        
-        # Fallback to DALL-E + ffmpeg
-        print("💡 Using DALL-E 3 + ffmpeg fallback...")
-        result = generate_fallback_video(prompt)
-        if result:
-            video_id, video_path = result
-            return jsonify({
-                "success": True,
-                "video_id": video_id,
-                "video_url": f"/api/download/{video_id}.mp4",
-                "prompt": prompt,
-                "model": "DALL-E 3 + ffmpeg",
-                "note": "Install CUDA for CogVideoX-5B real video generation",
-                "timestamp": time.time()
-            })
-        
-        return jsonify({'error': 'Video generation failed'}), 500
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return jsonify({'error': str(e)}), 500
+def create_job():
+    """Queue a video generation job and return its id immediately"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Invalid JSON'}), 400
+    
+    prompt = data.get('prompt', '').strip()
+    if not prompt:
+        return jsonify({'error': 'Prompt required'}), 400
+    
+    if len(prompt) > 1000:
+        return jsonify({'error': 'Prompt too long (max 1000 chars)'}), 400
+    
+    job_id = job_queue.enqueue("generate_video", {"prompt": prompt})
+    print(f"📥 Queued video job {job_id}")
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "position": job_queue.position(job_id),
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a queued job, with its result once it has succeeded"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        "job_id": job['id'],
+        "kind": job['kind'],
+        "status": job['status'],
+        "position": job_queue.position(job_id),
+        "attempts": job['attempts'],
+        "max_attempts": job['max_attempts'],
+        "created_at": job['created_at'],
+        "started_at": job['started_at'],
+        "finished_at": job['finished_at'],
+        "result": job['result'],
+        "error": job['error']
+    })
 
 @app.route('/api/download/<filename>')
 def download_file(filename):
@@ -262,16 +339,67 @@ def download_file(filename):
     return jsonify({'error': 'File not found'}), 404
 
 # Market data functions (same as before)
-def get_tesla_stock_data():
+EV_STOCKS = {"TSLA": "Tesla", "RIVN": "Rivian", "LCID": "Lucid", "NIO": "NIO"}
+QUOTE_FETCH_WORKERS = int(os.getenv('QUOTE_FETCH_WORKERS', 8))
+_quote_pool = ThreadPoolExecutor(max_workers=QUOTE_FETCH_WORKERS, thread_name_prefix='yfinance')
+# Concurrent requests for the same symbol share one Yahoo Finance call
+yf_flight = SingleFlight()
+
+def _fetch_info(symbol):
+    try:
+        return yf_flight.do(f"info:{symbol}", lambda: yf.Ticker(symbol).info)
+    except Exception as e:
+        print(f"Error fetching {symbol}: {e}")
+        return None
+
+def _fetch_history(symbol, period="5d"):
+    return yf_flight.do(f"history:{symbol}:{period}", lambda: yf.Ticker(symbol).history(period=period))
+
+def fetch_quotes(symbols):
+    """Fetch Yahoo Finance info for all symbols concurrently (deduplicated)"""
+    unique = list(dict.fromkeys(symbols))
+    return dict(zip(unique, _quote_pool.map(_fetch_info, unique)))
+
+# Daily OHLCV bars per symbol, filled by the refresher and read without the network
+quote_store = QuoteStore()
+HISTORY_BACKFILL_PERIOD = "1y"
+# Indicator series per symbol/parameter set, extended as bars are appended
+indicator_engine = IndicatorEngine(quote_store)
+
+def bar_from_info(info):
+    """Today's (ts, open, high, low, close, volume) bar from a Yahoo Finance quote"""
+    price = info.get('currentPrice', info.get('regularMarketPrice', 0))
+    return (
+        info.get('regularMarketTime') or int(time.time()),
+        info.get('open', info.get('regularMarketOpen', price)),
+        info.get('dayHigh', price),
+        info.get('dayLow', price),
+        price,
+        info.get('volume', 0) or 0
+    )
+
+def sync_history(symbol, info):
+    """Backfill a year of bars when the store is empty or behind, then revise today's bar from the quote"""
+    last_ts = quote_store.last_ts(symbol)
+    if last_ts is None or last_ts < day_start(time.time()) - 5 * DAY:
+        hist = _fetch_history(symbol, HISTORY_BACKFILL_PERIOD)
+        quote_store.append(symbol, [
+            (int(date.timestamp()), row['Open'], row['High'], row['Low'], row['Close'], int(row['Volume']))
+            for date, row in hist.iterrows()
+        ])
+    if info:
+        quote_store.append(symbol, [bar_from_info(info)])
+
+def get_tesla_stock_data(info=None):
     try:
-        tsla = yf.Ticker("TSLA")
-        info = tsla.info
-        hist = tsla.history(period="5d")
+        if info is None:
+            info = _fetch_info("TSLA")
         
         current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
         prev_close = info.get('previousClose', 0)
         change = current_price - prev_close if prev_close else 0
         change_pct = (change / prev_close * 100) if prev_close else 0
+        year = quote_store.aggregate("TSLA")
         
         return {
             "symbol": "TSLA",
@@ -282,26 +410,25 @@ def get_tesla_stock_data():
             "market_cap": info.get('marketCap', 0),
             "day_high": info.get('dayHigh', 0),
             "day_low": info.get('dayLow', 0),
-            "52_week_high": info.get('fiftyTwoWeekHigh', 0),
-            "52_week_low": info.get('fiftyTwoWeekLow', 0),
+            "52_week_high": year['high'] if year else info.get('fiftyTwoWeekHigh', 0),
+            "52_week_low": year['low'] if year else info.get('fiftyTwoWeekLow', 0),
             "pe_ratio": info.get('trailingPE', 0),
-            "historical_data": [
-                {"date": date.strftime("%Y-%m-%d"), "close": round(row['Close'], 2), "volume": int(row['Volume'])}
-                for date, row in hist.iterrows()
-            ]
+            "historical_data": quote_store.history("TSLA", days=5)
         }
     except Exception as e:
         print(f"Error fetching Tesla stock: {e}")
         return None
 
-def get_ev_market_data():
+def get_ev_market_data(quotes=None):
     try:
-        ev_stocks = {"TSLA": "Tesla", "RIVN": "Rivian", "LCID": "Lucid", "NIO": "NIO"}
+        if quotes is None:
+            quotes = fetch_quotes(EV_STOCKS)
         market_data = []
-        for symbol, name in ev_stocks.items():
+        for symbol, name in EV_STOCKS.items():
+            info = quotes.get(symbol)
+            if not info:
+                continue
             try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
                 current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
                 prev_close = info.get('previousClose', 0)
                 change_pct = ((current_price - prev_close) / prev_close * 100) if prev_close else 0
@@ -320,19 +447,95 @@ def get_ev_market_data():
     except Exception as e:
         return None
 
-@app.route('/api/market-data')
-def get_market_data_endpoint():
-    tesla_data = get_tesla_stock_data()
-    ev_data = get_ev_market_data()
+def _sync_history_safely(item):
+    try:
+        sync_history(*item)
+    except Exception as e:
+        return str(e)
+
+def fetch_market_snapshot():
+    """One Yahoo Finance round for the refresher thread
+
+    Every symbol's quote is requested concurrently, and TSLA's quote is
+    fetched once for both the stock and EV market sections. The quotes
+    update today's bar in the quote store; history is only downloaded to
+    backfill an empty store.
+    """
+    quotes = fetch_quotes(["TSLA", *EV_STOCKS])
+    if not quotes.get("TSLA"):
+        raise RuntimeError("Unable to fetch Tesla stock data")
     
-    if not tesla_data:
-        return jsonify({"error": "Unable to fetch market data"}), 500
+    for symbol, error in zip(quotes, _quote_pool.map(_sync_history_safely, quotes.items())):
+        if error:
+            print(f"⚠️ History sync failed for {symbol}: {error}")
     
-    return jsonify({
+    tesla_data = get_tesla_stock_data(info=quotes["TSLA"])
+    if not tesla_data:
+        raise RuntimeError("Unable to fetch Tesla stock data")
+    return {
         "tesla_stock": tesla_data,
-        "ev_market": ev_data,
-        "last_updated": datetime.now().isoformat(),
+        "ev_market": get_ev_market_data(quotes),
+        "last_updated": datetime.now().isoformat()
+    }
+
+MARKET_DATA_REFRESH_INTERVAL = int(os.getenv('MARKET_DATA_REFRESH_INTERVAL', 60))
+# The designated background process runs the refresh loop (start_background_tasks);
+# web workers read its snapshot from the shared cache and revalidate on demand
+market_refresher = MarketDataRefresher(
+    'yahoo_market_data', fetch_market_snapshot, get_cache(),
+    interval=MARKET_DATA_REFRESH_INTERVAL
+)
+
+@app.route('/api/market-data')
+def get_market_data_endpoint():
+    entry = market_refresher.revalidate(wait=10)
+    if entry is None:
+        return jsonify({"error": "Market data is warming up", "message": market_refresher.last_error}), 503, {"Retry-After": "5"}
+    
+    age = time.time() - entry['stored_at']
+    return conditional_json({
+        **entry['value'],
+        "data_age_seconds": round(age, 1),
+        "stale": age > MARKET_DATA_REFRESH_INTERVAL * 2,
         "data_source": "Yahoo Finance (Real-time)"
+    }, max_age=remaining_ttl(entry['stored_at'], MARKET_DATA_REFRESH_INTERVAL),
+       etag=f"market-{entry['stored_at']}", last_modified=entry['stored_at'], age=age)
+
+@app.route('/api/history/<symbol>')
+def get_history(symbol):
+    """Stored daily bars: ?start=&end= (YYYY-MM-DD) or the last ?days= bars, plus 52-week range"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        rows = quote_store.history(
+            symbol,
+            days=request.args.get('days', 30, type=int),
+            start=parse_day(start) if start else None,
+            end=parse_day(end) + DAY - 1 if end else None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'symbol': symbol.upper(),
+        'historical_data': rows,
+        'count': len(rows),
+        '52_week': quote_store.aggregate(symbol)
+    })
+
+@app.route('/api/indicators')
+def get_indicators():
+    """SMA/EMA/RSI/Bollinger/volatility from stored bars: ?symbols=TSLA,RIVN&limit=30&sma=20&ema=20&rsi=14&bollinger=20&bollinger_k=2&volatility=20"""
+    symbols = [s.strip().upper() for s in request.args.get('symbols', ','.join(EV_STOCKS)).split(',') if s.strip()]
+    overrides = {name: request.args.get(name) for name in DEFAULT_INDICATOR_PARAMS}
+    try:
+        limit = min(max(request.args.get('limit', 30, type=int), 1), 365)
+        results = {symbol: indicator_engine.compute(symbol, limit=limit, **overrides) for symbol in symbols}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'indicators': {symbol: result for symbol, result in results.items() if result},
+        'missing': [symbol for symbol, result in results.items() if not result],
+        'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/campaigns', methods=['GET'])
@@ -348,7 +551,8 @@ def get_ai_insights():
         return jsonify({'error': 'AI Analytics Engine not available'})
     
     try:
-        stock_data = get_tesla_stock_data()
+        entry = market_refresher.revalidate(wait=10)
+        stock_data = entry['value']['tesla_stock'] if entry else None
         if stock_data:
             insights = [
                 f"Tesla stock is currently at ${stock_data['price']} ({stock_data['change_percent']})",
@@ -362,6 +566,43 @@ def get_ai_insights():
     except Exception as e:
         return jsonify({'insights': [], 'error': str(e)})
 
+@app.route('/api/forecast')
+def get_forecast():
+    if not HAS_ANALYTICS:
+        return jsonify({'error': 'AI Analytics Engine not available'}), 503
+    
+    try:
+        mode = request.args.get('mode', 'incremental')
+        data = analytics_engine.dataset.get()['data']
+        forecasts = analytics_engine.forecast_portfolio(data.get('campaign_tracking', {}), mode=mode)
+        return jsonify({
+            'forecasts': forecasts,
+            'count': len(forecasts),
+            'mode': mode,
+            'horizon_days': 7,
+            'timestamp': datetime.now().isoformat()
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/leaderboard')
+def get_leaderboard():
+    if not HAS_ANALYTICS:
+        return jsonify({'error': 'AI Analytics Engine not available'}), 503
+    
+    metric = request.args.get('metric', 'conversions')
+    n = min(max(request.args.get('n', 5, type=int), 1), 100)
+    try:
+        return jsonify({
+            'metric': metric,
+            'campaigns': analytics_engine.top_campaigns(metric, n),
+            'insights': analytics_engine.generate_insights(top_n=n)
+        })
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/tiktok-trends')
 def get_tiktok_trends():
     return jsonify({
@@ -369,7 +610,22 @@ def get_tiktok_trends():
         "note": "TikTok API requires business account authentication"
     })
 
+def start_background_tasks():
+    """Start the job workers and the market data refresh loop in this process (idempotent)"""
+    job_pool.start()
+    market_refresher.start()
+
+if RUN_BACKGROUND_TASKS:
+    start_background_tasks()
+
 if __name__ == '__main__':
+    start_background_tasks()
+    if '--worker' in sys.argv:
+        # Background-only process: run queued jobs, no HTTP server
+        print(f"🛠️ Job worker process: {JOB_WORKERS} worker(s) on {job_queue.path}")
+        job_pool.join()
+        sys.exit(0)
+    
     print("\n" + "="*60)
     print("🚀 Tesla Sales Dashboard - Real Video Generation API")
     print("="*60)
@@ -378,6 +634,7 @@ if __name__ == '__main__':
     print(f"💡 Fallback: DALL-E 3 + ffmpeg")
     print(f"🤖 AI Analytics: {'Enabled' if HAS_ANALYTICS else 'Disabled'}")
     print(f"📊 Real-time Data: Yahoo Finance")
+    print(f"🛠️ Job workers: {JOB_WORKERS} (queue: {job_queue.path})")
     print(f"🌐 Server: http://localhost:5001")
     print("="*60)
     
@@ -3,12 +3,20 @@ Minimal Flask API for Tesla Dashboard - With AI-generated prompts
 Optimized for Render free tier
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import os
-import requests
+import time
 from datetime import datetime
 import json
+from shared_cache import get_cache
+from market_refresher import MarketDataRefresher
+from singleflight import SingleFlight
+from http_caching import conditional_json, etag_for, remaining_ttl
+from event_stream import Broadcaster
+from upstream import http_get, openai_client, replicate_client
+from quote_store import QuoteStore, DAY, day_start, parse_day
+from indicators import IndicatorEngine, DEFAULT_PARAMS as DEFAULT_INDICATOR_PARAMS
 
 app = Flask(__name__)
 # Enable CORS for all origins (production-ready)
@@ -31,10 +39,18 @@ def after_request(response):
 # Environment variables
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 REPLICATE_API_TOKEN = os.getenv('REPLICATE_API_TOKEN')
+# The demo key only serves sample symbols; TSLA needs a real (free) key
+ALPHA_VANTAGE_KEY = os.getenv('ALPHA_VANTAGE_KEY', 'demo')
 
-# Cache for prompts (to avoid regenerating every time)
-_prompts_cache = None
-_prompts_cache_time = None
+# Cache shared by all workers/instances (prompts + market data)
+cache = get_cache()
+# Coalesces concurrent upstream calls for the same key
+flight = SingleFlight()
+PROMPTS_CACHE_TTL = 3600  # 1 hour
+TRENDS_MAX_AGE = 300  # trending topics are static per deploy
+# Alpha Vantage allows 25 calls/day, so refresh hourly by default
+MARKET_DATA_REFRESH_INTERVAL = int(os.getenv('MARKET_DATA_REFRESH_INTERVAL', 3600))
+MARKET_DATA_STALE_TTL = 86400  # serve up to a day old data if the API fails
 
 # Trending topics (simulated - in production, fetch from TikTok API)
 TRENDING_TOPICS = [
@@ -47,32 +63,28 @@ TRENDING_TOPICS = [
     {"tag": "#TechReview", "views": 78000000, "trend": "stable"},
 ]
 
-def generate_prompts_from_trends():
-    """Generate video prompts based on trending topics using OpenAI"""
-    global _prompts_cache, _prompts_cache_time
-    
-    # Return cached prompts if less than 1 hour old
-    if _prompts_cache and _prompts_cache_time:
-        age = (datetime.now() - _prompts_cache_time).seconds
-        if age < 3600:  # 1 hour cache
-            return _prompts_cache
+def get_fallback_prompts():
+    """Detailed sample prompts used without an OpenAI key or when generation fails"""
+    return [
+        {"title": "Tesla Delivery Day", "prompt": "Cinematic shot of excited person receiving Tesla Model Y keys at delivery center", "category": "Lifestyle", "trend": "#TeslaDelivery"},
+        {"title": "Autopilot Demo", "prompt": "Inside Tesla, family amazed as steering wheel drives itself on highway", "category": "Technology", "trend": "#TeslaAutopilot"},
+        {"title": "Supercharger Speed", "prompt": "Tesla Supercharger station, rapid charging with battery percentage increasing", "category": "Convenience", "trend": "#EVCharging"},
+        {"title": "Acceleration Test", "prompt": "Tesla Model Y launching from 0-60mph, driver pressed back in seat", "category": "Performance", "trend": "#TeslaModelY"},
+        {"title": "Interior Tech", "prompt": "Close-up of Tesla touchscreen showing navigation and entertainment features", "category": "Technology", "trend": "#TechReview"}
+    ]
+
+def _generate_prompts_with_openai():
+    """One OpenAI round trip; raises on failure so nothing bad gets cached"""
+    # Use OpenAI to generate prompts based on trends
+    client = openai_client(OPENAI_API_KEY)
     
-    if not OPENAI_API_KEY:
-        print("No OpenAI API key - using detailed fallback prompts")
-        return get_fallback_prompts()
+    trending_tags = [t["tag"] for t in TRENDING_TOPICS[:5]]
     
-    try:
-        # Use OpenAI to generate prompts based on trends
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        trending_tags = [t["tag"] for t in TRENDING_TOPICS[:5]]
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert cinematographer and Tesla marketing specialist. Create highly detailed, cinematic video prompts."},
-                {"role": "user", "content": f"""Based on these trending TikTok hashtags: {', '.join(trending_tags)}
+    response = client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are an expert cinematographer and Tesla marketing specialist. Create highly detailed, cinematic video prompts."},
+            {"role": "user", "content": f"""Based on these trending TikTok hashtags: {', '.join(trending_tags)}
 
 Generate 5 EXTREMELY DETAILED, cinematic video prompts for Tesla marketing videos.
 
@@ -94,35 +106,35 @@ Return ONLY a JSON array:
   {{"title": "Catchy 3-5 Word Title", "prompt": "EXTREMELY detailed 80-150 word cinematic description with camera angles, lighting, movements, and specific Tesla features", "category": "Lifestyle/Technology/Performance/Luxury", "trend": "#hashtag"}},
   ...
 ]"""}
-            ],
-            temperature=0.9,
-            max_tokens=2000
-        )
-        
-        content = response.choices[0].message.content.strip()
-        # Extract JSON from response
-        if '```json' in content:
-            content = content.split('```json')[1].split('```')[0].strip()
-        elif '```' in content:
-            content = content.split('```')[1].split('```')[0].strip()
-        
-        prompts = json.loads(content)
-        
-        # Cache the results
-        _prompts_cache = prompts
-        _prompts_cache_time = datetime.now()
-        
-        return prompts
+        ],
+        temperature=0.9,
+        max_tokens=2000
+    )
+    
+    content = response.choices[0].message.content.strip()
+    # Extract JSON from response
+    if '```json' in content:
+        content = content.split('```json')[1].split('```')[0].strip()
+    elif '```' in content:
+        content = content.split('```')[1].split('```')[0].strip()
+    
+    prompts = json.loads(content)
+    
+    return prompts
+
+def generate_prompts_from_trends():
+    """Generate video prompts based on trending topics using OpenAI"""
+    if not OPENAI_API_KEY:
+        print("No OpenAI API key - using detailed fallback prompts")
+        return get_fallback_prompts()
+    
+    try:
+        # Cached for 1 hour; on a miss only one caller across all workers asks OpenAI
+        return flight.cached_call(cache, 'prompts', _generate_prompts_with_openai, ttl=PROMPTS_CACHE_TTL)
     except Exception as e:
         print(f"Error generating prompts: {e}")
         # Return fallback prompts
-        return [
-            {"title": "Tesla Delivery Day", "prompt": "Cinematic shot of excited person receiving Tesla Model Y keys at delivery center", "category": "Lifestyle", "trend": "#TeslaDelivery"},
-            {"title": "Autopilot Demo", "prompt": "Inside Tesla, family amazed as steering wheel drives itself on highway", "category": "Technology", "trend": "#TeslaAutopilot"},
-            {"title": "Supercharger Speed", "prompt": "Tesla Supercharger station, rapid charging with battery percentage increasing", "category": "Convenience", "trend": "#EVCharging"},
-            {"title": "Acceleration Test", "prompt": "Tesla Model Y launching from 0-60mph, driver pressed back in seat", "category": "Performance", "trend": "#TeslaModelY"},
-            {"title": "Interior Tech", "prompt": "Close-up of Tesla touchscreen showing navigation and entertainment features", "category": "Technology", "trend": "#TechReview"}
-        ]
+        return get_fallback_prompts()
 
 @app.route('/')
 def home():
@@ -136,6 +148,9 @@ def home():
             "/api/prompts",
             "/api/trends",
             "/api/market-data",
+            "/api/history/<symbol>",
+            "/api/indicators",
+            "/api/stream",
             "/api/generate-video"
         ]
     })
@@ -148,122 +163,243 @@ def health():
         "services": {
             "openai": bool(OPENAI_API_KEY),
             "replicate": bool(REPLICATE_API_TOKEN)
-        }
+        },
+        "cache": cache.stats(),
+        "market_refresher": market_refresher.status(),
+        "single_flight": flight.stats(),
+        "stream": broadcaster.stats(),
+        "quote_store": quote_store.stats(),
+        "indicators": indicator_engine.stats()
     })
 
 @app.route('/api/prompts')
 def prompts():
     """Get AI-generated prompts based on trending topics"""
     prompts_list = generate_prompts_from_trends()
-    return jsonify({
+    entry = cache.get_entry('prompts')
+    return conditional_json({
         "prompts": prompts_list,
         "count": len(prompts_list),
-        "generated_at": datetime.now().isoformat(),
+        "generated_at": datetime.fromtimestamp(entry['stored_at']).isoformat() if entry else datetime.now().isoformat(),
         "source": "AI-generated from trends" if OPENAI_API_KEY else "Sample prompts"
-    })
+    }, max_age=remaining_ttl(entry['stored_at'], PROMPTS_CACHE_TTL) if entry else 300, etag=etag_for(prompts_list))
 
 @app.route('/api/trends')
 def trends():
     """Get trending TikTok topics"""
-    return jsonify({
+    return conditional_json({
         "trending_hashtags": TRENDING_TOPICS,
         "last_updated": datetime.now().isoformat()
-    })
+    }, max_age=TRENDS_MAX_AGE, etag=etag_for(TRENDING_TOPICS))
+
+# Use Alpha Vantage API (free, reliable, 25 calls/day)
+if ALPHA_VANTAGE_KEY == 'demo':
+    print("⚠️ ALPHA_VANTAGE_KEY not set - the demo key has no TSLA quotes, market data will be degraded")
+
+# Daily TSLA bars kept on disk, so 52-week ranges and history need no extra API calls
+quote_store = QuoteStore()
+indicator_engine = IndicatorEngine(quote_store)
+
+def backfill_history(symbol):
+    """One TIME_SERIES_DAILY call when the store is empty or more than a few days behind"""
+    last_ts = quote_store.last_ts(symbol)
+    if last_ts is not None and last_ts >= day_start(time.time()) - 5 * DAY:
+        return 0
+    # At most one attempt per day across workers, so a failing backfill cannot eat the quota
+    if not cache.add(f"history_backfill:{symbol}", os.getpid(), ttl=DAY):
+        return 0
+    try:
+        series = http_get(
+            f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={symbol}&outputsize=full&apikey={ALPHA_VANTAGE_KEY}"
+        ).json().get('Time Series (Daily)') or {}
+        cutoff = day_start(time.time()) - 400 * DAY
+        bars = [
+            (parse_day(date), float(bar['1. open']), float(bar['2. high']), float(bar['3. low']),
+             float(bar['4. close']), int(bar['5. volume']))
+            for date, bar in series.items()
+        ]
+        return quote_store.append(symbol, [bar for bar in bars if bar[0] >= cutoff])
+    except Exception as e:
+        print(f"⚠️ History backfill for {symbol} failed: {e}")
+        return 0
 
-# Cache for market data
-_market_data_cache = None
-_market_data_cache_time = None
+def market_payload(price, previous_close, day_low, day_high, volume, data_source, change=None, change_percent=None):
+    """/api/market-data body around a TSLA quote, with the 52-week range from stored bars"""
+    if change is None:
+        change = price - previous_close
+    if change_percent is None:
+        change_percent = change / previous_close * 100 if previous_close else 0
+    year = quote_store.aggregate('TSLA') or {}
+    
+    # Fetch EV competitors with fallback data
+    ev_companies = [
+        {"name": "Tesla", "symbol": "TSLA", "price": round(price, 2), "change_percent": round(change_percent, 2)},
+        {"name": "NIO", "symbol": "NIO", "price": 6.85, "change_percent": 0.74},
+        {"name": "Rivian", "symbol": "RIVN", "price": 13.52, "change_percent": 3.01},
+        {"name": "Lucid", "symbol": "LCID", "price": 3.21, "change_percent": -1.28},
+        {"name": "Ford", "symbol": "F", "price": 11.25, "change_percent": 1.15}
+    ]
+    
+    return {
+        "tesla_stock": {
+            "price": round(price, 2),
+            "change": round(change, 2),
+            "change_percent": f"{'+' if change >= 0 else ''}{change_percent:.2f}%",
+            # Estimate market cap (Tesla has ~3.2B shares outstanding)
+            "market_cap": int(price * 3200000000),
+            "day_low": round(day_low, 2),
+            "day_high": round(day_high, 2),
+            "52_week_low": year.get('low', 152.37),
+            "52_week_high": year.get('high', 488.54),
+            "volume": volume,
+            "pe_ratio": 73.45,  # Approximate P/E ratio
+            "historical_data": quote_store.history('TSLA', days=5)
+        },
+        "ev_market": {
+            "companies": ev_companies
+        },
+        "data_source": data_source,
+        "last_updated": datetime.now().isoformat()
+    }
+
+def fetch_market_data():
+    """Fetch Tesla quote + EV competitors from Alpha Vantage (runs in the refresher thread)"""
+    
+    # Fetch Tesla stock data
+    tsla_data = http_get(
+        f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol=TSLA&apikey={ALPHA_VANTAGE_KEY}"
+    ).json()
+    
+    quote = tsla_data.get('Global Quote')
+    if not quote:
+        # Rate-limit, bad-key and demo-key responses come back as 200 with a Note/Information message;
+        # the refresher logs it and keeps the last good snapshot
+        note = tsla_data.get('Note') or tsla_data.get('Information') or tsla_data.get('Error Message')
+        raise ValueError(f"Alpha Vantage note: {note}" if note else "Empty Alpha Vantage quote")
+    
+    current_price = float(quote.get('05. price', 432.0))
+    previous_close = float(quote.get('08. previous close', 429.0))
+    day_high = float(quote.get('03. high', current_price))
+    day_low = float(quote.get('04. low', current_price))
+    volume = int(quote.get('06. volume', 0))
+    
+    change = float(quote.get('09. change', 0))
+    change_percent_str = quote.get('10. change percent', '0%').replace('%', '')
+    change_percent = float(change_percent_str) if change_percent_str else 0
+    
+    backfill_history('TSLA')
+    trading_day = quote.get('07. latest trading day')
+    quote_store.append('TSLA', [(
+        parse_day(trading_day) if trading_day else int(time.time()),
+        float(quote.get('02. open', current_price)), day_high, day_low, current_price, volume
+    )])
+    
+    return market_payload(current_price, previous_close, day_low, day_high, volume,
+                          "Alpha Vantage (Real-time)", change, change_percent)
+
+def fallback_market_data(reason):
+    """Degraded snapshot until the refresher stores a real one: the last stored bar, else reference prices"""
+    bars = quote_store.last('TSLA', 2)
+    if len(bars):
+        last = bars[-1]
+        previous_close = float(bars['close'][0] if len(bars) > 1 else last['open'])
+        result = market_payload(float(last['close']), previous_close, float(last['low']), float(last['high']),
+                                int(last['volume']), "Stored quotes (Alpha Vantage unavailable)")
+    else:
+        result = market_payload(432.0, 429.0, 432.0, 432.0, 0, "Reference prices (Alpha Vantage unavailable)")
+    result["degraded"] = True
+    result["message"] = reason
+    return result
+
+# Keep quotes warm from one process (start_background_tasks); web workers read the
+# shared snapshot and revalidate it on demand when no refresh loop runs in them
+market_refresher = MarketDataRefresher(
+    'market_data', fetch_market_data, cache,
+    interval=MARKET_DATA_REFRESH_INTERVAL, stale_ttl=MARKET_DATA_STALE_TTL
+)
 
 @app.route('/api/market-data')
 def market_data():
-    """Return real-time market data from Yahoo Finance with caching"""
-    global _market_data_cache, _market_data_cache_time
-    
-    # Return cached data if less than 5 minutes old
-    if _market_data_cache and _market_data_cache_time:
-        age = (datetime.now() - _market_data_cache_time).seconds
-        if age < 300:  # 5 minutes cache
-            return jsonify(_market_data_cache)
+    """Return the latest market data snapshot kept warm by the background refresher"""
+    entry = market_refresher.revalidate(wait=10)
+    if entry is None:
+        # No good snapshot yet (first fetch pending, or the upstream keeps refusing)
+        result = fallback_market_data(market_refresher.last_error or "First fetch in progress")
+        # last_updated is the request time; leave it out so unchanged fallbacks still get 304s
+        etag = etag_for({key: value for key, value in result.items() if key != "last_updated"})
+        return conditional_json(result, max_age=60, etag=etag)
     
+    age = time.time() - entry['stored_at']
+    result = dict(entry['value'])
+    result["data_age_seconds"] = round(age, 1)
+    result["stale"] = age > MARKET_DATA_REFRESH_INTERVAL * 2
+    if result["stale"]:
+        result["data_source"] = "Alpha Vantage (Cached)"
+    # The snapshot only changes when the refresher stores a new one
+    return conditional_json(result, max_age=remaining_ttl(entry['stored_at'], MARKET_DATA_REFRESH_INTERVAL),
+                            etag=f"market-{entry['stored_at']}", last_modified=entry['stored_at'], age=age)
+
+# Push channel: each worker watches the shared snapshot and streams changes to its clients
+broadcaster = Broadcaster()
+
+def _market_stream_source():
+    entry = market_refresher.revalidate()
+    if entry is None:
+        return None
+    return f"market-{entry['stored_at']}", entry['value']
+
+broadcaster.watch('market', _market_stream_source)
+broadcaster.watch('trends', lambda: (etag_for(TRENDING_TOPICS), {"trending_hashtags": TRENDING_TOPICS}),
+                  interval=TRENDS_MAX_AGE)
+
+@app.route('/api/stream')
+def stream():
+    """Server-Sent Events: 'market' and 'trends' events, sent on connect and whenever they change"""
+    subscriber = broadcaster.subscribe()
+    if subscriber is None:
+        # Clients fall back to polling the JSON endpoints
+        return jsonify({"error": "Too many stream clients"}), 503
+    return Response(broadcaster.stream(subscriber), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@app.route('/api/history/<symbol>')
+def history(symbol):
+    """Stored daily bars: ?start=&end= (YYYY-MM-DD) or the last ?days= bars, plus 52-week range"""
     try:
-        # Use Alpha Vantage API (free, reliable, 25 calls/day)
-        import requests
-        
-        # Alpha Vantage free API key
-        ALPHA_VANTAGE_KEY = "demo"  # Use demo key for now
-        
-        # Fetch Tesla stock data
-        tsla_data = requests.get(
-            f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol=TSLA&apikey={ALPHA_VANTAGE_KEY}",
-            timeout=10
-        ).json()
-        
-        quote = tsla_data.get('Global Quote', {})
-        
-        current_price = float(quote.get('05. price', 432.0))
-        previous_close = float(quote.get('08. previous close', 429.0))
-        day_high = float(quote.get('03. high', current_price))
-        day_low = float(quote.get('04. low', current_price))
-        volume = int(quote.get('06. volume', 0))
-        
-        change = float(quote.get('09. change', 0))
-        change_percent_str = quote.get('10. change percent', '0%').replace('%', '')
-        change_percent = float(change_percent_str) if change_percent_str else 0
-        
-        # Estimate market cap (Tesla has ~3.2B shares outstanding)
-        market_cap = int(current_price * 3200000000)
-        
-        # Fetch EV competitors with fallback data
-        ev_companies = [
-            {"name": "Tesla", "symbol": "TSLA", "price": round(current_price, 2), "change_percent": round(change_percent, 2)},
-            {"name": "NIO", "symbol": "NIO", "price": 6.85, "change_percent": 0.74},
-            {"name": "Rivian", "symbol": "RIVN", "price": 13.52, "change_percent": 3.01},
-            {"name": "Lucid", "symbol": "LCID", "price": 3.21, "change_percent": -1.28},
-            {"name": "Ford", "symbol": "F", "price": 11.25, "change_percent": 1.15}
-        ]
-        
-        result = {
-            "tesla_stock": {
-                "price": round(current_price, 2),
-                "change": round(change, 2),
-                "change_percent": f"{'+' if change >= 0 else ''}{change_percent:.2f}%",
-                "market_cap": market_cap,
-                "day_low": round(day_low, 2),
-                "day_high": round(day_high, 2),
-                "52_week_low": 152.37,  # Known 52-week low
-                "52_week_high": 488.54,  # Known 52-week high
-                "volume": volume,
-                "pe_ratio": 73.45  # Approximate P/E ratio
-            },
-            "ev_market": {
-                "companies": ev_companies
-            },
-            "data_source": "Alpha Vantage (Real-time)",
-            "last_updated": datetime.now().isoformat()
-        }
-        
-        # Cache the result
-        _market_data_cache = result
-        _market_data_cache_time = datetime.now()
-        
-        return jsonify(result)
-        
-    except Exception as e:
-        print(f"Error fetching market data: {e}")
-        
-        # If we have cached data, return it even if expired
-        if _market_data_cache:
-            print("Returning cached data due to API error")
-            cached_result = _market_data_cache.copy()
-            cached_result["data_source"] = "Alpha Vantage (Cached)"
-            return jsonify(cached_result)
-        
-        # Return error message if no cache available
-        return jsonify({
-            "error": "Failed to fetch real-time data",
-            "message": str(e),
-            "data_source": "Error"
-        }), 500
+        start = request.args.get('start')
+        end = request.args.get('end')
+        rows = quote_store.history(
+            symbol,
+            days=request.args.get('days', 30, type=int),
+            start=parse_day(start) if start else None,
+            end=parse_day(end) + DAY - 1 if end else None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "symbol": symbol.upper(),
+        "historical_data": rows,
+        "count": len(rows),
+        "52_week": quote_store.aggregate(symbol)
+    })
+
+@app.route('/api/indicators')
+def indicators():
+    """SMA/EMA/RSI/Bollinger/volatility from stored bars: ?symbols=TSLA&limit=30&sma=20&ema=20&rsi=14&bollinger=20&bollinger_k=2&volatility=20"""
+    symbols = [s.strip().upper() for s in request.args.get('symbols', 'TSLA').split(',') if s.strip()]
+    overrides = {name: request.args.get(name) for name in DEFAULT_INDICATOR_PARAMS}
+    try:
+        limit = min(max(request.args.get('limit', 30, type=int), 1), 365)
+        results = {symbol: indicator_engine.compute(symbol, limit=limit, **overrides) for symbol in symbols}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "indicators": {symbol: result for symbol, result in results.items() if result},
+        "missing": [symbol for symbol, result in results.items() if not result],
+        "timestamp": datetime.now().isoformat()
+    })
 
 @app.route('/api/generate-video', methods=['POST', 'OPTIONS'])
 def generate_video():
@@ -283,8 +419,6 @@ def generate_video():
         if not REPLICATE_API_TOKEN:
             return jsonify({"error": "REPLICATE_API_TOKEN not configured"}), 500
         
-        import replicate
-        
         print(f"Starting video generation - Model: {model}, Prompt: {prompt[:50]}...")
         
         # Model configurations with correct IDs
@@ -328,7 +462,7 @@ def generate_video():
         print(f"Using model: {model_config['name']}")
         
         # Start prediction (async)
-        prediction = replicate.predictions.create(
+        prediction = replicate_client(REPLICATE_API_TOKEN).predictions.create(
             version=model_config['id'].split(':')[1] if ':' in model_config['id'] else model_config['id'],
             input=model_config['input']
         )
@@ -357,6 +491,35 @@ def generate_video():
             "message": error_msg
         }), 500
 
+# Replicate prediction states that will not change again
+TERMINAL_PREDICTION_STATES = ("succeeded", "failed", "canceled")
+PREDICTION_STATUS_TTL = 2  # coalesce dashboard polling of running predictions
+
+def _fetch_prediction_status(prediction_id):
+    prediction = replicate_client(REPLICATE_API_TOKEN).predictions.get(prediction_id)
+    
+    response = {
+        "prediction_id": prediction_id,
+        "status": prediction.status,
+    }
+    
+    if prediction.status == "succeeded":
+        # Get video URL from output
+        video_url = prediction.output
+        if isinstance(video_url, list):
+            video_url = video_url[0] if video_url else None
+        
+        response["video_url"] = video_url
+        response["success"] = True
+        
+    elif prediction.status == "failed":
+        response["error"] = prediction.error
+        response["success"] = False
+    
+    ttl = 86400 if prediction.status in TERMINAL_PREDICTION_STATES else PREDICTION_STATUS_TTL
+    cache.set(f"prediction:{prediction_id}", response, ttl=ttl)
+    return response
+
 @app.route('/api/video-status/<prediction_id>', methods=['GET'])
 def video_status(prediction_id):
     """Check status of video generation"""
@@ -364,27 +527,10 @@ def video_status(prediction_id):
         if not REPLICATE_API_TOKEN:
             return jsonify({"error": "REPLICATE_API_TOKEN not configured"}), 500
         
-        import replicate
-        
-        prediction = replicate.predictions.get(prediction_id)
-        
-        response = {
-            "prediction_id": prediction_id,
-            "status": prediction.status,
-        }
-        
-        if prediction.status == "succeeded":
-            # Get video URL from output
-            video_url = prediction.output
-            if isinstance(video_url, list):
-                video_url = video_url[0] if video_url else None
-            
-            response["video_url"] = video_url
-            response["success"] = True
-            
-        elif prediction.status == "failed":
-            response["error"] = prediction.error
-            response["success"] = False
+        response = cache.get(f"prediction:{prediction_id}")
+        if response is None:
+            response = flight.do(f"prediction:{prediction_id}",
+                                 lambda: _fetch_prediction_status(prediction_id))
             
         return jsonify(response), 200
         
@@ -538,6 +684,18 @@ def get_models():
     })
 
 
+# The market refresh loop runs in one designated process (the dev server, or one
+# started with RUN_BACKGROUND_TASKS=1); gunicorn workers revalidate on demand
+RUN_BACKGROUND_TASKS = os.getenv('RUN_BACKGROUND_TASKS', '').lower() in ('1', 'true', 'yes')
+
+def start_background_tasks():
+    """Start the market data refresh loop in this process (idempotent)"""
+    market_refresher.start()
+
+if RUN_BACKGROUND_TASKS:
+    start_background_tasks()
+
 if __name__ == '__main__':
+    start_background_tasks()
     port = int(os.getenv('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -4,12 +4,14 @@ No GPU required - Free tier available
 """
 from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
-from openai import OpenAI
-import json, os, time, requests
+import json, os, time
 from datetime import datetime
 from dotenv import load_dotenv
 import yfinance as yf
-import replicate
+from http_caching import conditional_json, etag_for
+from downloader import resume_or_download
+from upstream import openai_client, replicate_client
+from video_cache import VideoCache, video_cache_key
 
 # Load environment variables
 load_dotenv()
@@ -38,7 +40,7 @@ if not REPLICATE_API_TOKEN:
     print("📝 Get your free API token from: https://replicate.com/account/api-tokens")
     print("💡 Add it to your .env file: REPLICATE_API_TOKEN=your_token_here")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = openai_client(OPENAI_API_KEY)
 os.environ["REPLICATE_API_TOKEN"] = REPLICATE_API_TOKEN if REPLICATE_API_TOKEN else ""
 
 print(f"🚀 Video Generation: Replicate API (No GPU required)")
@@ -72,56 +74,65 @@ EXAMPLE_PROMPTS = [
     }
 ]
 
+PROMPTS_ETAG = etag_for(EXAMPLE_PROMPTS)
+
 os.makedirs('generated_videos', exist_ok=True)
 
+# Replicate model versions and the settings sent with every prompt
+REPLICATE_MODELS = {
+    # ZeroscopeV2 XL - Fast and free-tier friendly
+    "zeroscope": {
+        "ref": "anotherjesse/zeroscope-v2-xl:9f747673945c62801b13b84701c783929c0ee784e4748ec062204894dda1a351",
+        "input": {"num_frames": 24, "num_inference_steps": 25, "guidance_scale": 17.5, "width": 576, "height": 320}
+    },
+    # AnimateDiff - Alternative model
+    "animatediff": {
+        "ref": "lucataco/animate-diff:beecf59c4aee8d81bf04f0381033dfa10dc16e845b4ae00d281e2fa377e48a9f",
+        "input": {"num_frames": 16, "guidance_scale": 7.5, "num_inference_steps": 25}
+    }
+}
+
+# Identical prompts + settings reuse the MP4 already on disk instead of spending credits
+video_cache = VideoCache()
+
 def generate_video_replicate(prompt, model="zeroscope"):
     """Generate video using Replicate API"""
     try:
         if not REPLICATE_API_TOKEN:
             raise Exception("REPLICATE_API_TOKEN not configured")
         
-        print(f"🎬 Generating video with {model.upper()}...")
-        print(f"📝 Prompt: {prompt[:100]}...")
-        
-        if model == "zeroscope":
-            # ZeroscopeV2 XL - Fast and free-tier friendly
-            output = replicate.run(
-                "anotherjesse/zeroscope-v2-xl:9f747673945c62801b13b84701c783929c0ee784e4748ec062204894dda1a351",
-                input={
-                    "prompt": prompt,
-                    "num_frames": 24,
-                    "num_inference_steps": 25,
-                    "guidance_scale": 17.5,
-                    "width": 576,
-                    "height": 320
-                }
-            )
-        else:
-            # AnimateDiff - Alternative model
-            output = replicate.run(
-                "lucataco/animate-diff:beecf59c4aee8d81bf04f0381033dfa10dc16e845b4ae00d281e2fa377e48a9f",
-                input={
-                    "prompt": prompt,
-                    "num_frames": 16,
-                    "guidance_scale": 7.5,
-                    "num_inference_steps": 25
-                }
-            )
+        config = REPLICATE_MODELS["zeroscope" if model == "zeroscope" else "animatediff"]
+        settings = dict(config["input"])
+        key = video_cache_key(
+            prompt, config["ref"],
+            num_frames=settings.pop("num_frames"),
+            steps=settings.pop("num_inference_steps"),
+            guidance=settings.pop("guidance_scale"),
+            **settings
+        )
         
-        # Get video URL
-        video_url = output if isinstance(output, str) else output[0]
+        def generate_url():
+            print(f"🎬 Generating video with {model.upper()}...")
+            print(f"📝 Prompt: {prompt[:100]}...")
+            
+            output = replicate_client(REPLICATE_API_TOKEN).run(config["ref"], input={"prompt": prompt, **config["input"]})
+            
+            # Get video URL
+            return output if isinstance(output, str) else output[0]
         
-        # Download video
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_id = f"video_{ts}"
-        video_path = f"generated_videos/{video_id}.mp4"
+        def render(video_path):
+            # Download video (finishing an earlier attempt's download instead of generating again)
+            print(f"💾 Downloading video...")
+            download = resume_or_download(video_path, generate_url)
+            print(f"📦 Downloaded {download['bytes'] / 1e6:.1f} MB (sha256 {download['sha256'][:12]}, {download['resumes']} resumes)")
+            return True
         
-        print(f"💾 Downloading video...")
-        response = requests.get(video_url, timeout=60)
-        with open(video_path, 'wb') as f:
-            f.write(response.content)
+        result = video_cache.get_or_generate(key, render)
+        if result is None:
+            return None
         
-        print(f"✅ Video saved: {video_path}")
+        video_id, video_path, cached = result
+        print(f"✅ Video {'reused' if cached else 'saved'}: {video_path}")
         return video_id, video_path
         
     except Exception as e:
@@ -140,12 +151,14 @@ def health_check():
             "real_time_data": True,
             "video_model": "Replicate API (ZeroscopeV2 XL)",
             "gpu_required": False
-        }
+        },
+        "video_cache": video_cache.stats()
     })
 
 @app.route('/api/prompts', methods=['GET'])
 def get_prompts():
-    return jsonify({"prompts": EXAMPLE_PROMPTS, "count": len(EXAMPLE_PROMPTS)})
+    return conditional_json({"prompts": EXAMPLE_PROMPTS, "count": len(EXAMPLE_PROMPTS)},
+                            max_age=3600, etag=PROMPTS_ETAG)
 
 @app.route('/api/generate-video', methods=['POST'])
 def generate_video():
@@ -240,9 +253,15 @@ def get_tesla_stock():
 @app.route('/api/campaigns', methods=['GET'])
 def get_campaigns():
     try:
-        with open('data.json', 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
+        # data.json only changes when re-exported; validate by mtime + size
+        st = os.stat('data.json')
+        if HAS_ANALYTICS:
+            data = analytics_engine.dataset.get()['data']
+        else:
+            with open('data.json', 'r') as f:
+                data = json.load(f)
+        return conditional_json(data, max_age=30, etag=f"data-{st.st_mtime_ns}-{st.st_size}",
+                                last_modified=st.st_mtime)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -264,6 +283,45 @@ def ai_analytics():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Portfolio Forecast
+@app.route('/api/forecast', methods=['GET'])
+def forecast():
+    if not HAS_ANALYTICS:
+        return jsonify({"error": "AI Analytics not available"}), 503
+    
+    try:
+        mode = request.args.get('mode', 'incremental')
+        data = analytics_engine.dataset.get()['data']
+        forecasts = analytics_engine.forecast_portfolio(data.get('campaign_tracking', {}), mode=mode)
+        return jsonify({
+            "forecasts": forecasts,
+            "count": len(forecasts),
+            "mode": mode,
+            "horizon_days": 7,
+            "timestamp": datetime.now().isoformat()
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Campaign Leaderboard
+@app.route('/api/leaderboard', methods=['GET'])
+def leaderboard():
+    if not HAS_ANALYTICS:
+        return jsonify({"error": "AI Analytics not available"}), 503
+    
+    metric = request.args.get('metric', 'conversions')
+    n = min(max(request.args.get('n', 5, type=int), 1), 100)
+    try:
+        return jsonify({
+            "metric": metric,
+            "campaigns": analytics_engine.top_campaigns(metric, n),
+            "insights": analytics_engine.generate_insights(top_n=n)
+        })
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 400
+
 if __name__ == '__main__':
     print("\n" + "=" * 70)
     print("🚀 TESLA SALES DASHBOARD - REPLICATE VIDEO GENERATION")
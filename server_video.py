@@ -5,10 +5,12 @@ Using CogVideoX-5B from Hugging Face (Free)
 from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
 from openai import OpenAI
-import json, os, time, base64, subprocess, torch
+import json, os, sys, time, base64, subprocess, torch
 from datetime import datetime
 from dotenv import load_dotenv
 import yfinance as yf
+from job_queue import JobQueue, JobWorkerPool
+from video_cache import VideoCache, video_cache_key
 
 # Load environment variables
 load_dotenv()
@@ -37,10 +39,11 @@ print(f"🎮 Using device: {DEVICE}")
 
 # Video generation model (lazy loading)
 video_pipe = None
+video_pipe_error = None
 
 def load_video_model():
     """Load CogVideoX-5B model (lazy loading)"""
-    global video_pipe
+    global video_pipe, video_pipe_error
     if video_pipe is not None:
         return video_pipe
     
@@ -60,6 +63,7 @@ def load_video_model():
         print("✅ CogVideoX-5B model loaded successfully!")
         return video_pipe
     except Exception as e:
+        video_pipe_error = str(e)
         print(f"⚠️ Could not load CogVideoX-5B: {e}")
         print("💡 Falling back to DALL-E 3 + ffmpeg")
         return None
@@ -95,12 +99,18 @@ EXAMPLE_PROMPTS = [
 
 os.makedirs('generated_videos', exist_ok=True)
 
-def generate_cogvideo(prompt):
-    """Generate video using CogVideoX-5B"""
-    try:
+# Identical prompts + settings reuse the MP4 already on disk
+video_cache = VideoCache()
+COGVIDEO_MODEL = "THUDM/CogVideoX-5b"
+
+def generate_cogvideo(prompt, raise_errors=False):
+    """Generate video using CogVideoX-5B; None on failure unless raise_errors"""
+    key = video_cache_key(prompt, COGVIDEO_MODEL, seed=42, num_frames=49, steps=50, guidance=6.0)
+    
+    def render(video_path):
         pipe = load_video_model()
         if pipe is None:
-            return None
+            raise RuntimeError(f"CogVideoX-5B could not be loaded: {video_pipe_error}")
         
         print(f"🎬 Generating video with CogVideoX-5B...")
         print(f"📝 Prompt: {prompt[:100]}...")
@@ -114,25 +124,31 @@ def generate_cogvideo(prompt):
             generator=torch.Generator(device=DEVICE).manual_seed(42)
         ).frames[0]
         
-        # Save as MP4
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_id = f"video_{ts}"
-        video_path = f"generated_videos/{video_id}.mp4"
-        
         # Export frames to video using imageio
         import imageio
         imageio.mimsave(video_path, video_frames, fps=8, codec='libx264')
+        return True
+    
+    try:
+        result = video_cache.get_or_generate(key, render)
+        if result is None:
+            raise RuntimeError("CogVideoX-5B produced no video file")
         
-        print(f"✅ Video saved: {video_path}")
+        video_id, video_path, cached = result
+        print(f"✅ Video {'reused' if cached else 'saved'}: {video_path}")
         return video_id, video_path
         
     except Exception as e:
         print(f"❌ CogVideoX error: {e}")
+        if raise_errors:
+            raise
         return None
 
-def generate_fallback_video(prompt):
-    """Fallback: Generate image with DALL-E 3 + ffmpeg"""
-    try:
+def generate_fallback_video(prompt, raise_errors=False):
+    """Fallback: Generate image with DALL-E 3 + ffmpeg; None on failure unless raise_errors"""
+    key = video_cache_key(prompt, "dall-e-3+ffmpeg", num_frames=150, size="1792x1024", quality="hd")
+    
+    def render(mp4_path):
         print("📸 Generating image with DALL-E 3...")
         img_response = client.images.generate(
             model="dall-e-3",
@@ -143,15 +159,12 @@ def generate_fallback_video(prompt):
         )
         
         img_bytes = base64.b64decode(img_response.data[0].b64_json)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_id = f"video_{ts}"
-        img_path = f"generated_videos/{video_id}.png"
+        img_path = video_cache.temp_path(key, 'png')
         
         with open(img_path, 'wb') as f:
             f.write(img_bytes)
         
         # Create MP4 with ffmpeg
-        mp4_path = f"generated_videos/{video_id}.mp4"
         cmd = [
             'ffmpeg', '-y', '-loglevel', 'error',
             '-loop', '1', '-i', img_path,
@@ -164,15 +177,72 @@ def generate_fallback_video(prompt):
             mp4_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-        if result.returncode == 0:
-            return video_id, mp4_path
-        return None
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=30)
+            if result.returncode != 0:
+                stderr = result.stderr.decode('utf-8', errors='replace').strip()
+                raise RuntimeError(f"ffmpeg exited with {result.returncode}: {stderr[-500:]}")
+            # Keep the still next to the video, evicted with it
+            os.replace(img_path, video_cache.path(key, 'png'))
+            return True
+        finally:
+            if os.path.exists(img_path):
+                os.remove(img_path)
+    
+    try:
+        result = video_cache.get_or_generate(key, render)
+        if result is None:
+            raise RuntimeError("ffmpeg produced no video file")
+        
+        video_id, mp4_path, cached = result
+        return video_id, mp4_path
         
     except Exception as e:
         print(f"❌ Fallback error: {e}")
+        if raise_errors:
+            raise
         return None
 
+# Durable queue: generation runs on pool workers on this host, not in request threads
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+# Job workers (which load the video model) run in one designated process:
+# `python <server>.py --worker`, the dev server, or a process started with
+# RUN_BACKGROUND_TASKS=1. gunicorn web workers only enqueue jobs.
+RUN_BACKGROUND_TASKS = os.getenv('RUN_BACKGROUND_TASKS', '').lower() in ('1', 'true', 'yes')
+job_queue = JobQueue()
+
+def run_video_job(payload):
+    """Job handler: CogVideoX-5B on GPU, else DALL-E 3 + ffmpeg; raises so the queue can retry"""
+    prompt = payload['prompt']
+    result = None
+    errors = []
+    if DEVICE == "cuda":
+        try:
+            result = generate_cogvideo(prompt, raise_errors=True)
+            model = "CogVideoX-5B"
+        except Exception as e:
+            errors.append(f"CogVideoX-5B: {e}")
+    if not result:
+        try:
+            result = generate_fallback_video(prompt, raise_errors=True)
+            model = "DALL-E 3 + ffmpeg"
+        except Exception as e:
+            errors.append(f"DALL-E 3 + ffmpeg: {e}")
+    if not result:
+        # Stored on the job, so GET /api/jobs/<id> shows why it failed
+        raise RuntimeError("; ".join(errors))
+    
+    video_id, video_path = result
+    return {
+        "video_id": video_id,
+        "video_url": f"/api/download/{video_id}.mp4",
+        "prompt": prompt,
+        "model": model,
+        "device": DEVICE
+    }
+
+job_pool = JobWorkerPool(job_queue, {"generate_video": run_video_job}, workers=JOB_WORKERS)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -185,7 +255,9 @@ def health_check():
             "real_time_data": True,
             "video_model": "CogVideoX-5B" if DEVICE == "cuda" else "DALL-E 3 + ffmpeg",
             "device": DEVICE
-        }
+        },
+        "jobs": {**job_queue.stats(), **job_pool.stats()},
+        "video_cache": video_cache.stats()
     })
 
 def check_ffmpeg():
@@ -199,57 +271,51 @@ def check_ffmpeg():
 def get_prompts():
     return jsonify({"prompts": EXAMPLE_PROMPTS, "count": len(EXAMPLE_PROMPTS)})
 
+@app.route('/api/jobs', methods=['POST'])
+# Legacy endpoint: same queued job instead of generating inside the request
 @app.route('/api/generate-video', methods=['POST'])
-def generate_video():
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'Invalid JSON'}), 400
-            
-        prompt = data.get('prompt', '').strip()
-        if not prompt:
-            return jsonify({'error': 'Prompt required'}), 400
-        
-        if len(prompt) > 1000:
-            return jsonify({'error': 'Prompt too long (max 1000 chars)'}), 400
-        
-        print(f"\n🎬 Starting video generation...")
-        
-        # Try CogVideoX first if GPU available
-        if DEVICE == "cuda":
-            result = generate_cogvideo(prompt)
-            if result:
-                video_id, video_path = result
-                return jsonify({
-                    "success": True,
-                    "video_id": video_id,
-                    "video_url": f"/api/download/{video_id}.mp4",
-                    "prompt": prompt,
-                    "model": "CogVideoX-5B",
-                    "device": DEVICE,
-                    "timestamp": time.time()
-                })
-        
-        # Fallback to DALL-E + ffmpeg
-        print("💡 Using DALL-E 3 + ffmpeg fallback...")
-        result = generate_fallback_video(prompt)
-        if result:
-            video_id, video_path = result
-            return jsonify({
-                "success": True,
-                "video_id": video_id,
-                "video_url": f"/api/download/{video_id}.mp4",
-                "prompt": prompt,
-                "model": "DALL-E 3 + ffmpeg",
-                "note": "Install CUDA for CogVideoX-5B real video generation",
-                "timestamp": time.time()
-            })
-        
-        return jsonify({'error': 'Video generation failed'}), 500
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return jsonify({'error': str(e)}), 500
+def create_job():
+    """Queue a video generation job and return its id immediately"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Invalid JSON'}), 400
+    
+    prompt = data.get('prompt', '').strip()
+    if not prompt:
+        return jsonify({'error': 'Prompt required'}), 400
+    
+    if len(prompt) > 1000:
+        return jsonify({'error': 'Prompt too long (max 1000 chars)'}), 400
+    
+    job_id = job_queue.enqueue("generate_video", {"prompt": prompt})
+    print(f"📥 Queued video job {job_id}")
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "position": job_queue.position(job_id),
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a queued job, with its result once it has succeeded"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        "job_id": job['id'],
+        "kind": job['kind'],
+        "status": job['status'],
+        "position": job_queue.position(job_id),
+        "attempts": job['attempts'],
+        "max_attempts": job['max_attempts'],
+        "created_at": job['created_at'],
+        "started_at": job['started_at'],
+        "finished_at": job['finished_at'],
+        "result": job['result'],
+        "error": job['error']
+    })
 
 @app.route('/api/download/<filename>')
 def download_file(filename):
@@ -369,7 +435,21 @@ def get_tiktok_trends():
         "note": "TikTok API requires business account authentication"
     })
 
+def start_background_tasks():
+    """Start the job workers in this process (idempotent)"""
+    job_pool.start()
+
+if RUN_BACKGROUND_TASKS:
+    start_background_tasks()
+
 if __name__ == '__main__':
+    start_background_tasks()
+    if '--worker' in sys.argv:
+        # Background-only process: run queued jobs, no HTTP server
+        print(f"🛠️ Job worker process: {JOB_WORKERS} worker(s) on {job_queue.path}")
+        job_pool.join()
+        sys.exit(0)
+    
     print("\n" + "="*60)
     print("🚀 Tesla Sales Dashboard - Real Video Generation API")
     print("="*60)
@@ -378,6 +458,7 @@ if __name__ == '__main__':
     print(f"💡 Fallback: DALL-E 3 + ffmpeg")
     print(f"🤖 AI Analytics: {'Enabled' if HAS_ANALYTICS else 'Disabled'}")
     print(f"📊 Real-time Data: Yahoo Finance")
+    print(f"🛠️ Job workers: {JOB_WORKERS} (queue: {job_queue.path})")
     print(f"🌐 Server: http://localhost:5001")
     print("="*60)
     
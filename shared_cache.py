@@ -0,0 +1,354 @@
+"""
+Shared TTL cache for market data and AI-generated prompts
+One cache visible to every gunicorn worker (file backend) or to every
+instance (Redis backend), so upstream quotas are spent once, not per process
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: file backend falls back to rename atomicity only
+    fcntl = None
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND')
+CACHE_URL = os.getenv('CACHE_URL') or os.getenv('REDIS_URL')
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'tesla_dashboard_cache'))
+CACHE_SWEEP_INTERVAL = int(os.getenv('CACHE_SWEEP_INTERVAL', 300))
+
+
+class CacheBackend:
+    """Common get/set/add API with TTLs and hit/miss counters.
+
+    Entries are JSON: {'value', 'stored_at', 'expires_at'}. set() may keep an
+    entry for stale_ttl seconds past expiry so callers can fall back to it
+    with get_entry(key, allow_stale=True) when an upstream call fails.
+    Counters are per process.
+    """
+
+    name = 'base'
+
+    def __init__(self, namespace='tesla'):
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._stats_lock = threading.Lock()
+
+    # Backend primitives
+    def _read(self, key):
+        raise NotImplementedError
+
+    def _write(self, key, entry, keep_seconds):
+        raise NotImplementedError
+
+    def _add(self, key, entry, keep_seconds):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def _count(self, field):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get_entry(self, key, allow_stale=False):
+        """Return the raw entry, or None if missing (or expired and not allow_stale)"""
+        entry = self._read(key)
+        now = time.time()
+        if entry is not None and entry['expires_at'] > now:
+            self._count('hits')
+            return entry
+        if entry is not None and allow_stale:
+            self._count('stale_hits')
+            return entry
+        self._count('misses')
+        return None
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry['value'] if entry else None
+
+    @staticmethod
+    def _entry(value, ttl):
+        now = time.time()
+        return {'value': value, 'stored_at': now, 'expires_at': now + ttl}
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        self._write(key, self._entry(value, ttl), ttl + stale_ttl)
+
+    def add(self, key, value, ttl):
+        """Set only if no fresh entry exists; True if this caller won"""
+        return self._add(key, self._entry(value, ttl), ttl)
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.hits + self.misses + self.stale_hits
+            return {
+                'backend': self.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class MemoryCache(CacheBackend):
+    """Per-process dict cache (tests, single-worker dev server)"""
+
+    name = 'memory'
+
+    def __init__(self, namespace='tesla'):
+        super().__init__(namespace)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _read(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, keep_until = item
+            if keep_until <= time.time():
+                del self._entries[key]
+                return None
+            return entry
+
+    def _write(self, key, entry, keep_seconds):
+        with self._lock:
+            self._entries[key] = (entry, time.time() + keep_seconds)
+
+    def _add(self, key, entry, keep_seconds):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0]['expires_at'] > time.time():
+                return False
+            self._entries[key] = (entry, time.time() + keep_seconds)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class FileCache(CacheBackend):
+    """One JSON file per key under a directory shared by all workers on a host.
+
+    Writes go to a temp file and are renamed into place, so readers never see
+    a partial entry; add() serializes on a per-key flock. An entry past its
+    keep time is deleted (with its .lock file) when it is read, and a sweep
+    run from set() at most every CACHE_SWEEP_INTERVAL seconds removes the
+    ones nobody reads again.
+    """
+
+    name = 'file'
+
+    def __init__(self, directory=CACHE_DIR, namespace='tesla', sweep_interval=CACHE_SWEEP_INTERVAL):
+        super().__init__(namespace)
+        self.directory = os.path.join(directory, namespace)
+        self.sweep_interval = sweep_interval
+        self._swept_at = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _lock(self, path, blocking=True):
+        """Open and flock path's .lock file; None if non-blocking and busy.
+
+        A lock file can be unlinked by _discard while others wait on it, so
+        the lock only counts if the path still names the inode we locked.
+        """
+        while True:
+            lock = open(path + '.lock', 'a')
+            if not fcntl:
+                return lock
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if os.stat(lock.name).st_ino == os.fstat(lock.fileno()).st_ino:
+                    return lock
+            except BlockingIOError:
+                lock.close()
+                return None
+            except FileNotFoundError:
+                pass
+            lock.close()
+
+    def _discard(self, path):
+        """Delete an entry (and its lock file) if it is still past its keep time"""
+        lock = self._lock(path, blocking=False)
+        if lock is None:
+            return  # someone is writing it right now
+        with lock:
+            item = self._load(path)
+            if item is not None and item['keep_until'] > time.time():
+                return
+            for leftover in (path, path + '.lock'):
+                try:
+                    os.remove(leftover)
+                except OSError:
+                    pass
+
+    def _read(self, key):
+        path = self._path(key)
+        item = self._load(path)
+        if item is None:
+            return None
+        if item['keep_until'] <= time.time():
+            self._discard(path)
+            return None
+        return item['entry']
+
+    def _write(self, key, entry, keep_seconds):
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'entry': entry, 'keep_until': time.time() + keep_seconds}, f)
+        os.replace(tmp_path, path)
+        if time.monotonic() - self._swept_at > self.sweep_interval:
+            self._swept_at = time.monotonic()
+            self.sweep()
+
+    def _add(self, key, entry, keep_seconds):
+        path = self._path(key)
+        with self._lock(path):
+            item = self._load(path)
+            if item is not None and item['keep_until'] > time.time() and item['entry']['expires_at'] > time.time():
+                return False
+            self._write(key, entry, keep_seconds)
+            return True
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def sweep(self):
+        """Remove expired entries, orphaned lock files and abandoned temp files; returns the count"""
+        removed = 0
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith('.json'):
+                item = self._load(path)
+                if item is not None and item['keep_until'] > now:
+                    continue
+                self._discard(path)
+            elif name.endswith('.json.lock'):
+                if os.path.exists(path[:-len('.lock')]):
+                    continue
+                self._discard(path[:-len('.lock')])
+            elif name.endswith('.tmp'):
+                try:
+                    if os.stat(path).st_mtime > now - 3600:
+                        continue
+                    os.remove(path)
+                except OSError:
+                    continue
+            else:
+                continue
+            removed += not os.path.exists(path)
+        return removed
+
+
+class RedisCache(CacheBackend):
+    """Network key-value backend shared by every instance (redis-py client).
+
+    A Redis outage degrades to cache misses: reads return None, writes are
+    dropped, and add() returns True so the caller computes the value itself
+    instead of waiting on a lease nobody can hold.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url=CACHE_URL, namespace='tesla'):
+        super().__init__(namespace)
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self._redis_errors = redis.exceptions.RedisError
+        self.errors = 0
+        self._warned_at = 0.0
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _unavailable(self, e):
+        with self._stats_lock:
+            self.errors += 1
+            now = time.monotonic()
+            if now - self._warned_at < 60:
+                return
+            self._warned_at = now
+        print(f"⚠️ Redis cache error ({e}), serving cache misses")
+
+    def _read(self, key):
+        try:
+            raw = self.client.get(self._key(key))
+            return json.loads(raw) if raw else None
+        except ValueError:
+            return None
+        except self._redis_errors as e:
+            self._unavailable(e)
+            return None
+
+    def _write(self, key, entry, keep_seconds):
+        try:
+            self.client.set(self._key(key), json.dumps(entry), ex=max(1, int(keep_seconds)))
+        except self._redis_errors as e:
+            self._unavailable(e)
+
+    def _add(self, key, entry, keep_seconds):
+        try:
+            return bool(self.client.set(self._key(key), json.dumps(entry), ex=max(1, int(keep_seconds)), nx=True))
+        except self._redis_errors as e:
+            self._unavailable(e)
+            return True
+
+    def delete(self, key):
+        try:
+            self.client.delete(self._key(key))
+        except self._redis_errors as e:
+            self._unavailable(e)
+
+    def stats(self):
+        stats = super().stats()
+        stats['errors'] = self.errors
+        return stats
+
+
+def get_cache(namespace='tesla'):
+    """Pick the backend from CACHE_BACKEND / CACHE_URL.
+
+    Redis when CACHE_URL is set (and redis-py is installed), otherwise the
+    host-local file cache stands in; CACHE_BACKEND=memory forces per-process.
+    """
+    backend = CACHE_BACKEND or ('redis' if CACHE_URL else 'file')
+    if backend == 'redis':
+        try:
+            return RedisCache(CACHE_URL, namespace)
+        except Exception as e:
+            print(f"⚠️ Redis cache unavailable ({e}), using file cache")
+            backend = 'file'
+    if backend == 'file':
+        try:
+            return FileCache(CACHE_DIR, namespace)
+        except OSError as e:
+            print(f"⚠️ File cache unavailable ({e}), using in-process cache")
+    return MemoryCache(namespace)
@@ -0,0 +1,103 @@
+"""
+Single-flight request coalescing for expensive upstream calls
+Concurrent callers asking for the same key share one in-flight call instead
+of each hitting OpenAI / Alpha Vantage / Replicate / Yahoo Finance
+"""
+import os
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """In-process coalescing: the first caller for a key runs fn, the rest wait.
+
+    Followers receive the leader's result, or re-raise its exception. Nothing
+    is remembered once the call finishes; pair with a cache for that.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def cached_call(self, cache, key, fn, ttl, lease_ttl=60, wait=30, poll=0.25):
+        """Cache-aside read coalesced inside the process and across workers.
+
+        Within a process SingleFlight picks one thread. Across processes a
+        cache lease picks one worker; the others poll the shared cache for up
+        to `wait` seconds before computing themselves. Exceptions from fn are
+        not cached.
+        """
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        def leader():
+            value = cache.get(key)
+            if value is not None:
+                return value
+
+            lease = f"{key}:lease"
+            holder = cache.add(lease, os.getpid(), ttl=lease_ttl)
+            if not holder:
+                deadline = time.time() + wait
+                while time.time() < deadline:
+                    time.sleep(poll)
+                    value = cache.get(key)
+                    if value is not None:
+                        return value
+            try:
+                value = fn()
+                cache.set(key, value, ttl=ttl)
+                return value
+            finally:
+                # A follower that gave up waiting must not release the leader's lease
+                if holder:
+                    cache.delete(lease)
+
+        return self.do(key, leader)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,69 @@
+"""Streaming anomaly detection must match scoring each point in one pass"""
+import numpy as np
+import pytest
+
+from ai_analytics_engine import AIAnalyticsEngine, StreamingAnomalyDetector
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(3)
+    values = 100 + rng.normal(0, 4, 300)
+    values[[20, 75, 150, 299]] += [30, -25, 40, -35]
+    return values.tolist()
+
+
+def reference(history, threshold=2, warmup=5):
+    """Indices whose z-score against all earlier points exceeds threshold"""
+    values = np.asarray(history)
+    return [i for i in range(warmup, len(values))
+            if abs(values[i] - values[:i].mean()) > threshold * values[:i].std()]
+
+
+def test_update_many_matches_reference(history):
+    anomalies = StreamingAnomalyDetector().update_many(history)
+    assert [a['index'] for a in anomalies] == reference(history)
+
+
+def test_consume_in_chunks_matches_one_shot(history):
+    expected = StreamingAnomalyDetector().update_many(history)
+    detector = StreamingAnomalyDetector()
+    streamed = []
+    for end in (3, 5, 6, 50, 51, 160, 300):
+        streamed += detector.consume(history[:end])
+    assert detector.count == len(history)
+    assert len(streamed) == len(expected)
+    for got, want in zip(streamed, expected):
+        assert got['index'] == want['index']
+        assert got['value'] == pytest.approx(want['value'])
+        assert (got['severity'], got['type']) == (want['severity'], want['type'])
+
+
+def test_consume_restarts_on_truncated_history(history):
+    detector = StreamingAnomalyDetector()
+    detector.consume(history)
+    restarted = detector.consume(history[:100])
+    assert restarted == StreamingAnomalyDetector().update_many(history[:100])
+    assert detector.count == 100
+
+
+def test_engine_series_detection_matches_one_shot(tmp_path, history):
+    engine = AIAnalyticsEngine(model_registry=ModelRegistry(str(tmp_path / 'models')))
+    streamed = []
+    for end in (10, 100, 101, 300):
+        streamed += engine.detect_anomalies(history[:end], series_id='campaign_1')
+    assert streamed == StreamingAnomalyDetector().update_many(history)
+
+
+def test_engine_keeps_a_bounded_set_of_detectors(tmp_path, history):
+    engine = AIAnalyticsEngine(model_registry=ModelRegistry(str(tmp_path / 'models')), max_anomaly_series=3)
+    for series in ('a', 'b', 'c'):
+        engine.detect_anomalies(history[:50], series_id=series)
+    engine.detect_anomalies(history[:60], series_id='a')
+    engine.detect_anomalies(history[:50], series_id='d')
+    assert list(engine.anomaly_detectors) == ['c', 'a', 'd']
+
+    # An evicted series starts over and still matches the one-shot result
+    assert engine.detect_anomalies(history, series_id='b') == StreamingAnomalyDetector().update_many(history)
+    assert len(engine.anomaly_detectors) == 3
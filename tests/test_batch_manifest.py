@@ -0,0 +1,58 @@
+"""A reopened BatchManifest resumes where the previous run stopped"""
+import json
+
+from batch_runner import BatchManifest
+
+ITEMS = [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]
+
+
+def ids(items):
+    return [item['id'] for item in items]
+
+
+def test_resume_skips_successes_and_retries_failures(tmp_path):
+    path = str(tmp_path / 'run.manifest.jsonl')
+    with BatchManifest(path, max_attempts=2) as manifest:
+        manifest.record({'id': 'a', 'status': 'ok'})
+        manifest.record({'id': 'b', 'status': 'failed', 'error': 'timeout'})
+
+    with BatchManifest(path, max_attempts=2) as manifest:
+        assert ids(manifest.pending(ITEMS)) == ['b', 'c']
+        manifest.record({'id': 'b', 'status': 'failed', 'error': 'timeout'})
+        manifest.record({'id': 'c', 'status': 'ok'})
+
+    with BatchManifest(path, max_attempts=2) as manifest:
+        assert ids(manifest.pending(ITEMS)) == []
+        assert manifest.summary() == {'items': 3, 'succeeded': 2, 'failed': 1, 'exhausted': 1, 'skipped': 3}
+
+
+def test_torn_final_line_is_tolerated(tmp_path):
+    path = tmp_path / 'run.manifest.jsonl'
+    with BatchManifest(str(path)) as manifest:
+        manifest.record({'id': 'a', 'status': 'ok'})
+    with open(path, 'a') as f:
+        f.write('{"id": "b", "sta')
+
+    with BatchManifest(str(path)) as manifest:
+        assert ids(manifest.pending(ITEMS)) == ['b', 'c']
+        manifest.record({'id': 'b', 'status': 'ok'})
+
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[-1])['id'] == 'b'
+    with BatchManifest(str(path)) as manifest:
+        assert ids(manifest.pending(ITEMS)) == ['c']
+
+
+def test_export_keeps_latest_record_per_id(tmp_path):
+    path = str(tmp_path / 'run.manifest.jsonl')
+    out = tmp_path / 'results.json'
+    with BatchManifest(path) as manifest:
+        manifest.record({'id': 'a', 'status': 'failed'})
+        manifest.record({'id': 'b', 'status': 'ok'})
+        manifest.record({'id': 'a', 'status': 'ok', 'output': 'a.mp4'})
+        assert manifest.export(str(out)) == 2
+
+    results = {r['id']: r for r in json.loads(out.read_text())}
+    assert results['a']['output'] == 'a.mp4'
+    assert results['a']['attempt'] == 2
+    assert results['b']['status'] == 'ok'
@@ -0,0 +1,44 @@
+"""Columnar campaign reductions must match plain per-campaign sums"""
+import pytest
+
+from ai_analytics_engine import AIAnalyticsEngine, CampaignStore
+from model_registry import ModelRegistry
+
+CAMPAIGNS = {
+    'a': {'clicks': 100, 'conversions': 5, 'revenue_estimate': 15000, 'ad_spend': 2000, 'channel': 'tiktok'},
+    'b': {'clicks': 300, 'conversions': 9, 'revenue_estimate': 27000, 'ad_spend': 9000, 'channel': 'youtube'},
+    'c': {'clicks': 200, 'conversions': 9, 'revenue_estimate': 27000, 'ad_spend': 4000, 'channel': 'tiktok'},
+    'd': {'clicks': 50, 'conversions': 1, 'ad_spend': 1000}
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return AIAnalyticsEngine(model_registry=ModelRegistry(str(tmp_path / 'models')))
+
+
+def test_roi_matches_plain_sums(engine):
+    spent = sum(c.get('ad_spend', 0) for c in CAMPAIGNS.values())
+    revenue = sum(c.get('revenue_estimate', 0) for c in CAMPAIGNS.values())
+    roi = engine.calculate_roi(CAMPAIGNS)
+    assert (roi['total_spent'], roi['total_revenue'], roi['profit']) == (spent, revenue, revenue - spent)
+    assert roi['roas'] == round(revenue / spent, 2)
+
+    engine.load_campaigns(CAMPAIGNS)
+    assert engine.calculate_roi() == roi
+
+
+def test_top_keeps_first_listed_on_ties(engine):
+    store = CampaignStore.from_campaigns(CAMPAIGNS)
+    assert store.top('conversions', 3) == [
+        {'campaign_id': 'b', 'conversions': 9}, {'campaign_id': 'c', 'conversions': 9}, {'campaign_id': 'a', 'conversions': 5}
+    ]
+    insights = engine.generate_insights({'campaign_tracking': CAMPAIGNS})
+    assert insights[0]['campaign_id'] == 'b'
+
+
+def test_grouped_roi_fills_missing_dimensions(engine):
+    groups = engine.calculate_grouped_roi(CAMPAIGNS, 'channel')
+    assert groups['tiktok']['total_spent'] == 6000
+    assert groups['tiktok']['campaigns'] == 2
+    assert groups['unknown']['campaigns'] == 1
@@ -0,0 +1,137 @@
+"""Incremental linear-trend forecasts must match a fit over the full history"""
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from ai_analytics_engine import AIAnalyticsEngine, SeriesForecastCache, _history_matrix, _trend_from_state
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(7)
+    return 50 + 0.3 * np.arange(400) + rng.normal(0, 5, 400)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return AIAnalyticsEngine(model_registry=ModelRegistry(str(tmp_path / 'models')))
+
+
+@pytest.mark.parametrize('series_id', ['campaign_1', None])
+def test_incremental_state_matches_full_fit(history, series_id):
+    cache = SeriesForecastCache()
+    for n in (40, 41, 120, 121, 400):
+        state = cache.get_state(history[:n], series_id=series_id)
+        np.testing.assert_allclose(state, SeriesForecastCache().get_state(history[:n]), rtol=1e-12)
+
+        slope, intercept, _ = _trend_from_state(state)
+        expected_slope, expected_intercept = np.polyfit(np.arange(n), history[:n], 1)
+        assert slope == pytest.approx(expected_slope, rel=1e-9)
+        assert intercept == pytest.approx(expected_intercept, rel=1e-9)
+
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['incremental_updates'] == 4
+
+
+def test_rewritten_history_is_refit(history):
+    cache = SeriesForecastCache()
+    cache.get_state(history[:100], series_id='campaign_1')
+    revised = history.copy()
+    revised[10] += 100
+    assert cache.get_state(revised, series_id='campaign_1') == SeriesForecastCache().get_state(revised)
+    assert cache.stats()['misses'] == 2
+
+
+def test_predict_conversions_incremental_matches_fresh_engine(engine, tmp_path, history):
+    for n in (30, 31, 200, 400):
+        incremental = engine.predict_conversions(history[:n].tolist(), mode='incremental', series_id='c1')
+        fresh = AIAnalyticsEngine(model_registry=ModelRegistry(str(tmp_path / 'fresh')))
+        full = fresh.predict_conversions(history[:n].tolist(), mode='incremental')
+        np.testing.assert_allclose(incremental['predictions'], full['predictions'], rtol=1e-9)
+        assert incremental['confidence'] == full['confidence']
+        assert incremental['trend'] == full['trend']
+    assert engine.forecast_cache.stats()['incremental_updates'] == 3
+
+
+def full_linear_refit(history):
+    """The incremental mode's model refitted from scratch on the whole history"""
+    X = np.arange(len(history)).reshape(-1, 1)
+    future_X = np.arange(len(history), len(history) + 7).reshape(-1, 1)
+    model = LinearRegression().fit(X, history)
+    return model.predict(future_X), model.score(X, history)
+
+
+def test_incremental_matches_full_linear_refit(engine, history):
+    for n in (3, 30, 31, 200, 400):
+        forecast = engine.predict_conversions(history[:n].tolist(), mode='incremental', series_id='c1')
+        predictions, r2 = full_linear_refit(history[:n])
+        np.testing.assert_allclose(forecast['predictions'], predictions, rtol=1e-9)
+        assert forecast['confidence'] == round(r2, 2)
+        assert forecast['model'] == 'linear_trend'
+
+    batch = engine.predict_conversions_batch(history[None, :], mode='incremental')[0]
+    np.testing.assert_allclose(batch['predictions'], full_linear_refit(history)[0], rtol=1e-9)
+    assert batch['model'] == 'linear_trend'
+
+
+def test_batch_matches_single_series(engine, history):
+    histories = [history[:400], history[100:250], history[:2], history[390:]]
+    batch = engine.predict_conversions_batch(_history_matrix(histories), mode='incremental')
+    for h, forecast in zip(histories, batch):
+        single = engine.predict_conversions(h.tolist(), mode='incremental')
+        if single is None:
+            assert forecast is None
+            continue
+        np.testing.assert_allclose(forecast['predictions'], single['predictions'], rtol=1e-9)
+        assert forecast['trend'] == single['trend']
+
+
+def test_pool_workers_do_not_rerun_the_main_script(tmp_path):
+    """Spawned forest workers must not re-execute the server script as __mp_main__"""
+    log = tmp_path / 'runs.log'
+    script = tmp_path / 'fake_server.py'
+    script.write_text(textwrap.dedent(f"""
+        with open({str(log)!r}, 'a') as f:
+            f.write(__name__ + '\\n')
+        import numpy as np
+        from ai_analytics_engine import AIAnalyticsEngine
+        if __name__ == '__main__':
+            engine = AIAnalyticsEngine()
+            forecasts = engine.predict_conversions_batch(np.arange(40.0).reshape(4, 10), mode='random_forest')
+            assert all(f['model'] == 'random_forest' for f in forecasts)
+    """))
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=repo, FORECAST_WORKERS='2')
+    subprocess.run([sys.executable, str(script)], cwd=tmp_path, env=env, check=True, timeout=300)
+    assert log.read_text().split() == ['__main__']
+
+
+def test_portfolio_forests_are_loaded_from_the_registry(engine, history):
+    campaigns = {
+        'c1': {'daily_conversions': history[:30].tolist()},
+        'c2': {'daily_conversions': history[50:70].tolist()},
+        'c3': {'daily_conversions': [1.0, 2.0]}
+    }
+    first = engine.forecast_portfolio(campaigns, mode='random_forest')
+    assert first['c3'] is None
+    assert engine.model_registry.versions('forecast_c1') == [1]
+    assert engine.model_registry.versions('forecast_c2') == [1]
+
+    # Same histories: served from the registry, identical to a single-series forecast
+    assert engine.forecast_portfolio(campaigns, mode='random_forest') == first
+    assert engine.model_registry.versions('forecast_c1') == [1]
+    single = engine.predict_conversions(campaigns['c2']['daily_conversions'], series_id='c2')
+    assert single['predictions'] == first['c2']['predictions']
+
+    # Only the campaign whose history changed is refitted
+    campaigns['c1']['daily_conversions'].append(float(history[30]))
+    engine.forecast_portfolio(campaigns, mode='random_forest')
+    assert engine.model_registry.versions('forecast_c1') == [1, 2]
+    assert engine.model_registry.versions('forecast_c2') == [1]
@@ -0,0 +1,59 @@
+"""Incrementally updated indicators must match a full recompute over the same bars"""
+import numpy as np
+import pytest
+
+from indicators import IndicatorEngine
+from quote_store import DAY, QuoteStore
+
+FIELDS = ('close', 'sma', 'ema', 'rsi', 'bollinger_upper', 'bollinger_middle', 'bollinger_lower', 'volatility')
+
+
+def bars(start, closes):
+    return [(day * DAY, c, c + 1, c - 1, c, 1000 + day) for day, c in enumerate(closes, start)]
+
+
+def assert_same_series(got, want):
+    assert [p['date'] for p in got['series']] == [p['date'] for p in want['series']]
+    for field in FIELDS:
+        a = [p[field] for p in got['series']]
+        b = [p[field] for p in want['series']]
+        assert [v is None for v in a] == [v is None for v in b], field
+        np.testing.assert_allclose([v for v in a if v is not None], [v for v in b if v is not None],
+                                   rtol=1e-9, atol=1e-9, err_msg=field)
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(11)
+    return (250 * np.exp(np.cumsum(rng.normal(0, 0.02, 120)))).tolist()
+
+
+def test_incremental_matches_full_recompute(tmp_path, closes):
+    store = QuoteStore(str(tmp_path / 'bars'))
+    engine = IndicatorEngine(store)
+    day = 19000
+    for chunk in (closes[:10], closes[10:40], closes[40:41], closes[41:90], closes[90:]):
+        store.append('TSLA', bars(day, chunk))
+        day += len(chunk)
+        for limit in (30, 200):
+            assert_same_series(engine.compute('TSLA', limit=limit), IndicatorEngine(store).compute('TSLA', limit=limit))
+
+    # A revised bar for the latest day replaces it
+    store.append('TSLA', [((day - 1) * DAY + 3600, 1, 1, 1, closes[-1] * 1.05, 1)])
+    revised = engine.compute('TSLA', limit=200)
+    assert revised['series'][-1]['close'] == pytest.approx(closes[-1] * 1.05)
+    assert_same_series(revised, IndicatorEngine(store).compute('TSLA', limit=200))
+
+    stats = engine.stats()
+    assert stats['incremental_updates'] >= 5
+    assert stats['full_recomputes'] == 1
+
+
+def test_overrides_are_cached_separately(tmp_path, closes):
+    store = QuoteStore(str(tmp_path / 'bars'))
+    engine = IndicatorEngine(store)
+    store.append('TSLA', bars(19000, closes[:60]))
+    engine.compute('TSLA')
+    store.append('TSLA', bars(19060, closes[60:]))
+    assert_same_series(engine.compute('TSLA', sma=5, bollinger_k=1.5),
+                       IndicatorEngine(store).compute('TSLA', sma=5, bollinger_k=1.5))
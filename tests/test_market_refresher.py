@@ -0,0 +1,33 @@
+"""On-demand revalidation in processes that do not run the refresh loop"""
+import time
+
+from market_refresher import MarketDataRefresher
+from shared_cache import MemoryCache
+
+
+def test_missing_snapshot_is_fetched_once_and_awaited():
+    calls = []
+    refresher = MarketDataRefresher('quotes', lambda: calls.append(1) or {'price': 1}, MemoryCache(), interval=60)
+    entry = refresher.revalidate(wait=2)
+    assert entry['value'] == {'price': 1}
+    assert refresher.revalidate()['value'] == {'price': 1}
+    assert len(calls) == 1
+
+
+def test_expired_snapshot_is_served_while_it_refreshes():
+    cache = MemoryCache()
+    refresher = MarketDataRefresher('quotes', lambda: {'price': 2}, cache, interval=0.05)
+    cache.set('quotes', {'price': 1}, ttl=0.05, stale_ttl=3600)
+    time.sleep(0.1)
+    assert refresher.revalidate()['value'] == {'price': 1}
+    refresher._pending.join(2)
+    assert refresher.entry()['value'] == {'price': 2}
+
+
+def test_lease_held_elsewhere_skips_the_upstream():
+    cache = MemoryCache()
+    assert cache.add('quotes:lease', 'loop-process', ttl=60)
+    calls = []
+    refresher = MarketDataRefresher('quotes', lambda: calls.append(1) or {}, cache, interval=60)
+    assert refresher.revalidate(wait=2) is None
+    assert calls == []
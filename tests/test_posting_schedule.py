@@ -0,0 +1,59 @@
+"""Posting-slot ranking from engagement histograms"""
+import numpy as np
+import pytest
+
+from ai_analytics_engine import AIAnalyticsEngine, EngagementHistogram
+from model_registry import ModelRegistry
+
+# Monday 2024-01-08 00:00 America/Los_Angeles
+MONDAY = 1704700800
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return AIAnalyticsEngine(model_registry=ModelRegistry(str(tmp_path / 'models')))
+
+
+def batch(hours_posts, hours_events):
+    """Posts and events at the given Monday hours (local time)"""
+    return {
+        'post_timestamps': np.array([MONDAY + h * 3600 for h in hours_posts]),
+        'timestamps': np.array([MONDAY + h * 3600 + 60 for h in hours_events])
+    }
+
+
+def test_lift_is_relative_to_slots_with_posts():
+    histogram = EngagementHistogram()
+    # 9:00 -> 2 posts, 6 events; 18:00 -> 1 post, 1 event; 3:00 -> events only
+    histogram.add(batch([9, 9, 18], [9] * 6 + [18] + [3] * 10))
+    slots = histogram.ranked_slots()
+    assert [(s['day'], s['hour']) for s in slots] == [('Monday', 9), ('Monday', 18)]
+    # Baseline: 7 events over 3 posts
+    assert slots[0]['lift'] == pytest.approx(3 / (7 / 3) - 1, abs=1e-4)
+    assert slots[1]['lift'] == pytest.approx(1 / (7 / 3) - 1, abs=1e-4)
+
+
+def test_top_n_applies_after_dropping_slots_without_engagement():
+    histogram = EngagementHistogram()
+    histogram.add(batch([1, 2, 3, 4, 9], [9]))
+    assert [s['hour'] for s in histogram.ranked_slots(top_n=2)] == [9]
+
+
+def test_no_posts_gives_a_neutral_schedule(engine):
+    schedule = engine.optimize_posting_schedule(batch([], [9, 10, 11]))
+    assert schedule['slots'] == [] and schedule['best_hours'] == []
+    assert schedule['expected_boost'] == '+0% engagement'
+
+
+def test_caller_data_is_not_merged_into_the_engine(engine):
+    data = batch([9, 18], [9, 9, 18])
+    first = engine.optimize_posting_schedule(data)
+    assert engine.optimize_posting_schedule(data) == first
+    assert engine.engagement_histogram.is_empty()
+    assert engine.optimize_posting_schedule()['expected_boost'] == '+35% engagement'
+
+    engine.record_engagement(data)
+    engine.record_engagement(data)
+    recorded = engine.optimize_posting_schedule()['slots']
+    assert [s['posts'] for s in recorded] == [2 * s['posts'] for s in first['slots']]
+    assert [s['lift'] for s in recorded] == [s['lift'] for s in first['slots']]
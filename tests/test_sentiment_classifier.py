@@ -0,0 +1,38 @@
+"""Lexicon scoring of comment text"""
+import numpy as np
+import pytest
+
+from sentiment_classifier import LEXICON, SentimentClassifier
+
+
+@pytest.fixture
+def classifier():
+    return SentimentClassifier()
+
+
+def test_negator_flips_the_next_word(classifier):
+    scores = classifier.score(["good", "not good", "never slow", "not", "not not good", "don't love it"])
+    np.testing.assert_allclose(scores, [
+        LEXICON['good'], -LEXICON['good'], -LEXICON['slow'], 0.0, -LEXICON['good'], -LEXICON['love']
+    ])
+
+
+def test_negation_never_spans_two_texts(classifier):
+    np.testing.assert_allclose(classifier.score(["it is not", "good"]), [0.0, LEXICON['good']])
+
+
+def test_ascii_and_unicode_paths_agree(classifier):
+    texts = ["Not GOOD, 'great' car!", "isn't reliable... wow"]
+    ascii_scores = classifier.score(texts)
+    unicode_scores = classifier.score([t + " é" for t in texts])
+    np.testing.assert_allclose(ascii_scores, unicode_scores)
+    np.testing.assert_allclose(ascii_scores, [-LEXICON['good'] + LEXICON['great'], -LEXICON['reliable'] + LEXICON['wow']])
+
+
+def test_classify_labels_and_caches(classifier):
+    assert classifier.classify(["love it", "not good", "ok", "love it"]) == [
+        ('positive', 0.881), ('negative', 0.731), ('neutral', 0.5), ('positive', 0.881)
+    ]
+    assert classifier.stats()['misses'] == 3
+    classifier.classify(["not good"])
+    assert classifier.stats()['hits'] == 1
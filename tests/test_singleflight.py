@@ -0,0 +1,18 @@
+"""Cross-worker coalescing through a cache lease"""
+from shared_cache import MemoryCache
+from singleflight import SingleFlight
+
+
+def test_leader_releases_its_lease():
+    cache = MemoryCache()
+    assert SingleFlight().cached_call(cache, 'quote', lambda: 42, ttl=60) == 42
+    assert cache.get('quote:lease') is None
+    assert cache.get('quote') == 42
+
+
+def test_follower_that_times_out_keeps_the_leaders_lease():
+    cache = MemoryCache()
+    # Another worker holds the lease and is still computing
+    assert cache.add('quote:lease', 'leader', ttl=60)
+    assert SingleFlight().cached_call(cache, 'quote', lambda: 7, ttl=60, wait=0.05, poll=0.01) == 7
+    assert cache.get('quote:lease') == 'leader'
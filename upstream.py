@@ -0,0 +1,82 @@
+"""
+Shared clients for upstream APIs (Alpha Vantage, video CDNs, OpenAI, Replicate)
+One keep-alive connection pool and one SDK client per process, so repeat calls
+skip the TCP/TLS handshake; timeouts and retry budgets live here only
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 5))
+UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 30))
+UPSTREAM_RETRIES = int(os.getenv('UPSTREAM_RETRIES', 2))
+UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', 16))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+REPLICATE_TIMEOUT = float(os.getenv('REPLICATE_TIMEOUT', 60))
+
+_lock = threading.Lock()
+_session = None
+_openai_clients = {}
+_replicate_clients = {}
+
+
+class _UpstreamSession(requests.Session):
+    """Session that applies the default (connect, read) timeout to every request"""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+def http_session():
+    """Process-wide requests.Session with per-host keep-alive pools and retries.
+
+    Idempotent requests are retried with exponential backoff on connection
+    errors and 429/5xx responses, honouring Retry-After.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                retry = Retry(
+                    total=UPSTREAM_RETRIES,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'HEAD']),
+                    respect_retry_after_header=True,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=UPSTREAM_POOL_SIZE, pool_maxsize=UPSTREAM_POOL_SIZE, max_retries=retry)
+                session = _UpstreamSession()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def http_get(url, **kwargs):
+    return http_session().get(url, **kwargs)
+
+
+def openai_client(api_key=None):
+    """Shared OpenAI client (one HTTP pool) per API key"""
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            from openai import OpenAI
+            client = _openai_clients[api_key] = OpenAI(api_key=api_key, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES)
+        return client
+
+
+def replicate_client(api_token=None):
+    """Shared Replicate client per API token (None reads REPLICATE_API_TOKEN)"""
+    with _lock:
+        client = _replicate_clients.get(api_token)
+        if client is None:
+            import replicate
+            client = _replicate_clients[api_token] = replicate.Client(api_token=api_token, timeout=REPLICATE_TIMEOUT)
+        return client
@@ -0,0 +1,231 @@
+"""
+Content-addressed cache for generated videos
+Identical generation requests (same normalized prompt, model and sampling
+settings) reuse the MP4 already in generated_videos/ instead of paying for it again
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single-flight per process only
+    fcntl = None
+
+from singleflight import SingleFlight
+
+VIDEO_DIR = 'generated_videos'
+VIDEO_CACHE_MAX_BYTES = int(os.getenv('VIDEO_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+# Unfinished downloads are kept this long for a retry to resume
+VIDEO_SCRATCH_MAX_AGE = int(os.getenv('VIDEO_SCRATCH_MAX_AGE', 86400))
+
+_ENTRY_FILE = re.compile(r'^v_([0-9a-f]{32})\.\w+$')
+
+
+def normalize_prompt(prompt):
+    """Case- and whitespace-insensitive form of a prompt"""
+    return ' '.join(prompt.casefold().split())
+
+
+def video_cache_key(prompt, model, seed=None, num_frames=None, steps=None, guidance=None, **extra):
+    """Hash of everything that determines the output video"""
+    params = {
+        'prompt': normalize_prompt(prompt),
+        'model': model,
+        'seed': seed,
+        'num_frames': num_frames,
+        'steps': steps,
+        'guidance': guidance,
+        **extra
+    }
+    raw = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+class VideoCache:
+    """Size-bounded LRU of videos named generated_videos/v_<key>.mp4.
+
+    Entries are ordinary files in the download directory, so a hit is served
+    by the existing download routes. Sidecars with the same stem (e.g. the
+    DALL-E still) are evicted together with the video. A hit bumps the
+    file's mtime, so recency is shared by every process on the host.
+    Generation scratch lives at a fixed path per key under .tmp/, guarded by
+    a per-key flock, so a failed run's partial download (.part) is resumed
+    by the next one.
+    """
+
+    def __init__(self, root=VIDEO_DIR, max_bytes=VIDEO_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.tmp_dir = os.path.join(root, '.tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def video_id(key):
+        return f"v_{key}"
+
+    def path(self, key, ext='mp4'):
+        return os.path.join(self.root, f"{self.video_id(key)}.{ext}")
+
+    def temp_path(self, key, ext='mp4'):
+        """Scratch path for a generation in progress (outside the listed directory)"""
+        return os.path.join(self.tmp_dir, f"{self.video_id(key)}.{ext}")
+
+    def _lock_key(self, key):
+        """Hold the key's flock across processes (the file may be swept, so recheck the inode)"""
+        path = os.path.join(self.tmp_dir, f"{self.video_id(key)}.lock")
+        while True:
+            lock = open(path, 'a')
+            if not fcntl:
+                return lock
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if os.stat(path).st_ino == os.fstat(lock.fileno()).st_ino:
+                    os.utime(path)
+                    return lock
+            except FileNotFoundError:
+                pass
+            lock.close()
+
+    def lookup(self, key):
+        """(video_id, path) of a cached video, or None"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return self.video_id(key), path
+
+    def store(self, key, tmp_path, ext='mp4'):
+        """Move a finished file into the cache and return (video_id, path)"""
+        path = self.path(key, ext)
+        os.replace(tmp_path, path)
+        self.evict(keep=key)
+        return self.video_id(key), path
+
+    def get_or_generate(self, key, generate):
+        """Return the cached video or run generate(tmp_path) once to create it.
+
+        generate writes the MP4 to tmp_path and returns a truthy value on
+        success. Concurrent callers with the same key share one generation.
+        Returns (video_id, path, cached) or None if generation failed.
+        """
+        hit = self.lookup(key)
+        if hit:
+            print(f"♻️ Video cache hit: {hit[0]}")
+            return hit[0], hit[1], True
+
+        def run():
+            with self._lock_key(key):
+                # Another process may have finished it while this one waited
+                if os.path.exists(self.path(key)):
+                    return self.video_id(key), self.path(key), True
+                tmp_path = self.temp_path(key)
+                stored = False
+                try:
+                    if not generate(tmp_path) or not os.path.exists(tmp_path):
+                        return None
+                    result = (*self.store(key, tmp_path), False)
+                    stored = True
+                    return result
+                finally:
+                    # The file itself plus scratch derived from it; a failed run keeps its
+                    # partial download (.part and its source record) for the next attempt
+                    for leftover in glob.glob(glob.escape(tmp_path) + '*'):
+                        if not stored and '.part' in leftover[len(tmp_path):]:
+                            continue
+                        os.remove(leftover)
+
+        return self.flight.do(key, run)
+
+    def _entries(self):
+        """key -> [total bytes, newest mtime, file names] over the video and its sidecars"""
+        entries = {}
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return entries
+        for name in names:
+            match = _ENTRY_FILE.match(name)
+            if not match:
+                continue
+            try:
+                st = os.stat(os.path.join(self.root, name))
+            except OSError:
+                continue
+            entry = entries.setdefault(match.group(1), [0, 0, []])
+            entry[0] += st.st_size
+            entry[1] = max(entry[1], st.st_mtime)
+            entry[2].append(name)
+        return entries
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        entries = self._entries()
+        total = sum(entry[0] for entry in entries.values())
+        for key, (size, _, names) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass
+            total -= size
+            print(f"🧹 Evicted cached video {self.video_id(key)} ({size / 1e6:.1f} MB)")
+        self.sweep_scratch()
+        return total
+
+    def sweep_scratch(self, max_age=VIDEO_SCRATCH_MAX_AGE):
+        """Delete abandoned scratch files (and idle key locks) older than max_age"""
+        cutoff = time.time() - max_age
+        try:
+            names = os.listdir(self.tmp_dir)
+        except OSError:
+            return 0
+        removed = 0
+        for name in names:
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue
+                if name.endswith('.lock') and fcntl:
+                    with open(path, 'a') as lock:
+                        try:
+                            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            continue  # a generation holds it
+                        os.remove(path)
+                else:
+                    os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(entries),
+                'bytes': sum(entry[0] for entry in entries.values()),
+                'max_bytes': self.max_bytes
+            }